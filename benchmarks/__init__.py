@@ -0,0 +1,3 @@
+"""
+Benchmarks for EPO OPS MCP Server
+"""
@@ -0,0 +1,351 @@
+"""
+Local stand-in for the EPO OPS REST API
+
+Serves biblio, fulltext, family, legal, register, search and image responses
+shaped like the real service (same URL layout, namespaces and headers), with
+configurable latency, throttling headers and error rates, so the MCP server
+can be benchmarked offline. Point the server at it with
+``OPS_BASE_URL=http://127.0.0.1:<port>/3.2``.
+
+Run standalone::
+
+    python -m benchmarks.fake_ops --port 8089 --latency 0.05 --error-503 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass
+from urllib.parse import parse_qs
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+EXCHANGE_NS = 'xmlns="http://www.epo.org/exchange" xmlns:ops="http://ops.epo.org"'
+
+BIBLIO_DOCUMENT = """<exchange-document system="ops.epo.org" family-id="{family}" country="{country}" doc-number="{number}" kind="{kind}">
+  <bibliographic-data>
+    <publication-reference>
+      <document-id document-id-type="docdb"><country>{country}</country><doc-number>{number}</doc-number><kind>{kind}</kind><date>20200115</date></document-id>
+      <document-id document-id-type="epodoc"><doc-number>{country}{number}</doc-number><date>20200115</date></document-id>
+    </publication-reference>
+    <classifications-ipcr>
+      <classification-ipcr sequence="1"><text>B65G  49/    07            A I</text></classification-ipcr>
+      <classification-ipcr sequence="2"><text>H01L  21/    67            A I</text></classification-ipcr>
+    </classifications-ipcr>
+    <application-reference doc-id="5{number}">
+      <document-id document-id-type="docdb"><country>{country}</country><doc-number>1{number}</doc-number><kind>A</kind><date>20180703</date></document-id>
+    </application-reference>
+    <priority-claims>
+      <priority-claim sequence="1" kind="national">
+        <document-id document-id-type="docdb"><country>US</country><doc-number>2017{number}</doc-number><kind>P</kind><date>20170703</date></document-id>
+      </priority-claim>
+    </priority-claims>
+    <parties>
+      <applicants>
+        <applicant sequence="1" data-format="epodoc"><applicant-name><name>ACME CORP [US]</name></applicant-name></applicant>
+        <applicant sequence="1" data-format="original"><applicant-name><name>Acme Corporation</name></applicant-name></applicant>
+      </applicants>
+      <inventors>
+        <inventor sequence="1" data-format="epodoc"><inventor-name><name>DOE JANE [US]</name></inventor-name></inventor>
+        <inventor sequence="2" data-format="epodoc"><inventor-name><name>ROE RICHARD [US]</name></inventor-name></inventor>
+      </inventors>
+    </parties>
+    <invention-title lang="de">Vorrichtung zur Herstellung von Rohlingen</invention-title>
+    <invention-title lang="en">Apparatus for manufacturing green bricks</invention-title>
+    <references-cited>{citations}</references-cited>
+  </bibliographic-data>
+  <abstract lang="en"><p>{abstract}</p></abstract>
+</exchange-document>"""
+
+CITATION = """<citation cited-phase="search" sequence="{0}"><patcit num="{0}"><document-id document-id-type="docdb"><country>US</country><doc-number>4{0:06d}</doc-number><kind>A</kind></document-id></patcit></citation>"""
+
+ABSTRACT = (
+    "The invention relates to an apparatus for manufacturing green bricks comprising a mould, "
+    "a press and a conveyor arranged to transport the pressed bricks to a drying station. "
+) * 4
+
+FULLTEXT = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data xmlns="http://www.epo.org/fulltext" xmlns:ops="http://ops.epo.org">
+  <ftxt:fulltext-documents xmlns:ftxt="http://www.epo.org/fulltext">
+    <ftxt:fulltext-document system="ops.epo.org" fulltext-format="text-only">
+      <bibliographic-data>
+        <publication-reference data-format="docdb">
+          <document-id><country>{country}</country><doc-number>{number}</doc-number><kind>{kind}</kind></document-id>
+        </publication-reference>
+      </bibliographic-data>
+      {body}
+    </ftxt:fulltext-document>
+  </ftxt:fulltext-documents>
+</ops:world-patent-data>"""
+
+FAMILY_MEMBER = """<ops:family-member family-id="{family}">
+  <publication-reference><document-id document-id-type="docdb"><country>{country}</country><doc-number>{number}</doc-number><kind>A1</kind><date>20200115</date></document-id></publication-reference>
+  <application-reference><document-id document-id-type="docdb"><country>{country}</country><doc-number>1{number}</doc-number><kind>A</kind></document-id></application-reference>
+  <priority-claim kind="national" sequence="1"><document-id document-id-type="docdb"><country>US</country><doc-number>2017{number}</doc-number><kind>P</kind></document-id></priority-claim>
+  {legal}
+</ops:family-member>"""
+
+LEGAL_EVENT = """<ops:legal code="{code}" desc="LEGAL EVENT {code}" infl="+">
+  <ops:pre>{code}  20200115  {country}  A1</ops:pre>
+  <ops:L001EP>{country}</ops:L001EP><ops:L007EP>20200115</ops:L007EP><ops:L500EP>AT BE CH DE FR GB</ops:L500EP>
+</ops:legal>"""
+
+REGISTER = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data xmlns:ops="http://ops.epo.org" xmlns:reg="http://www.epo.org/register">
+  <reg:register-documents>{documents}</reg:register-documents>
+</ops:world-patent-data>"""
+
+REGISTER_DOCUMENT = """<reg:register-document>
+  <reg:bibliographic-data>
+    <reg:publication-reference><reg:document-id><reg:country>EP</reg:country><reg:doc-number>{number}</reg:doc-number><reg:kind>A1</reg:kind></reg:document-id></reg:publication-reference>
+    <reg:application-reference><reg:document-id><reg:country>EP</reg:country><reg:doc-number>1{number}</reg:doc-number><reg:date>20180703</reg:date></reg:document-id></reg:application-reference>
+    <reg:parties><reg:applicants><reg:applicant><reg:addressbook><reg:name>Acme Corporation</reg:name></reg:addressbook></reg:applicant></reg:applicants></reg:parties>
+    <reg:designation-of-states><reg:designation-pct><reg:regional><reg:country>DE</reg:country><reg:country>FR</reg:country><reg:country>GB</reg:country></reg:regional></reg:designation-pct></reg:designation-of-states>
+    <reg:invention-title lang="en">Apparatus for manufacturing green bricks</reg:invention-title>
+  </reg:bibliographic-data>
+  <reg:ep-patent-statuses><reg:ep-patent-status status-code="8">Grant of patent is intended</reg:ep-patent-status></reg:ep-patent-statuses>
+  <reg:events-data>{events}</reg:events-data>
+</reg:register-document>"""
+
+REGISTER_EVENT = """<reg:dossier-event><reg:event-date><reg:date>2020011{0}</reg:date></reg:event-date><reg:event-code>000{0}EPPU</reg:event-code><reg:event-text>Event {0}</reg:event-text></reg:dossier-event>"""
+
+SEARCH_HIT = """<ops:publication-reference system="ops.epo.org" family-id="7{0:07d}" logical-doc-id="{0}"><document-id document-id-type="docdb"><country>EP</country><doc-number>3{0:06d}</doc-number><kind>A1</kind></document-id></ops:publication-reference>"""
+
+IMAGE_INQUIRY = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data {ns}>
+  <ops:document-inquiry><ops:inquiry-result>
+    <ops:document-instance system="ops.epo.org" number-of-pages="4" desc="Drawing" link="published-data/images/{country}/{number}/{kind}/thumbnail">
+      <ops:document-format-options><ops:document-format>application/tiff</ops:document-format></ops:document-format-options>
+    </ops:document-instance>
+    <ops:document-instance system="ops.epo.org" number-of-pages="12" desc="FullDocument" link="published-data/images/{country}/{number}/{kind}/fullimage">
+      <ops:document-format-options><ops:document-format>application/pdf</ops:document-format><ops:document-format>application/tiff</ops:document-format></ops:document-format-options>
+    </ops:document-instance>
+  </ops:inquiry-result></ops:document-inquiry>
+</ops:world-patent-data>"""
+
+_NUMBER_RE = re.compile(r"\(?([A-Z]{2})\)?\.?\(?(\d+)\)?(?:\.\(?([A-Z]\d?)\)?)?")
+
+
+@dataclass
+class FakeOpsConfig:
+    """Behaviour of the stand-in server."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_403: float = 0.0
+    error_503: float = 0.0
+    throttle: str = (
+        "idle (images=green:100000, inpadoc=green:100000, other=green:100000, "
+        "retrieval=green:100000, search=green:100000)"
+    )
+    fulltext_paragraphs: int = 200
+    image_bytes: int = 64 * 1024
+    seed: int = None
+
+
+def _numbers(body: str):
+    """Document numbers posted to a retrieval endpoint, as (country, number, kind)."""
+    numbers = []
+    for line in body.splitlines() or [body]:
+        match = _NUMBER_RE.search(line.replace(" ", ""))
+        if match:
+            numbers.append((match.group(1), match.group(2), match.group(3) or "A1"))
+    return numbers or [("EP", "1000000", "A1")]
+
+
+def _family_id(number: str) -> str:
+    return str(10000000 + int(number[-7:]) % 9000000)
+
+
+def biblio(numbers) -> str:
+    documents = []
+    for country, number, kind in numbers:
+        documents.append(BIBLIO_DOCUMENT.format(
+            country=country, number=number, kind=kind, family=_family_id(number),
+            citations="".join(CITATION.format(i) for i in range(1, 9)),
+            abstract=ABSTRACT,
+        ))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<ops:world-patent-data {0}>'
+        "<exchange-documents>{1}</exchange-documents></ops:world-patent-data>"
+    ).format(EXCHANGE_NS, "".join(documents))
+
+
+def fulltext(numbers, section: str, paragraphs: int) -> str:
+    country, number, kind = numbers[0]
+    claims = '<claims lang="EN"><claim>{0}</claim></claims>'.format("".join(
+        "<claim-text>{0}. Apparatus according to claim {1}, comprising a mould and a press.</claim-text>".format(i, max(1, i - 1))
+        for i in range(1, paragraphs // 10 + 2)
+    ))
+    description = '<description lang="EN">{0}</description>'.format("".join(
+        "<p>[{0:04d}] The invention relates to an apparatus for manufacturing green bricks. "
+        "A mould receives clay which is pressed and conveyed to a drying station.</p>".format(i)
+        for i in range(1, paragraphs + 1)
+    ))
+    body = {"claims": claims, "description": description}.get(section, claims + description)
+    return FULLTEXT.format(country=country, number=number, kind=kind, body=body)
+
+
+def family(numbers, with_legal: bool, size: int = 5) -> str:
+    country, number, _ = numbers[0]
+    family_id = _family_id(number)
+    countries = (country, "US", "CN", "JP", "WO", "DE", "KR", "AU")
+    members = []
+    for i in range(size):
+        member_country = countries[i % len(countries)]
+        legal = "".join(
+            LEGAL_EVENT.format(code=code, country=member_country) for code in ("AK", "AX", "17P", "RBV")
+        ) if with_legal else ""
+        members.append(FAMILY_MEMBER.format(
+            family=family_id, country=member_country, number=str(int(number) + i), legal=legal
+        ))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<ops:world-patent-data {0}>'
+        '<ops:patent-family family-id="{1}" total-result-count="{2}">{3}</ops:patent-family>'
+        "</ops:world-patent-data>"
+    ).format(EXCHANGE_NS, family_id, len(members), "".join(members))
+
+
+def register(numbers) -> str:
+    documents = "".join(
+        REGISTER_DOCUMENT.format(number=number, events="".join(REGISTER_EVENT.format(i) for i in range(1, 10)))
+        for _, number, _ in numbers
+    )
+    return REGISTER.format(documents=documents)
+
+
+def search(query: str, begin: int, end: int, total: int = 1500, register_search: bool = False) -> str:
+    end = min(end, total)
+    if register_search:
+        results = "".join(
+            REGISTER_DOCUMENT.format(number=3000000 + i, events=REGISTER_EVENT.format(1))
+            for i in range(begin, end + 1)
+        )
+        body = '<ops:register-search total-result-count="{0}"><ops:query syntax="CQL">{1}</ops:query>' \
+               '<ops:range begin="{2}" end="{3}"/><reg:register-documents>{4}</reg:register-documents>' \
+               '</ops:register-search>'
+        namespaces = 'xmlns:ops="http://ops.epo.org" xmlns:reg="http://www.epo.org/register"'
+    else:
+        results = "".join(SEARCH_HIT.format(i) for i in range(begin, end + 1))
+        body = '<ops:biblio-search total-result-count="{0}"><ops:query syntax="CQL">{1}</ops:query>' \
+               '<ops:range begin="{2}" end="{3}"/><ops:search-result>{4}</ops:search-result>' \
+               '</ops:biblio-search>'
+        namespaces = EXCHANGE_NS
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<ops:world-patent-data {0}>{1}</ops:world-patent-data>'.format(
+        namespaces, body.format(total, query.replace("<", "&lt;"), begin, end, results)
+    )
+
+
+def image(size: int, page: int) -> bytes:
+    """Bytes shaped like a little-endian TIFF page (header plus filler)."""
+    header = b"II*\x00\x08\x00\x00\x00"
+    return header + bytes((page + i) % 256 for i in range(max(0, size - len(header))))
+
+
+def create_app(config: FakeOpsConfig = None) -> Starlette:
+    """Build the stand-in OPS application."""
+    config = config or FakeOpsConfig()
+    rng = random.Random(config.seed)
+    stats = {"requests": 0, "errors": 0}
+
+    def xml(content: str) -> Response:
+        return Response(content, media_type="application/xml", headers={"X-Throttling-Control": config.throttle})
+
+    async def token(request: Request) -> Response:
+        return Response(
+            json.dumps({"access_token": "fake-token", "token_type": "BearerToken", "expires_in": "1199"}),
+            media_type="application/json",
+        )
+
+    async def service(request: Request) -> Response:
+        stats["requests"] += 1
+        if config.latency or config.jitter:
+            await asyncio.sleep(max(0.0, config.latency + rng.uniform(-config.jitter, config.jitter)))
+
+        roll = rng.random()
+        if roll < config.error_403:
+            stats["errors"] += 1
+            return Response(
+                "<error><code>CLIENT.RobotDetected</code><message>Recognized as robot</message></error>",
+                status_code=403, media_type="application/xml",
+                headers={"X-Throttling-Control": config.throttle, "Retry-After": "1000"},
+            )
+        if roll < config.error_403 + config.error_503:
+            stats["errors"] += 1
+            return Response(
+                "<error><code>SERVER.DomainAccess</code><message>Service unavailable</message></error>",
+                status_code=503, media_type="application/xml",
+            )
+
+        path = request.path_params["path"]
+        body = (await request.body()).decode("utf-8", "replace")
+        if path.endswith("search"):
+            query = {k: v[0] for k, v in parse_qs(body).items()}.get("q", request.query_params.get("q", ""))
+            window = request.headers.get("X-OPS-Range") or request.headers.get("Range") or "1-25"
+            begin, _, end = window.partition("-")
+            return xml(search(query, int(begin), int(end or begin), register_search=path.startswith("register")))
+
+        if path.startswith("published-data/images"):
+            page = int(request.query_params.get("Range", 1))
+            return Response(
+                image(config.image_bytes, page),
+                media_type=request.headers.get("Accept", "application/tiff"),
+                headers={"X-Throttling-Control": config.throttle},
+            )
+
+        segments = path.split("/")
+        numbers = _numbers(body if request.method == "POST" else "/".join(segments[3:]))
+        if path.startswith("family"):
+            return xml(family(numbers, with_legal="legal" in segments))
+        if path.startswith("legal"):
+            return xml(family(numbers, with_legal=True))
+        if path.startswith("register"):
+            return xml(register(numbers))
+        if path.startswith("number-service"):
+            return xml(biblio(numbers[:1]))
+        for section in ("fulltext", "claims", "description"):
+            if section in segments:
+                return xml(fulltext(numbers, section, config.fulltext_paragraphs))
+        if "images" in segments:
+            country, number, kind = numbers[0]
+            return xml(IMAGE_INQUIRY.format(ns=EXCHANGE_NS, country=country, number=number, kind=kind))
+        return xml(biblio(numbers))
+
+    async def counters(request: Request) -> Response:
+        return Response(json.dumps(stats), media_type="application/json")
+
+    app = Starlette(routes=[
+        Route("/3.2/auth/accesstoken", token, methods=["POST"]),
+        Route("/3.2/rest-services/{path:path}", service, methods=["GET", "POST"]),
+        Route("/stats", counters, methods=["GET"]),
+    ])
+    app.state.stats = stats
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the EPO OPS API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.02, help="random +/- seconds around --latency")
+    parser.add_argument("--error-403", type=float, default=0.0, help="share of requests answered 403")
+    parser.add_argument("--error-503", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--throttle", default=FakeOpsConfig.throttle, help="X-Throttling-Control header value")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeOpsConfig(
+        latency=args.latency, jitter=args.jitter, error_403=args.error_403,
+        error_503=args.error_503, throttle=args.throttle,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Microbenchmarks for the local hot path of a tool call
+
+Measures, without any network, the three stages every call pays for:
+
+- ``validate``: ``validate_pat_number`` on DocDB and EpoDoc input
+- ``parse``: ``format_response`` on OPS XML (parsed data only, as with ``include_raw=False``)
+- ``serialize``: JSON encoding of the parsed result, the way FastMCP does it
+
+over a corpus of real-sized payloads built with the OPS stand-in generators
+(a small biblio record, a ~1 MB description, a 100-hit search page and a
+large INPADOC family with legal events). For each stage and payload it
+reports throughput, mean time (of the fastest round) and the memory of one
+run (tracemalloc peak and the number of blocks still held by the result).
+Baseline numbers live in ``baseline_micro.json``::
+
+    python -m benchmarks.micro                    # print the table
+    python -m benchmarks.micro --compare          # exit 1 on regression vs. the baseline
+    python -m benchmarks.micro --update-baseline  # record new baseline numbers
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+import pydantic_core
+
+from benchmarks import fake_ops
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_micro.json")
+
+NUMBER = [("EP", "1000000", "A1")]
+
+
+def corpus() -> Dict[str, bytes]:
+    """OPS XML payloads by name, encoded as OPS sends them."""
+    payloads = {
+        "biblio_small": fake_ops.biblio(NUMBER),
+        # ~150 bytes per paragraph
+        "description_1mb": fake_ops.fulltext(NUMBER, "description", 7000),
+        "search_100": fake_ops.search("ti=brick", 1, 100),
+        "family_large": fake_ops.family(NUMBER, with_legal=True, size=400),
+    }
+    return {name: payload.encode("utf-8") for name, payload in payloads.items()}
+
+
+VALIDATE_INPUTS = {
+    "docdb": {"country_code": "EP", "number": "1000000", "kind_code": "A1"},
+    "epodoc": {"number": "EP1000000", "kind_code": "A1"},
+}
+
+
+def stages() -> Dict[str, Dict[str, tuple]]:
+    """``{stage: {payload: (function, argument, size in bytes)}}``."""
+    from main import validate_pat_number
+    from epo_ops_mcp_server.utils.response import format_response
+
+    def parse(content):
+        return format_response(content, "application/xml", include_raw=False)
+
+    def serialize(result):
+        return pydantic_core.to_json(result)
+
+    payloads = corpus()
+    parsed = {name: parse(content) for name, content in payloads.items()}
+    return {
+        "validate": {
+            name: (validate_pat_number, data, len(json.dumps(data)))
+            for name, data in VALIDATE_INPUTS.items()
+        },
+        "parse": {
+            name: (parse, content, len(content)) for name, content in payloads.items()
+        },
+        "serialize": {
+            name: (serialize, result, len(serialize(result))) for name, result in parsed.items()
+        },
+    }
+
+
+def measure(fn: Callable, argument, min_time: float = 0.2, repeat: int = 5) -> Dict:
+    """
+    Time ``fn(argument)`` in ``repeat`` rounds of at least ``min_time / repeat``
+    seconds and keep the fastest round (least disturbed by other load), then
+    trace one run's memory.
+    """
+    fn(argument)
+    runs = 0
+    best = None
+    for _ in range(repeat):
+        round_runs = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time / repeat or round_runs < 1:
+            fn(argument)
+            round_runs += 1
+            elapsed = time.perf_counter() - start
+        runs += round_runs
+        mean = elapsed / round_runs
+        best = mean if best is None else min(best, mean)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = fn(argument)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        del result
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    return {"runs": runs, "mean_us": best * 1e6, "peak_kb": peak / 1024, "blocks": blocks}
+
+
+def run(min_time: float = 0.2, only=None) -> Dict[str, Dict]:
+    """Results keyed ``stage/payload``."""
+    results = {}
+    for stage, cases in stages().items():
+        if only and stage not in only:
+            continue
+        for payload, (fn, argument, size) in cases.items():
+            result = measure(fn, argument, min_time)
+            result["ops_per_sec"] = 1e6 / result["mean_us"]
+            result["mb_per_sec"] = size / result["mean_us"]
+            result["bytes"] = size
+            results["{0}/{1}".format(stage, payload)] = {
+                k: round(v, 2) if isinstance(v, float) else v for k, v in result.items()
+            }
+    return results
+
+
+def compare(results: Dict, baseline: Dict, time_tolerance: float, memory_tolerance: float) -> list:
+    """Regressions: slower than ``1 + time_tolerance`` or more peak memory than ``1 + memory_tolerance`` times the baseline."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if time_tolerance is not None and current["mean_us"] > previous["mean_us"] * (1 + time_tolerance):
+            regressions.append("{0}: {1} us -> {2} us".format(key, previous["mean_us"], current["mean_us"]))
+        if current["peak_kb"] > previous["peak_kb"] * (1 + memory_tolerance) + 16:
+            regressions.append("{0}: peak {1} KiB -> {2} KiB".format(key, previous["peak_kb"], current["peak_kb"]))
+    return regressions
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for validate/parse/serialize")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent timing each case")
+    parser.add_argument("--stages", nargs="+", choices=["validate", "parse", "serialize"])
+    parser.add_argument("--compare", action="store_true", help="exit 1 on regression vs. the baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.min_time, args.stages)
+    print("{0:<30} {1:>12} {2:>10} {3:>10} {4:>12} {5:>10}".format(
+        "stage/payload", "mean us", "ops/s", "MB/s", "peak KiB", "blocks"
+    ))
+    for key, r in results.items():
+        print("{0:<30} {1:>12} {2:>10} {3:>10} {4:>12} {5:>10}".format(
+            key, r["mean_us"], r["ops_per_sec"], r["mb_per_sec"], r["peak_kb"], r["blocks"]
+        ))
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        regressions = compare(results, load_baseline(), args.time_tolerance, args.memory_tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+End-to-end benchmark of the MCP server against the local OPS stand-in
+
+Starts ``benchmarks.fake_ops`` and the MCP server (over stdio and/or
+streamable HTTP), calls every tool at several concurrency levels and reports
+p50/p95/p99 latency and requests per second per tool. Results can be saved
+and compared against a saved baseline to catch regressions::
+
+    python -m benchmarks.run --requests 50 --concurrency 1 8 32 --json results.json
+    python -m benchmarks.run --compare results.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+from fastmcp import Client
+from fastmcp.client.transports import StdioTransport
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _number(i: int) -> str:
+    return str(1000000 + i)
+
+
+# Tool name -> function building the arguments of call ``i`` (distinct numbers,
+# so requests are not coalesced or served from a cache)
+WORKLOADS = {
+    "get_published_data": lambda i: {
+        "reference_type": "publication", "input_data": {"number": "EP" + _number(i)}, "include_raw": False,
+    },
+    "get_published_data_fulltext": lambda i: {
+        "reference_type": "publication", "input_data": {"number": "EP" + _number(i)},
+        "endpoint": "fulltext", "include_raw": False,
+    },
+    "get_published_data_batch": lambda i: {
+        "reference_type": "publication",
+        "input_data_list": [{"number": "EP" + _number(i * 20 + j)} for j in range(20)],
+        "include_raw": False,
+    },
+    "search_published_data": lambda i: {
+        "cql": "ti=brick{0}".format(i), "range_begin": 1, "range_end": 100, "include_raw": False,
+    },
+    "get_family": lambda i: {
+        "reference_type": "publication", "input_data": {"number": "EP" + _number(i)}, "include_raw": False,
+    },
+    "get_legal": lambda i: {
+        "reference_type": "publication", "input_data": {"number": "EP" + _number(i)}, "include_raw": False,
+    },
+    "get_register": lambda i: {
+        "reference_type": "publication", "input_data": {"number": "EP" + _number(i)}, "include_raw": False,
+    },
+    "search_register": lambda i: {
+        "cql": "pa=acme{0}".format(i), "range_begin": 1, "range_end": 25, "include_raw": False,
+    },
+    "get_image": lambda i: {
+        "path": "published-data/images/EP/{0}/A1/fullimage".format(_number(i)), "pages": "1-2",
+    },
+}
+
+
+def tool_name(workload: str) -> str:
+    """MCP tool a workload calls (several workloads may share one tool)."""
+    return "get_published_data" if workload == "get_published_data_fulltext" else workload
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int, wall: float) -> Dict:
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "rps": round(len(latencies) / wall, 2) if wall else None,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("{0} exited with {1}".format(process.args, process.returncode))
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("Timed out waiting for {0}".format(url))
+
+
+async def run_workload(client: Client, workload: str, requests: int, concurrency: int) -> Dict:
+    """Call one workload ``requests`` times with at most ``concurrency`` calls in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    offset = int(time.time() * 1000) % 1000000
+
+    async def call(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            result = await client.call_tool(
+                tool_name(workload), WORKLOADS[workload](offset + i), raise_on_error=False
+            )
+            latencies.append(time.perf_counter() - start)
+            if result.is_error:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_transport(client: Client, workloads, requests, levels) -> Dict:
+    results = {}
+    async with client:
+        # One untimed call per workload warms imports, tokens and connections
+        for workload in workloads:
+            await client.call_tool(tool_name(workload), WORKLOADS[workload](0), raise_on_error=False)
+        for workload in workloads:
+            for concurrency in levels:
+                results["{0}@{1}".format(workload, concurrency)] = await run_workload(
+                    client, workload, requests, concurrency
+                )
+    return results
+
+
+def server_env(ops_url: str, scratch: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "EPO_OPS_KEY": "benchmark",
+        "EPO_OPS_SECRET": "benchmark",
+        "OPS_BASE_URL": ops_url,
+        "CACHE_ENABLED": "false",
+        "QUOTA_PATH": os.path.join(scratch, "quota.json"),
+        "OPS_TOKEN_PATH": os.path.join(scratch, "token.json"),
+        "IMAGE_CACHE_DIR": os.path.join(scratch, "images"),
+        "PYTHONPATH": ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    return env
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline``: p95 latency up or RPS down by more than ``tolerance``."""
+    regressions = []
+    for transport, runs in results.items():
+        for key, current in runs.items():
+            previous = baseline.get(transport, {}).get(key)
+            if not previous or "p95_ms" not in previous or "p95_ms" not in current:
+                continue
+            if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+                regressions.append("{0} {1}: p95 {2} ms -> {3} ms".format(
+                    transport, key, previous["p95_ms"], current["p95_ms"]
+                ))
+            if previous.get("rps") and current["rps"] < previous["rps"] * (1 - tolerance):
+                regressions.append("{0} {1}: {2} -> {3} requests/s".format(
+                    transport, key, previous["rps"], current["rps"]
+                ))
+    return regressions
+
+
+def print_table(results: Dict) -> None:
+    header = "{0:<10} {1:<32} {2:>6} {3:>6} {4:>10} {5:>10} {6:>10} {7:>10}".format(
+        "transport", "tool@concurrency", "n", "errors", "p50 ms", "p95 ms", "p99 ms", "req/s"
+    )
+    print(header)
+    print("-" * len(header))
+    for transport, runs in results.items():
+        for key, r in runs.items():
+            print("{0:<10} {1:<32} {2:>6} {3:>6} {4:>10} {5:>10} {6:>10} {7:>10}".format(
+                transport, key, r["requests"], r["errors"], r.get("p50_ms", "-"),
+                r.get("p95_ms", "-"), r.get("p99_ms", "-"), r.get("rps", "-"),
+            ))
+
+
+async def main_async(args) -> int:
+    workloads = args.tools or list(WORKLOADS)
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        raise SystemExit("Unknown tools: {0}".format(", ".join(sorted(unknown))))
+
+    processes = []
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        try:
+            ops_port = free_port()
+            fake_ops = subprocess.Popen([
+                sys.executable, "-m", "benchmarks.fake_ops", "--port", str(ops_port),
+                "--latency", str(args.latency), "--jitter", str(args.jitter),
+                "--error-403", str(args.error_403), "--error-503", str(args.error_503),
+            ], cwd=ROOT)
+            processes.append(fake_ops)
+            wait_for("http://127.0.0.1:{0}/stats".format(ops_port), fake_ops)
+            env = server_env("http://127.0.0.1:{0}/3.2".format(ops_port), scratch)
+
+            if "stdio" in args.transports:
+                client = Client(StdioTransport(sys.executable, [os.path.join(ROOT, "main.py")], env=env, cwd=ROOT))
+                results["stdio"] = await run_transport(client, workloads, args.requests, args.concurrency)
+
+            if "http" in args.transports:
+                port = free_port()
+                server = subprocess.Popen([
+                    sys.executable, "-c",
+                    "import main; main.mcp.run(transport='http', host='127.0.0.1', port={0}, log_level='warning')".format(port),
+                ], cwd=ROOT, env=env)
+                processes.append(server)
+                wait_for("http://127.0.0.1:{0}/metrics".format(port), server)
+                client = Client("http://127.0.0.1:{0}/mcp/".format(port))
+                results["http"] = await run_transport(client, workloads, args.requests, args.concurrency)
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait(timeout=10)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the EPO OPS MCP server against a local OPS stand-in")
+    parser.add_argument("--transports", nargs="+", default=["stdio", "http"], choices=["stdio", "http"])
+    parser.add_argument("--tools", nargs="+", help="workloads to run (default: all)")
+    parser.add_argument("--requests", type=int, default=50, help="calls per tool and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in OPS latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-403", type=float, default=0.0)
+    parser.add_argument("--error-503", type=float, default=0.0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Cold-start benchmark of the MCP server
+
+Measures, in fresh processes, what an agent waits for when it launches the
+server per session over stdio:
+
+- ``import``: importing ``main`` (``python -c "import main"``)
+- ``handshake``: spawning ``main.py`` until the MCP ``initialize`` exchange completes
+- ``first_call``: the first tool call after the handshake (token and client warm-up included)
+
+The first call goes to the local OPS stand-in (``benchmarks.fake_ops``)
+without added latency, so the numbers show the server's own cost. The OPS
+client warms up in the background once the server starts; ``--delay`` waits
+between the handshake and the first call, as an agent does while its model
+picks a tool, to show how much of that warm-up it hides::
+
+    python -m benchmarks.startup --runs 10 --json startup.json
+    python -m benchmarks.startup --delay 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from fastmcp import Client
+from fastmcp.client.transports import StdioTransport
+
+from benchmarks.run import ROOT, WORKLOADS, free_port, percentile, server_env, wait_for
+
+
+def time_import(env: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], cwd=ROOT, env=env, check=True)
+    return time.perf_counter() - start
+
+
+async def time_session(env: Dict[str, str], tool: str, delay: float = 0.0) -> Dict[str, float]:
+    client = Client(StdioTransport(sys.executable, [os.path.join(ROOT, "main.py")], env=env, cwd=ROOT))
+    start = time.perf_counter()
+    async with client:
+        handshake = time.perf_counter() - start
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        result = await client.call_tool(tool, WORKLOADS[tool](0), raise_on_error=False)
+        first_call = time.perf_counter() - start
+    if result.is_error:
+        raise RuntimeError("First {0} call failed: {1}".format(tool, result.content))
+    return {"handshake": handshake, "first_call": first_call}
+
+
+def summarize(samples: List[float]) -> Dict:
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 1),
+    }
+
+
+async def main_async(args) -> Dict:
+    samples = {"import": [], "handshake": [], "first_call": []}
+    with tempfile.TemporaryDirectory() as scratch:
+        ops_port = free_port()
+        fake_ops = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.fake_ops", "--port", str(ops_port), "--latency", "0", "--jitter", "0"],
+            cwd=ROOT,
+        )
+        try:
+            wait_for("http://127.0.0.1:{0}/stats".format(ops_port), fake_ops)
+            env = server_env("http://127.0.0.1:{0}/3.2".format(ops_port), scratch)
+            env["PYTHONWARNINGS"] = "ignore"
+            for _ in range(args.runs):
+                samples["import"].append(time_import(env))
+                session = await time_session(env, args.tool, args.delay)
+                samples["handshake"].append(session["handshake"])
+                samples["first_call"].append(session["first_call"])
+        finally:
+            fake_ops.terminate()
+            fake_ops.wait(timeout=10)
+    return {name: summarize(values) for name, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the MCP server's cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tool", default="get_published_data", choices=sorted(WORKLOADS))
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds between handshake and first call")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print("{0:<12} {1:>6} {2:>10} {3:>10} {4:>10}".format("phase", "runs", "min ms", "median ms", "p95 ms"))
+    for name, r in results.items():
+        print("{0:<12} {1:>6} {2:>10} {3:>10} {4:>10}".format(
+            name, r["runs"], r["min_ms"], r["median_ms"], r["p95_ms"]
+        ))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
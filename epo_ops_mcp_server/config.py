@@ -2,7 +2,7 @@
 Configuration for EPO OPS MCP Server
 """
 import os
-from typing import Optional
+from typing import Dict, Optional
 # from pydantic import BaseSettings
 from pydantic_settings import BaseSettings
 
@@ -12,13 +12,95 @@ class Settings(BaseSettings):
     EPO_OPS_KEY: str = os.getenv("EPO_OPS_KEY", "")
     EPO_OPS_SECRET: str = os.getenv("EPO_OPS_SECRET", "")
     
+    # OPS endpoint (empty: the public service); set to point at a stand-in server
+    OPS_BASE_URL: str = ""
+    
+    # "live", "record" (store every OPS answer) or "replay" (answer from the recording only)
+    OPS_MODE: str = "live"
+    OPS_RECORDING_PATH: str = "/var/tmp/epo-ops-server/recording.db"
+    
+    # Per-tenant credentials: {"<name>": {"token": ..., "key": ..., "secret": ...}}
+    OPS_TENANTS: Dict[str, Dict[str, str]] = {}
+    TENANT_MAX_CLIENTS: int = 32
+    TENANT_MAX_CONNECTIONS: int = 5
+    
+    # Access token shared by all processes using the same key ("" keeps it per process)
+    OPS_TOKEN_PATH: str = "/var/tmp/epo-ops-server/token.json"
+    OPS_TOKEN_REFRESH_MARGIN: float = 120.0
+    
     # Server settings
     SERVER_HOST: str = "0.0.0.0"
     SERVER_PORT: int = 8000
+    # Above 1, serve streamable HTTP from this many processes sharing cache, throttle and quota state
+    SERVER_WORKERS: int = 1
+    THROTTLE_PATH: str = "/var/tmp/epo-ops-server/throttle.db"
+    
+    # HTTP transport settings
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Retries of failed OPS calls (5xx, timeouts, throttling), with jittered exponential backoff
+    OPS_RETRIES: int = 3
+    OPS_RETRY_BACKOFF: float = 0.5
+    OPS_RETRY_MAX_DELAY: float = 30.0
+    # Hedge slow interactive retrievals with a second request after the service's p95 latency
+    OPS_HEDGE: bool = False
+    OPS_HEDGE_MIN_DELAY: float = 0.5
+    # Consecutive failures that suspend calls to a service, and for how many seconds (0 disables)
+    OPS_CIRCUIT_FAILURES: int = 5
+    OPS_CIRCUIT_RESET: float = 30.0
+    
+    # Batch retrieval settings
+    BATCH_CHUNK_SIZE: int = 100
+    BATCH_CONCURRENCY: int = 4
+    
+    # Bulk exports are written below this directory
+    EXPORT_DIR: str = "/var/tmp/epo-ops-server/exports"
+    
+    # Citation crawl checkpoints ("" disables checkpointing)
+    CRAWL_CHECKPOINT_DIR: str = "/var/tmp/epo-ops-server/crawls"
+    
+    # Patent numbers normalized locally and remembered per process
+    NUMBER_CACHE_SIZE: int = 65536
+    
+    # Family index: member publication number -> family (seconds an entry is trusted; 0 forever)
+    FAMILY_INDEX_PATH: str = "/var/tmp/epo-ops-server/families.db"
+    FAMILY_INDEX_TTL: float = 7 * 24 * 3600.0
+    
+    # Auto-paginating search settings
+    SEARCH_PAGE_CONCURRENCY: int = 4
+    
+    # Image settings
+    IMAGE_CACHE_DIR: str = "/var/tmp/epo-ops-server/images"
+    IMAGE_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    IMAGE_MAX_PAGES: int = 50
+    IMAGE_CONCURRENCY: int = 4
+    IMAGE_WORKERS: int = 2
+    IMAGE_THUMBNAIL_SIZE: int = 256
+    IMAGE_INLINE_MAX_BYTES: int = 1024 * 1024
+    
+    # Quota settings (bytes per window; 0 only records usage, without admission control)
+    QUOTA_PATH: str = "/var/tmp/epo-ops-server/quota.json"
+    QUOTA_HOUR_BYTES: int = 0
+    QUOTA_WEEK_BYTES: int = 4 * 1024 * 1024 * 1024
+    QUOTA_BULK_THRESHOLD: float = 0.9
+    QUOTA_BACKGROUND_THRESHOLD: float = 0.8
+    QUOTA_DEFER_MAX: float = 30.0
     
     # Cache settings
     CACHE_ENABLED: bool = False
-    CACHE_PATH: str = "/var/tmp/epo-ops-server/cache.dbm"
+    CACHE_PATH: str = "/var/tmp/epo-ops-server/cache.db"
+    CACHE_MEMORY_ITEMS: int = 2048
+    CACHE_MEMORY_BYTES: int = 128 * 1024 * 1024
+    CACHE_STALE_TTL: int = 24 * 60 * 60
+    CACHE_TTLS: Dict[str, int] = {}
+    CACHE_PRELOAD: bool = True
+    # Entries are stored compressed: "auto" (zstd if installed, else zlib), "zstd", "zlib" or "identity"
+    CACHE_CODEC: str = "auto"
+    CACHE_CODEC_DICTIONARY: str = ""
+    CACHE_COMPRESS_MIN_BYTES: int = 256
     
     class Config:
         env_file = ".env.epo"
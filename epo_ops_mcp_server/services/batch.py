@@ -0,0 +1,191 @@
+"""
+Batch retrieval service for EPO OPS MCP Server
+"""
+import asyncio
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.priority import BULK, priority
+from epo_ops_mcp_server.utils.parser import Projection
+from epo_ops_mcp_server.utils.lazy import LazyModule
+from epo_ops_mcp_server.utils.response import format_response
+
+epo_ops = LazyModule("epo_ops")
+
+# Endpoints OPS serves for several numbers in one POST. Everything else is
+# fetched one number per request (still concurrently).
+BULK_ENDPOINTS = {"biblio", "abstract"}
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def document_key(country: str, number: str) -> str:
+    return "{0}{1}".format(country or "", number or "").replace(" ", "").upper()
+
+
+def input_key(input_model) -> str:
+    if isinstance(input_model, epo_ops.models.Docdb):
+        return document_key(input_model.country_code, input_model.number)
+    return document_key("", input_model.number)
+
+
+def _kind_matches(input_model, kind: str) -> bool:
+    return not input_model.kind_code or input_model.kind_code.upper() == (kind or "").upper()
+
+
+def _chunks(items: List, size: int) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def split_exchange_documents(content: str) -> List[ET.Element]:
+    """Return every ``exchange-document`` element of a bulk response."""
+    root = ET.fromstring(content)
+    return [el for el in root.iter() if _local_name(el.tag) == "exchange-document"]
+
+
+def _rejects_input(response) -> bool:
+    """A 4xx that may be caused by one of the numbers (not throttling or quota)."""
+    return 400 <= response.status_code < 500 and response.status_code not in (403, 429)
+
+
+def _failed(models: List, error: Exception) -> List[Dict[str, Any]]:
+    return [{"status": "error", "error": str(error)} for _ in models]
+
+
+async def _fetch_single(
+    client, reference_type, input_model, endpoint, constituents, include_raw, projection
+):
+    try:
+        response = await client.published_data(
+            reference_type=reference_type,
+            input=input_model,
+            endpoint=endpoint,
+            constituents=constituents,
+        )
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+    return {
+        "status": "ok",
+        "response": format_response(
+            response.content,
+            response.headers.get('content-type', ''),
+            include_raw=include_raw,
+            projection=projection,
+        ),
+    }
+
+
+async def _fetch_bulk(
+    client, reference_type, models, endpoint, constituents, include_raw, projection
+):
+    """Fetch one chunk of same-format inputs with a single multi-number POST."""
+    try:
+        response = await client.published_data(
+            reference_type=reference_type,
+            input=list(models),
+            endpoint=endpoint,
+            constituents=constituents,
+        )
+        documents = split_exchange_documents(response.text)
+    except (httpx.HTTPStatusError, ET.ParseError) as e:
+        if isinstance(e, httpx.HTTPStatusError) and not _rejects_input(e.response):
+            return _failed(models, e)
+        # One bad number can reject the whole POST; isolate it by falling
+        # back to one request per number.
+        return await asyncio.gather(*[
+            _fetch_single(client, reference_type, m, endpoint, constituents, include_raw, projection)
+            for m in models
+        ])
+    except Exception as e:
+        # OPS is failing, over quota or suspended (circuit open): more
+        # requests would not help
+        return _failed(models, e)
+
+    content_type = response.headers.get('content-type', '')
+    results = []
+    for model in models:
+        key = input_key(model)
+        match = None
+        for document in documents:
+            attrs = document.attrib
+            if (
+                document_key(attrs.get("country"), attrs.get("doc-number")) == key
+                and _kind_matches(model, attrs.get("kind"))
+            ):
+                match = document
+                break
+
+        if match is None:
+            results.append({"status": "error", "error": "not found in batch response"})
+        elif match.attrib.get("status"):
+            results.append({"status": "error", "error": match.attrib["status"]})
+        else:
+            results.append({
+                "status": "ok",
+                "response": format_response(
+                    ET.tostring(match, encoding="unicode"),
+                    content_type,
+                    include_raw=include_raw,
+                    projection=projection,
+                ),
+            })
+    return results
+
+
+async def fetch_published_data_batch(
+    client,
+    reference_type: str,
+    input_models: List,
+    endpoint: str = "biblio",
+    constituents: Optional[List[str]] = None,
+    chunk_size: int = None,
+    concurrency: int = None,
+    include_raw: bool = True,
+    projection: Projection = None,
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve published data for many documents.
+
+    Inputs are grouped by format and split into chunks of at most
+    ``chunk_size`` numbers; each chunk is one OPS multi-number POST and at
+    most ``concurrency`` chunks are in flight at once. The result list is
+    aligned with ``input_models``; each entry has ``status`` "ok" with a
+    ``response`` or "error" with an ``error`` message. Requests run at bulk
+    priority.
+    """
+    chunk_size = min(chunk_size or settings.BATCH_CHUNK_SIZE, 100)
+    semaphore = asyncio.Semaphore(concurrency or settings.BATCH_CONCURRENCY)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(input_models)
+
+    bulk = endpoint in BULK_ENDPOINTS and reference_type == "publication"
+    groups = {}
+    for index, model in enumerate(input_models):
+        groups.setdefault(type(model) if bulk else None, []).append(index)
+
+    async def run(indexes):
+        async with semaphore:
+            models = [input_models[i] for i in indexes]
+            if bulk:
+                chunk_results = await _fetch_bulk(
+                    client, reference_type, models, endpoint, constituents, include_raw, projection
+                )
+            else:
+                chunk_results = await asyncio.gather(*[
+                    _fetch_single(client, reference_type, m, endpoint, constituents, include_raw, projection)
+                    for m in models
+                ])
+        for i, result in zip(indexes, chunk_results):
+            results[i] = result
+
+    with priority(BULK):
+        await asyncio.gather(*[
+            run(chunk)
+            for indexes in groups.values()
+            for chunk in _chunks(indexes, chunk_size)
+        ])
+    return results
@@ -0,0 +1,504 @@
+"""
+Tiered response cache for EPO OPS MCP Server
+
+Responses are kept in a bounded in-memory LRU tier in front of a persistent
+SQLite tier stored at ``settings.CACHE_PATH``. Every entry has a freshness
+lifetime chosen by endpoint (legal and register data change often, published
+full text practically never) plus a stale window during which the stale entry
+is served immediately while a background task revalidates it.
+
+Expired entries are revalidated rather than simply reloaded: the request is
+sent with the entry's ``ETag``/``Last-Modified`` validators, and a ``304 Not
+Modified`` answer, or an answer whose content hash equals the entry's (OPS
+sends no validators for most services), only renews the entry's lifetime.
+
+Entries are stored compressed (``utils.codec``: zstd or zlib) in both tiers,
+so the byte limits hold several times more responses; content is only
+decompressed when a cached response is served.
+
+When OPS fails (a 5xx answer, a network error or an open circuit breaker,
+see ``services.resilience``) while an expired entry is still held, that
+entry is served rather than the error.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.priority import BACKGROUND, priority
+from epo_ops_mcp_server.utils.codec import IDENTITY, Codec, CodecRegistry, get_codec
+
+log = logging.getLogger(__name__)
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Freshness lifetime in seconds per endpoint category
+DEFAULT_TTLS = {
+    "legal": 6 * HOUR,
+    "register": 6 * HOUR,
+    "search": HOUR,
+    "family": DAY,
+    "biblio": 7 * DAY,
+    "abstract": 7 * DAY,
+    "equivalents": 7 * DAY,
+    "images": 30 * DAY,
+    "claims": 30 * DAY,
+    "description": 30 * DAY,
+    "fulltext": 30 * DAY,
+    "number": 30 * DAY,
+    "other": DAY,
+}
+
+_ENDPOINTS = (
+    "biblio", "abstract", "equivalents", "claims", "description", "fulltext", "images",
+)
+
+# Response statuses worth caching (same as the Dogpile middleware, minus 405/413)
+CACHEABLE_STATUS_CODES = (200, 404)
+# Only these response headers are kept with a cache entry
+CACHED_HEADERS = ("content-type", "etag", "last-modified")
+
+
+def endpoint_for_url(url: str) -> str:
+    """Classify an OPS URL into one of the ``DEFAULT_TTLS`` categories."""
+    path = url.split("rest-services/", 1)[-1].split("?", 1)[0]
+    if path.startswith("published-data/images"):
+        return "images"
+    if "/search" in path or path.endswith("search"):
+        return "search"
+    if path.startswith("published-data/"):
+        segments = path.split("/")
+        for endpoint in _ENDPOINTS:
+            if endpoint in segments:
+                return endpoint
+        return "biblio"
+    for prefix, endpoint in (
+        ("family", "family"),
+        ("legal", "legal"),
+        ("register", "register"),
+        ("number-service", "number"),
+    ):
+        if path.startswith(prefix):
+            return endpoint
+    return "other"
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def request_key(request: httpx.Request) -> str:
+    """Cache key of an OPS request: method, URL, body and the headers that shape the answer."""
+    return "|".join([
+        request.method,
+        str(request.url),
+        request.content.decode("utf-8", "replace"),
+        request.headers.get("Accept", ""),
+        request.headers.get("X-OPS-Range", ""),
+        request.headers.get("Range", ""),
+    ])
+
+
+class CacheEntry:
+    """A cached OPS response, its content kept as encoded by ``codec``."""
+
+    __slots__ = ("status_code", "headers", "data", "stored_at", "fresh_until", "stale_until", "_digest", "codec")
+
+    def __init__(
+        self, status_code, headers, data, stored_at, fresh_until, stale_until, digest=None, codec: Codec = IDENTITY
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.data = data
+        self.stored_at = stored_at
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self._digest = digest
+        self.codec = codec
+
+    @property
+    def size(self) -> int:
+        """Stored (encoded) size."""
+        return len(self.data)
+
+    @property
+    def content(self) -> bytes:
+        """The response content, decoded on every access."""
+        return self.codec.decompress(self.data)
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 of the content, used to recognize an unchanged response."""
+        if self._digest is None:
+            self._digest = content_digest(self.content)
+        return self._digest
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers built from the entry's validators."""
+        headers = {}
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            self.status_code, headers=self.headers, content=self.content, request=request
+        )
+
+
+class MemoryTier:
+    """Bounded LRU keyed by request key, limited by entry count and bytes."""
+
+    def __init__(self, max_items: int, max_bytes: int):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self):
+        return list(self._entries.keys())
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        # An older entry must not outlive a replacement too large to keep here
+        self.pop(key)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while len(self._entries) > self.max_items or self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+
+    def pop(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+        return entry
+
+
+class DiskTier:
+    """Persistent SQLite store of cache entries plus the hot-key snapshot."""
+
+    def __init__(self, path: str, codecs: CodecRegistry = None):
+        self.path = path
+        self.codecs = codecs or CodecRegistry(IDENTITY)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                """CREATE TABLE IF NOT EXISTS entries(
+                    key text primary key,
+                    status_code integer,
+                    headers text,
+                    content blob,
+                    stored_at real,
+                    fresh_until real,
+                    stale_until real,
+                    digest text,
+                    codec text
+                )"""
+            )
+            columns = [row[1] for row in self.db.execute("PRAGMA table_info(entries)")]
+            # Caches written before content digests and compression were stored
+            for column in ("digest", "codec"):
+                if column not in columns:
+                    self.db.execute("ALTER TABLE entries ADD COLUMN {0} text".format(column))
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS hot_keys(position integer primary key, key text)"
+            )
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self.db.execute(
+                "SELECT status_code, headers, content, stored_at, fresh_until, stale_until, digest, codec "
+                "FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        status_code, headers, data, stored_at, fresh_until, stale_until, digest, codec = row
+        codec = self.codecs.get(codec)
+        if codec is None:
+            # Written with a codec (dictionary) this process does not have
+            return None
+        return CacheEntry(
+            status_code, json.loads(headers), bytes(data), stored_at, fresh_until, stale_until, digest, codec
+        )
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries"
+                "(key, status_code, headers, content, stored_at, fresh_until, stale_until, digest, codec) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    entry.status_code,
+                    json.dumps(entry.headers),
+                    entry.data,
+                    entry.stored_at,
+                    entry.fresh_until,
+                    entry.stale_until,
+                    entry.digest,
+                    entry.codec.name,
+                ),
+            )
+
+    def renew(self, key: str, entry: CacheEntry) -> None:
+        """Store ``entry``'s new lifetime without rewriting its content."""
+        with self._lock, self.db:
+            self.db.execute(
+                "UPDATE entries SET stored_at = ?, fresh_until = ?, stale_until = ? WHERE key = ?",
+                (entry.stored_at, entry.fresh_until, entry.stale_until, key),
+            )
+
+    def prune(self, now: float) -> int:
+        """Delete entries past their stale window; return how many were removed."""
+        with self._lock, self.db:
+            return self.db.execute("DELETE FROM entries WHERE stale_until < ?", (now,)).rowcount
+
+    def save_hot_keys(self, keys) -> None:
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM hot_keys")
+            self.db.executemany(
+                "INSERT INTO hot_keys(position, key) VALUES (?, ?)", list(enumerate(keys))
+            )
+
+    def load_hot_keys(self):
+        with self._lock:
+            rows = self.db.execute("SELECT key FROM hot_keys ORDER BY position").fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+
+class ResponseCache:
+    """
+    Two-tier OPS response cache with per-endpoint TTLs and stale-while-revalidate.
+
+    Use ``fetch(key, request, loader)``: fresh entries are returned directly,
+    stale-but-usable entries are returned immediately while ``loader`` runs in
+    the background to refresh them, and misses await ``loader``.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        max_items: int = None,
+        max_bytes: int = None,
+        ttls: Dict[str, int] = None,
+        stale_ttl: int = None,
+        clock: Callable[[], float] = time.time,
+        codec: Codec = None,
+        compress_min_bytes: int = None,
+    ):
+        self.memory = MemoryTier(
+            max_items or settings.CACHE_MEMORY_ITEMS,
+            max_bytes or settings.CACHE_MEMORY_BYTES,
+        )
+        self.codec = codec or get_codec()
+        self.compress_min_bytes = (
+            settings.CACHE_COMPRESS_MIN_BYTES if compress_min_bytes is None else compress_min_bytes
+        )
+        self.disk = DiskTier(path or settings.CACHE_PATH, CodecRegistry(self.codec))
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(settings.CACHE_TTLS)
+        self.ttls.update(ttls or {})
+        self.stale_ttl = settings.CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+        self.clock = clock
+        self.stats = {
+            "memory_hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0,
+            # Revalidations: 304 answers, 200 answers with unchanged content, changed content
+            "not_modified": 0, "unchanged": 0, "changed": 0,
+            # Response body bytes (decoded) not transferred, nor counted against quota, thanks to 304s
+            "bytes_saved": 0,
+            # Expired entries served because OPS failed
+            "stale_on_error": 0,
+            # Content bytes stored, before and after compression
+            "content_bytes": 0, "stored_bytes": 0,
+        }
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def ttl_for(self, url: str) -> int:
+        return self.ttls.get(endpoint_for_url(url), self.ttls["other"])
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Look an entry up in memory, then on disk (promoting it to memory)."""
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.stats["memory_hits"] += 1
+            return entry
+        entry = await asyncio.to_thread(self.disk.get, key)
+        if entry is not None:
+            self.stats["disk_hits"] += 1
+            self.memory.put(key, entry)
+        return entry
+
+    async def put(self, key: str, url: str, response: httpx.Response) -> Optional[CacheEntry]:
+        """Store ``response`` under ``key`` if its status is cacheable."""
+        if response.status_code not in CACHEABLE_STATUS_CODES:
+            return None
+        now = self.clock()
+        fresh_until = now + self.ttl_for(url)
+        content = response.content
+        codec = self.codec if len(content) >= self.compress_min_bytes else IDENTITY
+        entry = CacheEntry(
+            response.status_code,
+            {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers},
+            codec.compress(content),
+            now,
+            fresh_until,
+            fresh_until + self.stale_ttl,
+            content_digest(content),
+            codec,
+        )
+        self.stats["content_bytes"] += len(content)
+        self.stats["stored_bytes"] += entry.size
+        self.memory.put(key, entry)
+        await asyncio.to_thread(self.disk.put, key, entry)
+        return entry
+
+    async def renew(self, key: str, url: str, entry: CacheEntry) -> CacheEntry:
+        """Give an entry whose content was revalidated a new lifetime."""
+        now = self.clock()
+        entry.stored_at = now
+        entry.fresh_until = now + self.ttl_for(url)
+        entry.stale_until = entry.fresh_until + self.stale_ttl
+        self.memory.put(key, entry)
+        await asyncio.to_thread(self.disk.renew, key, entry)
+        return entry
+
+    async def fetch(
+        self,
+        key: str,
+        request: httpx.Request,
+        loader: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """Return the cached response for ``key`` or load, store and return it."""
+        now = self.clock()
+        entry = await self.get(key)
+        if entry is not None and entry.is_fresh(now):
+            return entry.to_response(request)
+        if entry is not None and entry.is_usable(now):
+            self.stats["stale_hits"] += 1
+            self._schedule_refresh(key, request, loader, entry)
+            return entry.to_response(request)
+
+        self.stats["misses"] += 1
+        return await self._load(key, request, loader, entry)
+
+    async def _load(self, key, request, loader, entry) -> httpx.Response:
+        """Run ``loader``, conditionally when there is an expired ``entry`` to revalidate."""
+        url = str(request.url)
+        if entry is not None:
+            request.headers.update(entry.validators())
+        try:
+            response = await loader()
+        except httpx.TransportError:
+            if entry is None:
+                raise
+            self.stats["stale_on_error"] += 1
+            return entry.to_response(request)
+        if entry is not None and response.status_code >= 500:
+            self.stats["stale_on_error"] += 1
+            return entry.to_response(request)
+
+        if entry is not None:
+            if response.status_code == httpx.codes.NOT_MODIFIED:
+                self.stats["not_modified"] += 1
+                cached = entry.to_response(request)
+                # The response body OPS did not send again (entry.size is the compressed size)
+                self.stats["bytes_saved"] += len(cached.content)
+                await self.renew(key, url, entry)
+                return cached
+            if response.status_code == entry.status_code and content_digest(response.content) == entry.digest:
+                self.stats["unchanged"] += 1
+                await self.renew(key, url, entry)
+                return entry.to_response(request)
+            if response.status_code in CACHEABLE_STATUS_CODES:
+                self.stats["changed"] += 1
+
+        await self.put(key, url, response)
+        return response
+
+    def _schedule_refresh(self, key, request, loader, entry) -> None:
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                with priority(BACKGROUND):
+                    await self._load(key, request, loader, entry)
+                self.stats["refreshes"] += 1
+            except Exception as e:
+                log.warning("Background refresh of %s failed: %s", request.url, e)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    async def snapshot(self) -> int:
+        """Persist the memory tier's keys (LRU order) so ``preload`` can restore them."""
+        keys = self.memory.keys()
+        await asyncio.to_thread(self.disk.save_hot_keys, keys)
+        return len(keys)
+
+    async def preload(self) -> int:
+        """Warm the memory tier from the last snapshot; return how many entries loaded."""
+        now = self.clock()
+        await asyncio.to_thread(self.disk.prune, now)
+        loaded = 0
+        for key in await asyncio.to_thread(self.disk.load_hot_keys):
+            entry = await asyncio.to_thread(self.disk.get, key)
+            if entry is not None and entry.is_usable(now):
+                self.memory.put(key, entry)
+                loaded += 1
+        return loaded
+
+    async def aclose(self) -> None:
+        """Wait for background refreshes and close the disk tier."""
+        if self._refreshing:
+            await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+        self.disk.close()
+
+    def info(self) -> Dict:
+        stored = self.stats["stored_bytes"]
+        return {
+            "memory_items": len(self.memory),
+            "memory_bytes": self.memory.bytes,
+            "codec": self.codec.name,
+            "compression_ratio": round(self.stats["content_bytes"] / stored, 2) if stored else None,
+            **self.stats,
+        }
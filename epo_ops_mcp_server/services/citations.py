@@ -0,0 +1,291 @@
+"""
+Citation graph crawling for EPO OPS MCP Server
+
+``crawl_citations`` walks the citation graph breadth-first from seed
+publications: backward to the documents each node cites (read from its
+bibliographic data, fetched a level at a time with multi-number requests)
+and/or forward to the documents citing it (a ``ct=`` search per node, a few
+at a time). Nodes are deduplicated by canonical number, so different kinds
+and spellings of one publication are one node. Progress is checkpointed to a
+JSON file after every chunk of nodes, and a crawl started again with the same
+seeds and parameters resumes where the previous run stopped (retrying nodes
+that failed).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.batch import fetch_published_data_batch
+from epo_ops_mcp_server.services.priority import BULK, priority
+from epo_ops_mcp_server.utils.lazy import LazyModule
+from epo_ops_mcp_server.utils.numbers import AmbiguousNumber, canonical_key, normalize_number, split_number
+from epo_ops_mcp_server.utils.parser import Projection, parse_ops_xml
+
+epo_ops = LazyModule("epo_ops")
+
+log = logging.getLogger(__name__)
+
+DIRECTIONS = {"backward", "forward", "both"}
+
+# Only citations are needed from each node's bibliographic data
+_CITATIONS = Projection(fields={"citations"})
+
+
+def _node(country: str, number: str, kind: Optional[str] = None) -> Dict[str, Any]:
+    node = {"country": country, "number": number}
+    if kind:
+        node["kind"] = kind
+    return node
+
+
+def seed_node(input_model) -> Dict[str, Any]:
+    """Crawl node of a validated ``Docdb``/``Epodoc`` input."""
+    if input_model.country_code:
+        return _node(input_model.country_code, input_model.number, input_model.kind_code)
+    try:
+        document = normalize_number(input_model.number, kind=input_model.kind_code)
+        return _node(document.country, document.number, document.kind)
+    except AmbiguousNumber:
+        return _node(*split_number(input_model.number, kind=input_model.kind_code))
+
+
+def node_key(node: Dict[str, Any]) -> str:
+    return canonical_key(node["number"], node["country"])
+
+
+def crawl_id(seeds: List[Dict[str, Any]], depth: int, direction: str, fan_out: int, max_nodes: int) -> str:
+    """Identity of a crawl: the same seeds and parameters resume the same checkpoint."""
+    text = json.dumps([sorted(node_key(s) for s in seeds), depth, direction, fan_out, max_nodes])
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class CrawlState:
+    """Nodes, edges and progress of one crawl, persisted as a JSON checkpoint."""
+
+    def __init__(self, path: str, seeds: List[Dict[str, Any]], params: Dict[str, Any]):
+        self.path = path
+        self.params = params
+        # key -> {"country", "number", "kind", "depth"}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges: List[List[str]] = []
+        self.expanded = set()
+        self.errors: Dict[str, str] = {}
+        self.truncated = False
+        self.complete = False
+        self.resumed = False
+        self._edge_set = set()
+        for seed in seeds:
+            self.add_node(seed, 0)
+
+    def add_node(self, node: Dict[str, Any], depth: int) -> Optional[str]:
+        """Add ``node`` at ``depth`` unless known; return its key (None past ``max_nodes``)."""
+        key = node_key(node)
+        if key in self.nodes:
+            return key
+        if len(self.nodes) >= self.params["max_nodes"]:
+            self.truncated = True
+            return None
+        self.nodes[key] = dict(node, depth=depth)
+        return key
+
+    def add_edge(self, citing: str, cited: str) -> None:
+        if citing != cited and (citing, cited) not in self._edge_set:
+            self._edge_set.add((citing, cited))
+            self.edges.append([citing, cited])
+
+    def frontier(self, depth: int) -> List[str]:
+        return [k for k, n in self.nodes.items() if n["depth"] == depth and k not in self.expanded]
+
+    def load(self) -> bool:
+        """Adopt a checkpoint of the same crawl, if there is one."""
+        if not self.path:
+            return False
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("params") != self.params:
+            return False
+        self.nodes = state["nodes"]
+        self.edges = state["edges"]
+        self._edge_set = {tuple(edge) for edge in self.edges}
+        self.expanded = set(state["expanded"])
+        self.errors = state["errors"]
+        self.truncated = state["truncated"]
+        self.complete = state["complete"]
+        self.resumed = True
+        return True
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        state = {
+            "params": self.params,
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "expanded": sorted(self.expanded),
+            "errors": self.errors,
+            "truncated": self.truncated,
+            "complete": self.complete,
+            "saved_at": time.time(),
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp = "{0}.{1}.tmp".format(self.path, os.getpid())
+            with open(temp, "w") as f:
+                json.dump(state, f)
+            os.replace(temp, self.path)
+        except OSError as e:
+            log.warning("Could not save crawl checkpoint to %s: %s", self.path, e)
+
+
+def _model(node: Dict[str, Any]):
+    if node.get("kind"):
+        return epo_ops.models.Docdb(node["number"], node["country"], node["kind"])
+    return epo_ops.models.Epodoc(node["country"] + node["number"])
+
+
+async def _cited(client, nodes: List[Dict[str, Any]], fan_out: int) -> List[Any]:
+    """Documents cited by each of ``nodes`` (or an error message)."""
+    fetched = await fetch_published_data_batch(
+        client,
+        reference_type="publication",
+        input_models=[_model(n) for n in nodes],
+        endpoint="biblio",
+        include_raw=False,
+        projection=_CITATIONS,
+    )
+    results = []
+    for result in fetched:
+        if result["status"] != "ok":
+            results.append(result["error"])
+            continue
+        documents = result["response"].get("data", {}).get("documents", [])
+        citations = documents[0].get("citations", []) if documents else []
+        results.append([
+            _node(c["country"], c["number"], c.get("kind"))
+            for c in citations if c.get("country") and c.get("number")
+        ][:fan_out])
+    return results
+
+
+async def _citing(client, nodes: List[Dict[str, Any]], fan_out: int, concurrency: int) -> List[Any]:
+    """Documents citing each of ``nodes`` (or an error message)."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def search(node):
+        async with semaphore:
+            try:
+                response = await client.published_data_search(
+                    cql="ct={0}{1}".format(node["country"], node["number"]), range_begin=1, range_end=min(fan_out, 100)
+                )
+            except httpx.HTTPStatusError as e:
+                # OPS answers a search without results with 404
+                if e.response.status_code == 404:
+                    return []
+                return str(e)
+            except Exception as e:
+                return str(e)
+        hits = parse_ops_xml(response.content).get("search", {}).get("hits", [])
+        return [
+            _node(h["id"]["country"], h["id"]["number"], h["id"].get("kind"))
+            for h in hits if h.get("id", {}).get("country") and h["id"].get("number")
+        ][:fan_out]
+
+    return await asyncio.gather(*[search(n) for n in nodes])
+
+
+async def crawl_citations(
+    client,
+    seeds: List[Dict[str, Any]],
+    depth: int = 1,
+    direction: str = "backward",
+    fan_out: int = 25,
+    max_nodes: int = 500,
+    checkpoint_dir: str = None,
+    restart: bool = False,
+    concurrency: int = None,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Breadth-first citation crawl from ``seeds`` (``{"country", "number", "kind"}``).
+
+    Args:
+        depth: Hops from the seeds.
+        direction: "backward" (cited documents), "forward" (citing documents) or "both".
+        fan_out: Maximum neighbours followed per node and direction.
+        max_nodes: Stop adding nodes beyond this many.
+        checkpoint_dir: Directory of crawl checkpoints ("" disables checkpointing).
+        restart: Ignore an existing checkpoint of the same crawl.
+        concurrency: Requests in flight at once.
+        on_progress: Awaited with ``(nodes expanded, nodes known)`` after each chunk.
+
+    Returns:
+        ``{"crawl_id", "complete", "resumed", "truncated", "nodes", "edges",
+        "errors"}``; ``edges`` are ``[citing, cited]`` pairs of node IDs
+        (canonical numbers such as ``EP1000000``).
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError("direction must be one of {0}".format(", ".join(sorted(DIRECTIONS))))
+    concurrency = concurrency or settings.BATCH_CONCURRENCY
+    checkpoint_dir = settings.CRAWL_CHECKPOINT_DIR if checkpoint_dir is None else checkpoint_dir
+    params = {"depth": depth, "direction": direction, "fan_out": fan_out, "max_nodes": max_nodes}
+    identity = crawl_id(seeds, depth, direction, fan_out, max_nodes)
+    path = os.path.join(checkpoint_dir, identity + ".json") if checkpoint_dir else ""
+
+    state = CrawlState(path, seeds, params)
+    if not restart:
+        await asyncio.to_thread(state.load)
+
+    chunk_size = settings.BATCH_CHUNK_SIZE * concurrency
+    with priority(BULK):
+        for level in range(depth):
+            frontier = state.frontier(level)
+            for start in range(0, len(frontier), chunk_size):
+                keys = frontier[start:start + chunk_size]
+                nodes = [state.nodes[k] for k in keys]
+                for key in keys:
+                    state.errors.pop(key, None)
+                if direction in ("backward", "both"):
+                    for key, cited in zip(keys, await _cited(client, nodes, fan_out)):
+                        if isinstance(cited, str):
+                            state.errors[key] = cited
+                            continue
+                        for node in cited:
+                            target = state.add_node(node, level + 1)
+                            if target is not None:
+                                state.add_edge(key, target)
+                if direction in ("forward", "both"):
+                    for key, citing in zip(keys, await _citing(client, nodes, fan_out, concurrency)):
+                        if isinstance(citing, str):
+                            state.errors[key] = citing
+                            continue
+                        for node in citing:
+                            source = state.add_node(node, level + 1)
+                            if source is not None:
+                                state.add_edge(source, key)
+                # Nodes that failed stay in the frontier, so a later run retries them
+                state.expanded.update(k for k in keys if k not in state.errors)
+                await asyncio.to_thread(state.save)
+                if on_progress is not None:
+                    await on_progress(len(state.expanded), len(state.nodes))
+
+    state.complete = not state.errors
+    await asyncio.to_thread(state.save)
+    return {
+        "crawl_id": identity,
+        "complete": state.complete,
+        "resumed": state.resumed,
+        "truncated": state.truncated,
+        "nodes": [{"id": key, **node} for key, node in state.nodes.items()],
+        "edges": state.edges,
+        "errors": state.errors,
+    }
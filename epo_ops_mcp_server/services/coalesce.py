@@ -0,0 +1,66 @@
+"""
+Single-flight request coalescing for EPO OPS MCP Server
+
+Concurrent callers asking for the same OPS resource share one upstream
+request: the first caller (the leader) starts it, later callers with the same
+key await the same result instead of spending quota on a duplicate.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+def normalize_input(input_model) -> Tuple[str, str]:
+    """Canonical (format, number) form of an epo_ops input model."""
+    return (
+        input_model.__class__.__name__.lower(),
+        input_model.as_api_input().replace(" ", "").upper(),
+    )
+
+
+def flight_key(info: Dict, *extra) -> Tuple:
+    """
+    Build a coalescing key from a request ``info`` dict.
+
+    The key is the normalized (service, reference_type, input, endpoint,
+    constituents) tuple followed by any ``extra`` request parameters (search
+    query and range, image page, ...).
+    """
+    _input = info.get("input")
+    if _input is None:
+        inputs = []
+    elif isinstance(_input, list):
+        inputs = _input
+    else:
+        inputs = [_input]
+    return (
+        info.get("service"),
+        info.get("reference_type"),
+        tuple(normalize_input(i) for i in inputs),
+        info.get("endpoint"),
+        tuple(sorted(info.get("constituents") or [])),
+    ) + tuple(extra)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"calls": 0, "upstream": 0, "coalesced": 0}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of ``fn()``, joining an in-flight call with the same key."""
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["upstream"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # Shielded so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(task)
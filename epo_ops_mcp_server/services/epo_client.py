@@ -1,38 +1,962 @@
 """
 EPO Client service for EPO OPS MCP Server
 """
-import epo_ops
-from epo_ops.middlewares import Throttler
-from epo_ops.middlewares.cache.dogpile import Dogpile
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
+
+import httpx
 from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.cache import ResponseCache, request_key
+from epo_ops_mcp_server.services.coalesce import SingleFlight, flight_key
+from epo_ops_mcp_server.services.metrics import SIZE_BUCKETS, metrics, record_phase
+from epo_ops_mcp_server.services.priority import INTERACTIVE, current_priority
+from epo_ops_mcp_server.services.quota import QuotaLedger
+from epo_ops_mcp_server.services.recorder import RecordingTransport, ReplayTransport, ResponseStore
+from epo_ops_mcp_server.services.resilience import CircuitBreaker, LatencyTracker, RetryPolicy
+from epo_ops_mcp_server.services.tenants import UnknownTenant, current_tenant, load_tenants, tenant_path
+from epo_ops_mcp_server.services.throttle import SharedThrottleState, ThrottleScheduler
+from epo_ops_mcp_server.utils.lazy import LazyModule
+
+try:
+    import fcntl
+except ImportError:  # Windows: workers share the token file without locking
+    fcntl = None
+
+if TYPE_CHECKING:
+    from epo_ops.models import Docdb, Epodoc, Original
+
+# Imported on first use, see utils.lazy
+epo_ops = LazyModule("epo_ops")
+
+log = logging.getLogger(__name__)
+
+# Idempotent GET-like retrievals that may be sent twice (see AsyncEpoClient._hedged)
+HEDGED_SERVICES = {"retrieval", "inpadoc", "images"}
+
+# Global client instances
+_async_epo_client = None
+_async_epo_client_lock = threading.Lock()
+_tenant_clients = None
+
+
+class Token:
+    """An OPS access token and the (wall-clock) time it expires at."""
+
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value: str, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+
+    # Same attribute as epo_ops.models.AccessToken
+    @property
+    def token(self) -> str:
+        return self.value
+
+
+class TokenManager:
+    """
+    Keeps a valid OPS access token ahead of need.
+
+    A background task renews the token ``refresh_margin`` seconds before it
+    expires, so requests never wait for authentication once the first token
+    is in place. With a ``path``, the token is shared through that file by
+    every process using the same credentials and OPS endpoint: a process that needs a new
+    token takes an exclusive lock on ``<path>.lock``, adopts the token in the
+    file if another process has just renewed it and authenticates only
+    otherwise, so N workers share one token instead of each fetching their
+    own. The file holds a hash of the key, never the key or secret. When the
+    file cannot be locked or written, the token is kept in this process.
+    """
 
-# Global client instance
-_epo_client = None
-
-def get_epo_client():
-    """Create or return the EPO OPS client instance."""
-    global _epo_client
-    
-    if _epo_client is None:
-        # Set up middlewares
-        middlewares = []
-        
-        # Add caching middleware if enabled
-        if settings.CACHE_ENABLED:
+    def __init__(
+        self,
+        http: httpx.AsyncClient,
+        auth_url: str,
+        key: str,
+        secret: str,
+        path: str = None,
+        refresh_margin: float = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.http = http
+        self.auth_url = auth_url
+        self.key = key
+        self.secret = secret
+        self.path = settings.OPS_TOKEN_PATH if path is None else path
+        self.refresh_margin = (
+            refresh_margin if refresh_margin is not None else settings.OPS_TOKEN_REFRESH_MARGIN
+        )
+        self.clock = clock
+        self.token: Optional[Token] = None
+        self.stats = {"acquired": 0, "shared": 0, "refreshed_ahead": 0, "rejected": 0, "failures": 0}
+        self._owner = hashlib.sha256("{0} {1}".format(auth_url, key).encode("utf-8")).hexdigest()[:16]
+        self._lock = asyncio.Lock()
+        self._refresher: Optional[asyncio.Task] = None
+
+    def _fresh(self, token: Optional[Token], rejected: str = None) -> bool:
+        return (
+            token is not None
+            and token.value != rejected
+            and token.expires_at - self.clock() > self.refresh_margin
+        )
+
+    async def get(self) -> Token:
+        """A valid token; only waits when there is none (or it has expired)."""
+        token = self.token
+        if token is None or token.expires_at <= self.clock():
+            token = await self.refresh()
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_ahead())
+        return token
+
+    async def refresh(self, rejected: str = None) -> Token:
+        """
+        Renew the token unless a fresh one is already available (in memory
+        or in the shared file). ``rejected`` is a token OPS refused, which is
+        never reused.
+        """
+        async with self._lock:
+            if self._fresh(self.token, rejected):
+                return self.token
+            if rejected is not None:
+                self.stats["rejected"] += 1
+            shared = await asyncio.to_thread(self._read)
+            if self._fresh(shared, rejected):
+                self.stats["shared"] += 1
+                self.token = shared
+                return shared
+
+            try:
+                lock = await asyncio.to_thread(self._lock_file)
+            except OSError as e:
+                self._unshare(e)
+                lock = None
             try:
-                middlewares.append(Dogpile())
+                # Another process may have renewed it while we waited for the lock
+                shared = await asyncio.to_thread(self._read)
+                if self._fresh(shared, rejected):
+                    self.stats["shared"] += 1
+                    self.token = shared
+                    return shared
+                self.token = await self._acquire()
+                try:
+                    await asyncio.to_thread(self._write, self.token)
+                except OSError as e:
+                    self._unshare(e)
+            finally:
+                if lock is not None:
+                    lock.close()
+            return self.token
+
+    async def _acquire(self) -> Token:
+        response = await self.http.post(
+            self.auth_url,
+            auth=(self.key, self.secret),
+            data={"grant_type": "client_credentials"},
+        )
+        response.raise_for_status()
+        content = response.json()
+        self.stats["acquired"] += 1
+        return Token(content["access_token"], self.clock() + int(content["expires_in"]))
+
+    async def _refresh_ahead(self):
+        while True:
+            token = self.token
+            delay = token.expires_at - self.refresh_margin - self.clock() if token else 0.0
+            await asyncio.sleep(max(delay, 1.0))
+            try:
+                if await self.refresh() is not token:
+                    self.stats["refreshed_ahead"] += 1
+            except (httpx.HTTPError, KeyError, ValueError) as e:
+                self.stats["failures"] += 1
+                log.warning("Could not renew the OPS access token: %s", e)
+                await asyncio.sleep(min(30.0, max(self.refresh_margin / 4, 1.0)))
+
+    # Shared token file
+
+    def _unshare(self, error: OSError) -> None:
+        """Keep the token in this process only (``self._lock`` still serializes renewals)."""
+        log.warning("Could not share the OPS access token through %s: %s", self.path, error)
+        self.path = ""
+
+    def _read(self) -> Optional[Token]:
+        if not self.path:
+            return None
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("owner") != self._owner:
+            return None
+        try:
+            return Token(state["access_token"], float(state["expires_at"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _write(self, token: Token) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = "{0}.{1}.tmp".format(self.path, os.getpid())
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"owner": self._owner, "access_token": token.value, "expires_at": token.expires_at}, f)
+        os.replace(tmp, self.path)
+
+    def _lock_file(self):
+        """Hold an exclusive lock on ``<path>.lock`` until the returned file is closed."""
+        if not self.path or fcntl is None:
+            return None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock = open(self.path + ".lock", "a")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def snapshot(self) -> dict:
+        token = self.token
+        return {
+            "expires_in": round(token.expires_at - self.clock()) if token else None,
+            "shared": bool(self.path),
+            **self.stats,
+        }
+
+    async def aclose(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+
+
+class AsyncEpoClient:
+    """
+    Asyncio-native EPO OPS client.
+
+    Mirrors the public interface of ``epo_ops.Client`` (same method names,
+    arguments and URL layout, accepting the same ``Docdb``/``Epodoc``/``Original``
+    input models), but every call is a coroutine and all requests share one
+    bounded keep-alive connection pool, so concurrent tool calls overlap their
+    network waits instead of queueing behind each other.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        secret: str,
+        accept_type: str = "xml",
+        timeout: float = None,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        keepalive_expiry: float = None,
+        transport: httpx.AsyncBaseTransport = None,
+        scheduler: ThrottleScheduler = None,
+        cache: ResponseCache = None,
+        quota: QuotaLedger = None,
+        base_url: str = None,
+        mode: str = None,
+        recording: ResponseStore = None,
+        token_path: str = "",
+        owns_cache: bool = True,
+        retry: RetryPolicy = None,
+        hedge: bool = None,
+    ):
+        self.key = key
+        self.secret = secret
+        base_url = (base_url or settings.OPS_BASE_URL).rstrip("/")
+        if base_url:
+            # Same layout as the public service, e.g. "http://localhost:8089/3.2"
+            self.auth_url = base_url + "/auth/accesstoken"
+            self.service_url_prefix = base_url + "/rest-services"
+        else:
+            self.auth_url = epo_ops.Client.__auth_url__
+            self.service_url_prefix = epo_ops.Client.__service_url_prefix__
+        self.accept_type = "application/{0}".format(accept_type)
+        self.timeout = timeout if timeout is not None else settings.HTTP_TIMEOUT
+        limits = httpx.Limits(
+            max_connections=max_connections or settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=(
+                max_keepalive_connections or settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            keepalive_expiry=(
+                keepalive_expiry if keepalive_expiry is not None
+                else settings.HTTP_KEEPALIVE_EXPIRY
+            ),
+        )
+        # "record" stores every answer in ``recording``, "replay" only reads from it
+        mode = mode or settings.OPS_MODE
+        if mode not in ("live", "record", "replay"):
+            raise ValueError("Unknown OPS mode: {0}".format(mode))
+        self.recording = None
+        if mode == "record":
+            self.recording = recording or ResponseStore()
+            transport = RecordingTransport(transport or httpx.AsyncHTTPTransport(limits=limits), self.recording)
+        elif mode == "replay":
+            self.recording = recording or ResponseStore()
+            transport = ReplayTransport(self.recording)
+        self.mode = mode
+        # OPS XML shrinks several times with gzip. httpx's default Accept-Encoding asks for it,
+        # and for br/zstd only when their decoders are installed
+        self.http = httpx.AsyncClient(limits=limits, timeout=self.timeout, transport=transport)
+        self.scheduler = scheduler or ThrottleScheduler()
+        self.cache = cache
+        # A cache shared with other clients (tenants) is closed by its owner
+        self.owns_cache = owns_cache
+        # Without a ledger from the caller, usage is tracked in memory only
+        self.quota = quota or QuotaLedger(path="")
+        self.flights = SingleFlight()
+        # Replayed answers do not change when asked again
+        self.retry = retry or (RetryPolicy(retries=0) if mode == "replay" else RetryPolicy())
+        self.hedge = settings.OPS_HEDGE if hedge is None else hedge
+        self.latency = LatencyTracker()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.resilience = {"retries": 0, "hedged": 0, "hedge_wins": 0}
+        # Losing hedged copies still in flight; their answers count against the quota too
+        self._stragglers = set()
+        # Without a path from the caller (or when replaying), the token is kept in this process only
+        self.tokens = TokenManager(
+            self.http, self.auth_url, key, secret, path=token_path if mode != "replay" else ""
+        )
+
+    async def aclose(self):
+        """Close the underlying connection pool (and the cache, if any and owned)."""
+        for task in list(self._stragglers):
+            task.cancel()
+        await asyncio.gather(*self._stragglers, return_exceptions=True)
+        await self.tokens.aclose()
+        await asyncio.to_thread(self.quota.save)
+        if self.scheduler.shared is not None:
+            await asyncio.to_thread(self.scheduler.shared.close)
+        if self.cache is not None and self.owns_cache:
+            await self.cache.snapshot()
+            await self.cache.aclose()
+        await self.http.aclose()
+
+    def stats(self) -> dict:
+        """Counters showing how much upstream traffic the client layers save."""
+        return {
+            "coalescing": dict(self.flights.stats),
+            "cache": self.cache.info() if self.cache is not None else None,
+            "throttle": self.scheduler.snapshot(),
+            "quota": self.quota.snapshot(),
+            "token": self.tokens.snapshot(),
+            "resilience": dict(
+                self.resilience,
+                breakers={name: breaker.snapshot() for name, breaker in self.breakers.items()},
+            ),
+            "recording": (
+                dict(self.recording.info(), mode=self.mode) if self.recording is not None else None
+            ),
+        }
+
+    def gauges(self) -> dict:
+        """Current client state as Prometheus gauges: ``{name: {labels: value}}``."""
+        flights = self.flights.stats
+        gauges = {
+            "ops_requests_coalesced": {(): flights["coalesced"]},
+            "ops_requests_sent": {(): flights["upstream"]},
+            "ops_throttle_wait_seconds_total": {(): self.scheduler.total_wait},
+            "ops_throttle_queued": {
+                (("service", name),): lane.queued for name, lane in self.scheduler.lanes.items()
+            },
+            "ops_circuit_open": {
+                (("service", name),): int(breaker.state != "closed") for name, breaker in self.breakers.items()
+            },
+            "ops_quota_used_bytes": {
+                (("window", name),): window.used for name, window in self.quota.windows.items()
+            },
+        }
+        if self.cache is not None:
+            stats = self.cache.stats
+            hits = stats["memory_hits"] + stats["disk_hits"]
+            lookups = hits + stats["misses"]
+            gauges["ops_cache_lookups"] = {
+                (("result", name),): stats[name]
+                for name in ("memory_hits", "disk_hits", "stale_hits", "misses")
+            }
+            gauges["ops_cache_hit_ratio"] = {(): round(hits / lookups, 4) if lookups else 0.0}
+            gauges["ops_cache_revalidations"] = {
+                (("result", name),): stats[name] for name in ("not_modified", "unchanged", "changed")
+            }
+            gauges["ops_cache_bytes_saved"] = {(): stats["bytes_saved"]}
+            gauges["ops_cache_stale_on_error"] = {(): stats["stale_on_error"]}
+        return gauges
+
+    # Services
+
+    async def family(
+        self,
+        reference_type: str,
+        input: "Union[Docdb, Epodoc]",
+        endpoint=None,
+        constituents: Optional[List[str]] = None,
+    ) -> httpx.Response:
+        """Retrieve the INPADOC family of the input document."""
+        info = dict(
+            service=epo_ops.Client.__family_path__,
+            reference_type=reference_type,
+            input=input,
+            constituents=constituents,
+            use_get=True,
+        )
+        url = self._make_request_url(info)
+        return await self._make_request(
+            url, None, use_get=True, key=flight_key(info)
+        )
+
+    async def image(
+        self,
+        path: str,
+        range: int = 1,
+        document_format: str = "application/tiff",
+    ) -> httpx.Response:
+        """Retrieve one page of the image found at ``path``."""
+        images_path = epo_ops.Client.__images_path__
+        info = {"service": images_path}
+        url = self._make_request_url(info)
+        data = path.replace(images_path + "/", "")
+        return await self._make_request(
+            url,
+            data=data,
+            extra_headers={"Accept": document_format},
+            params={"Range": range},
+            key=flight_key(info, data, range, document_format),
+        )
+
+    async def legal(
+        self,
+        reference_type: str,
+        input: "Union[Original, Docdb, Epodoc]",
+    ) -> httpx.Response:
+        """Retrieve legal status data."""
+        return await self._service_request(
+            dict(
+                service=epo_ops.Client.__legal_path__,
+                reference_type=reference_type,
+                input=input,
+            )
+        )
+
+    async def number(
+        self,
+        reference_type: str,
+        input: "Union[Original, Docdb, Epodoc]",
+        output_format: str,
+    ) -> httpx.Response:
+        """Convert a patent number into ``output_format``."""
+        return await self._service_request(
+            dict(
+                service=epo_ops.Client.__number_path__,
+                reference_type=reference_type,
+                input=input,
+                endpoint=output_format,
+            )
+        )
+
+    async def published_data(
+        self,
+        reference_type: str,
+        input: "Union[Docdb, Epodoc]",
+        endpoint="biblio",
+        constituents: Optional[List[str]] = None,
+    ) -> httpx.Response:
+        """Retrieve published data for the input document."""
+        return await self._service_request(
+            dict(
+                service=epo_ops.Client.__published_data_path__,
+                reference_type=reference_type,
+                input=input,
+                endpoint=endpoint,
+                constituents=constituents,
+            )
+        )
+
+    async def published_data_search(
+        self,
+        cql: str,
+        range_begin: int = 1,
+        range_end: int = 25,
+        constituents: Optional[List[str]] = None,
+    ) -> httpx.Response:
+        """Search published data with a CQL query."""
+        return await self._search_request(
+            dict(
+                service=epo_ops.Client.__published_data_search_path__,
+                constituents=constituents,
+            ),
+            cql,
+            dict(key="X-OPS-Range", begin=range_begin, end=range_end),
+        )
+
+    async def register(
+        self,
+        reference_type: str,
+        input: "Epodoc",
+        constituents: Optional[List[str]] = None,
+    ) -> httpx.Response:
+        """Retrieve European Patent Register data (Epodoc input only)."""
+        return await self._service_request(
+            dict(
+                service=epo_ops.Client.__register_path__,
+                reference_type=reference_type,
+                input=input,
+                constituents=constituents or ["biblio"],
+            )
+        )
+
+    async def register_search(
+        self, cql: str, range_begin: int = 1, range_end: int = 25
+    ) -> httpx.Response:
+        """Search the European Patent Register with a CQL query."""
+        return await self._search_request(
+            {"service": epo_ops.Client.__register_search_path__},
+            cql,
+            dict(key="Range", begin=range_begin, end=range_end),
+        )
+
+    # Authentication
+
+    async def get_access_token(self) -> Token:
+        """Return a valid access token, acquiring a new one when needed."""
+        return await self.tokens.get()
+
+    # Request plumbing
+
+    async def _make_request(
+        self, url, data, extra_headers=None, params=None, use_get=False, key=None
+    ):
+        headers = {
+            "Accept": self.accept_type,
+            "Content-Type": "text/plain",
+        }
+        headers.update(extra_headers or {})
+        if use_get:
+            request = self.http.build_request("GET", url, headers=headers, params=params)
+        else:
+            request = self.http.build_request(
+                "POST", url, headers=headers, params=params, **self._body(data)
+            )
+
+        if key is None:
+            response = await self._fetch(request)
+        else:
+            response = await self.flights.do(key, lambda: self._fetch(request))
+
+        self._check_for_exceeded_quota(response)
+        response.raise_for_status()
+        return response
+
+    async def _fetch(self, request):
+        """Answer ``request`` from the cache when enabled, otherwise from OPS."""
+        if self.cache is None:
+            return await self._send(request)
+        return await self.cache.fetch(
+            request_key(request), request, lambda: self._send(request)
+        )
+
+    async def _send(self, request):
+        """
+        Send ``request`` upstream with a valid token, once admitted and paced,
+        retrying failures the retry policy allows unless the service's
+        circuit breaker is open.
+        """
+        service = self.scheduler.service_for_url(str(request.url))
+        breaker = self._breaker(service)
+        probe = breaker.check()
+        try:
+            return await self._attempts(request, service, breaker)
+        except httpx.HTTPStatusError as e:
+            # Failed outside the exchanges, which record their own outcome (e.g. the auth endpoint)
+            if e.response.status_code >= 500:
+                breaker.failure()
+            elif probe:
+                breaker.release()
+            raise
+        except BaseException:
+            # Quota shedding, cancellation, ...: the probe did not learn anything about OPS
+            if probe:
+                breaker.release()
+            raise
+
+    async def _attempts(self, request, service: str, breaker: CircuitBreaker):
+        """Send ``request``, retrying as long as the retry policy and ``breaker`` allow."""
+        attempt = 0
+        renew_token = True
+        while True:
+            token = await self.get_access_token()
+            request.headers["Authorization"] = "Bearer {0}".format(token.token)
+            try:
+                response = await self._exchange(request, service)
+            except httpx.TransportError as e:
+                breaker.failure()
+                delay = self._retry_delay(breaker, attempt)
+                if delay is None:
+                    raise
+                log.warning("OPS %s request failed (%s), retrying in %.1fs", service, e, delay)
+                reason = type(e).__name__
+            else:
+                if renew_token and self._is_expired_token(response):
+                    # Not a failure of OPS: retry once with a new token
+                    renew_token = False
+                    await self.tokens.refresh(rejected=token.value)
+                    continue
+                if response.status_code >= 500:
+                    breaker.failure()
+                else:
+                    breaker.success()
+                if not self.retry.retryable(response):
+                    return response
+                delay = self._retry_delay(breaker, attempt, response.headers)
+                if delay is None:
+                    return response
+                reason = str(response.status_code)
+            attempt += 1
+            self.resilience["retries"] += 1
+            metrics.inc("ops_retries_total", service=service, reason=reason)
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, breaker: CircuitBreaker, attempt: int, headers=None) -> Optional[float]:
+        """Wait before the next attempt, or ``None`` to give up."""
+        if attempt >= self.retry.retries or breaker.state == "open":
+            return None
+        return self.retry.delay(attempt, headers)
+
+    async def _exchange(self, request, service):
+        """One attempt: admit and pace ``request``, then send it (hedged when worthwhile)."""
+        start = time.perf_counter()
+        await self.quota.admit()
+        await self.scheduler.acquire(service)
+        sent = time.perf_counter()
+        hedge_after = self._hedge_delay(service)
+        if hedge_after is None:
+            response = await self.http.send(request)
+        else:
+            response = await self._hedged(request, service, hedge_after)
+        received = time.perf_counter()
+        await self._account(service, response)
+        if response.status_code < 500:
+            self.latency.observe(service, received - sent)
+
+        record_phase("throttle", sent - start)
+        record_phase("upstream", received - sent)
+        metrics.observe("ops_throttle_wait_seconds", sent - start, service=service)
+        metrics.observe("ops_upstream_seconds", received - sent, service=service)
+        metrics.observe("ops_response_bytes", len(response.content), buckets=SIZE_BUCKETS, service=service)
+        return response
+
+    async def _account(self, service, response):
+        """Feed the throttle and quota headers of ``response`` back, and count its bytes."""
+        self.scheduler.update(service, response.headers)
+        await self.quota.record(response.headers)
+        metrics.inc("ops_wire_bytes_total", response.num_bytes_downloaded, service=service)
+        metrics.inc("ops_responses_total", service=service, status=response.status_code)
+
+    def _breaker(self, service: str) -> CircuitBreaker:
+        if service not in self.breakers:
+            # Replayed failures are deterministic: never suspend a service for them
+            failures = 0 if self.mode == "replay" else None
+            self.breakers[service] = CircuitBreaker(service, failures=failures)
+        return self.breakers[service]
+
+    def _hedge_delay(self, service: str) -> Optional[float]:
+        """
+        Seconds after which to hedge a request to ``service``, or ``None``:
+        only idempotent retrievals made for interactive calls are hedged, once
+        the service's p95 latency is known and when no throttling wait applies.
+        """
+        if not self.hedge or service not in HEDGED_SERVICES or current_priority() != INTERACTIVE:
+            return None
+        p95 = self.latency.percentile(service)
+        if p95 is None:
+            return None
+        return max(p95, settings.OPS_HEDGE_MIN_DELAY)
+
+    async def _hedged(self, request, service, delay):
+        """Send ``request``, and a second copy if no answer came within ``delay``; first answer wins."""
+        first = asyncio.ensure_future(self.http.send(request))
+        tasks = [first]
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or await self.scheduler.wait_time(service) > 0:
+                return await first
+            await self.quota.admit()
+            await self.scheduler.acquire(service)
+            if first.done():
+                return first.result()
+            self.resilience["hedged"] += 1
+            metrics.inc("ops_hedged_total", service=service)
+            tasks.append(asyncio.ensure_future(self.http.send(request)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is not first:
+                            self.resilience["hedge_wins"] += 1
+                        return task.result()
+            # Both copies failed: report the original request's error
+            return first.result()
+        finally:
+            for task in tasks:
+                if winner is not None and task is not winner:
+                    # OPS charges for the losing copy as well: let it finish and account for it
+                    self._settle(service, task)
+                else:
+                    task.cancel()
+
+    def _settle(self, service, task):
+        """Account for the answer to a losing hedged copy once it arrives."""
+        async def settle():
+            try:
+                response = await task
             except Exception:
-                # If cache initialization fails, continue without it
-                pass
-        
-        # Add throttling middleware (required)
-        middlewares.append(Throttler())
-        
-        # Create client
-        _epo_client = epo_ops.Client(
-            key=settings.EPO_OPS_KEY,
-            secret=settings.EPO_OPS_SECRET,
-            middlewares=[]
-        )
-    
-    return _epo_client
\ No newline at end of file
+                return
+            await self._account(service, response)
+
+        straggler = asyncio.ensure_future(settle())
+        self._stragglers.add(straggler)
+        straggler.add_done_callback(self._stragglers.discard)
+
+    @staticmethod
+    def _body(data):
+        # Search requests post a form ({"q": cql}); all others post plain text
+        if isinstance(data, dict):
+            return {"data": data}
+        return {"content": data}
+
+    @staticmethod
+    def _is_expired_token(response):
+        return (
+            response.status_code == httpx.codes.BAD_REQUEST
+            and "invalid_access_token" in response.text
+        )
+
+    @staticmethod
+    def _check_for_exceeded_quota(response):
+        if (
+            response.status_code != httpx.codes.FORBIDDEN
+            or "X-Rejection-Reason" not in response.headers
+        ):
+            return
+
+        rejection = response.headers["X-Rejection-Reason"].lower()
+        for reason, klass in (
+            ("individualquotaperhour", epo_ops.exceptions.IndividualQuotaPerHourExceeded),
+            ("registeredquotaperweek", epo_ops.exceptions.RegisteredQuotaPerWeekExceeded),
+        ):
+            if reason in rejection:
+                raise klass(
+                    "{0} {1}".format(response.status_code, response.headers["X-Rejection-Reason"]),
+                    response=response,
+                )
+
+    # Same URL layout as epo_ops.Client._make_request_url
+    def _make_request_url(self, info):
+        _input = info.get("input", None)
+        input_format = _input.__class__.__name__.lower() if _input else None
+        constituents = info.get("constituents") or []
+
+        parts_pre = [
+            self.service_url_prefix,
+            info.get("service", None),
+            info.get("reference_type", None),
+            input_format,
+        ]
+        parts_post = [info.get("endpoint", None), ",".join(constituents)]
+
+        if info.get("use_get", False):
+            parts = parts_pre + [_input.as_api_input()] + parts_post
+        else:
+            parts = parts_pre + parts_post
+
+        return "/".join(filter(None, parts))
+
+    async def _service_request(self, info):
+        key = flight_key(info)
+        _input = info["input"]
+        if isinstance(_input, list):
+            data = "\n".join([i.as_api_input() for i in _input])
+            info["input"] = _input[0]
+        else:
+            data = _input.as_api_input()
+
+        url = self._make_request_url(info)
+        return await self._make_request(url, data, key=key)
+
+    async def _search_request(self, info, cql, range):
+        url = self._make_request_url(info)
+        range_value = "{begin}-{end}".format(**range)
+        return await self._make_request(
+            url,
+            {"q": cql},
+            {range["key"]: range_value},
+            key=flight_key(info, cql.strip(), range_value),
+        )
+
+
+class TenantClients:
+    """
+    Per-tenant clients, each with its own connection pool, throttle state,
+    quota ledger and access token, so one tenant's traffic never queues
+    behind another's.
+
+    At most ``max_clients`` are kept open; the least recently used one beyond
+    that is retired and closed after ``close_delay`` seconds (once nothing is
+    in flight), unless its tenant comes back first. All tenants share one
+    response cache, since OPS answers do not depend on the credentials.
+    """
+
+    def __init__(
+        self,
+        tenants: Dict,
+        cache: ResponseCache = None,
+        max_clients: int = None,
+        max_connections: int = None,
+        close_delay: float = 60.0,
+    ):
+        self.tenants = tenants
+        self.cache = cache
+        self.max_clients = max_clients or settings.TENANT_MAX_CLIENTS
+        self.max_connections = max_connections or settings.TENANT_MAX_CONNECTIONS
+        self.close_delay = close_delay
+        self.clients: "OrderedDict[str, AsyncEpoClient]" = OrderedDict()
+        self.retiring: Dict[str, tuple] = {}
+        self.stats = {"created": 0, "retired": 0, "revived": 0}
+
+    def get(self, name: str) -> "AsyncEpoClient":
+        client = self.clients.get(name)
+        if client is not None:
+            self.clients.move_to_end(name)
+            return client
+        if name in self.retiring:
+            client, closing = self.retiring.pop(name)
+            closing.cancel()
+            self.stats["revived"] += 1
+        else:
+            client = self._create(name)
+        self.clients[name] = client
+        while len(self.clients) > self.max_clients:
+            self._retire(*self.clients.popitem(last=False))
+        return client
+
+    def _create(self, name: str) -> "AsyncEpoClient":
+        tenant = self.tenants.get(name)
+        if tenant is None:
+            raise UnknownTenant("Unknown tenant: {0}".format(name))
+        quota = QuotaLedger(path=tenant_path(settings.QUOTA_PATH, name))
+        quota.load()
+        shared = None
+        if settings.SERVER_WORKERS > 1:
+            shared = SharedThrottleState(tenant_path(settings.THROTTLE_PATH, name))
+        self.stats["created"] += 1
+        return AsyncEpoClient(
+            key=tenant.key,
+            secret=tenant.secret,
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            scheduler=ThrottleScheduler(shared=shared),
+            cache=self.cache,
+            owns_cache=False,
+            quota=quota,
+            token_path=tenant_path(settings.OPS_TOKEN_PATH, name),
+        )
+
+    def _retire(self, name: str, client: "AsyncEpoClient") -> None:
+        async def close():
+            await asyncio.sleep(self.close_delay)
+            while len(client.flights):
+                await asyncio.sleep(1.0)
+            self.retiring.pop(name, None)
+            await client.aclose()
+
+        self.stats["retired"] += 1
+        self.retiring[name] = (client, asyncio.create_task(close()))
+
+    def snapshot(self) -> dict:
+        return {"open": list(self.clients), "retiring": list(self.retiring), **self.stats}
+
+    async def aclose(self) -> None:
+        for client, closing in list(self.retiring.values()):
+            closing.cancel()
+            await client.aclose()
+        self.retiring.clear()
+        while self.clients:
+            await self.clients.popitem()[1].aclose()
+
+
+def get_async_epo_client():
+    """
+    Create or return the shared asyncio EPO OPS client instance, or the
+    client of the tenant the current request is served for.
+    """
+    global _async_epo_client, _tenant_clients
+
+    if _async_epo_client is None:
+        # The warm-up may be building the client in a worker thread
+        with _async_epo_client_lock:
+            if _async_epo_client is None:
+                quota = QuotaLedger()
+                quota.load()
+                _async_epo_client = AsyncEpoClient(
+                    key=settings.EPO_OPS_KEY,
+                    secret=settings.EPO_OPS_SECRET,
+                    # Worker processes pace requests together
+                    scheduler=ThrottleScheduler(
+                        shared=SharedThrottleState() if settings.SERVER_WORKERS > 1 else None
+                    ),
+                    cache=ResponseCache() if settings.CACHE_ENABLED else None,
+                    quota=quota,
+                    token_path=settings.OPS_TOKEN_PATH,
+                )
+
+    name = current_tenant()
+    if name is None:
+        return _async_epo_client
+    if _tenant_clients is None:
+        _tenant_clients = TenantClients(load_tenants(), cache=_async_epo_client.cache)
+    return _tenant_clients.get(name)
+
+
+async def start_async_epo_client():
+    """
+    Warm the shared client: build it (importing ``epo_ops``) in a worker
+    thread, acquire an access token and reload the cache's hot entries from
+    the last snapshot.
+
+    Meant to run in the background while the MCP handshake is in progress;
+    a tool call arriving first simply shares the work already under way.
+    """
+    client = await asyncio.to_thread(get_async_epo_client)
+    if client.key and client.secret:
+        try:
+            await client.get_access_token()
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            # The first tool call retries and reports the failure
+            log.warning("Could not acquire an OPS access token at start-up: %s", e)
+    if client.cache is not None and settings.CACHE_PRELOAD:
+        await client.cache.preload()
+    return client
+
+
+async def close_async_epo_client():
+    """Close the shared asyncio client (and any tenant clients) and release their connection pools."""
+    global _async_epo_client, _tenant_clients
+
+    if _tenant_clients is not None:
+        await _tenant_clients.aclose()
+        _tenant_clients = None
+    if _async_epo_client is not None:
+        await _async_epo_client.aclose()
+        _async_epo_client = None
@@ -0,0 +1,299 @@
+"""
+Bulk export of search results for EPO OPS MCP Server
+
+``export_search`` writes bibliographic data, abstract and (optionally)
+claims of every hit of a CQL query to a local file, one search page at a
+time: each page's hits are fetched with ``fetch_published_data_batch``
+(biblio in multi-number requests, claims one number per request, several
+in flight) and written out before the next page is read, so memory stays
+bounded by one page whatever the result count.
+
+Output is JSON Lines (one record per document, appended per page) or Parquet
+(a directory with one part file per page; needs pyarrow). A state file next
+to the output records the pages written, so an interrupted export started
+again with the same arguments continues after the last complete page.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from epo_ops_mcp_server.services.batch import fetch_published_data_batch
+from epo_ops_mcp_server.services.priority import BULK, priority
+from epo_ops_mcp_server.services.search import OPS_MAX_RESULTS, PAGE_SIZE, page_windows
+from epo_ops_mcp_server.utils.lazy import LazyModule
+from epo_ops_mcp_server.utils.numbers import canonical_key
+from epo_ops_mcp_server.utils.parser import parse_ops_xml
+
+epo_ops = LazyModule("epo_ops")
+
+FORMATS = {"jsonl", "parquet"}
+
+# Columns of every exported record, in order
+COLUMNS = [
+    "id", "country", "number", "kind", "family_id", "publication_date",
+    "title", "abstract", "applicants", "inventors", "ipc", "cpc", "claims", "errors",
+]
+_LIST_COLUMNS = {"applicants", "inventors", "ipc", "cpc", "claims"}
+
+
+def _pick(texts: Dict[str, str]) -> Optional[str]:
+    """English text if there is one, otherwise the first language."""
+    if not texts:
+        return None
+    return texts.get("en") or next(iter(texts.values()))
+
+
+def export_record(document: Dict[str, Any], claims: Optional[List[str]], errors: Dict[str, str]) -> Dict[str, Any]:
+    """Flat record of one parsed exchange document (same columns for every format)."""
+    record = {
+        "id": canonical_key(document.get("number"), document.get("country")),
+        "country": document.get("country"),
+        "number": document.get("number"),
+        "kind": document.get("kind"),
+        "family_id": document.get("family_id"),
+        "publication_date": document.get("publication_date"),
+        "title": _pick(document.get("titles")),
+        "abstract": _pick(document.get("abstracts")),
+        "applicants": document.get("applicants", []),
+        "inventors": document.get("inventors", []),
+        "ipc": document.get("ipc", []),
+        "cpc": document.get("cpc", []),
+        "claims": claims or [],
+        "errors": json.dumps(errors) if errors else None,
+    }
+    return record
+
+
+class JsonlWriter:
+    """Appends records to a JSON Lines file, one durable write per page."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def open(self, offset: int, pages: int) -> None:
+        self.file = open(self.path, "ab")
+        # Anything after the last recorded page is from an interrupted write
+        self.file.truncate(offset)
+        self.file.seek(offset)
+
+    def write_page(self, number: int, records: List[Dict[str, Any]]) -> int:
+        """Write a page durably; return the new end offset."""
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def size(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetWriter:
+    """Writes each page as one part file of a Parquet dataset directory."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.schema = pyarrow.schema([
+            (name, pyarrow.list_(pyarrow.string()) if name in _LIST_COLUMNS else pyarrow.string())
+            for name in COLUMNS
+        ])
+        os.makedirs(path, exist_ok=True)
+
+    def open(self, offset: int, pages: int) -> None:
+        # Parts after the last recorded page are from an interrupted write, or
+        # from another export when starting over
+        for name in os.listdir(self.path):
+            number = name[len("part-"):-len(".parquet")]
+            if name.endswith(".tmp") or (
+                name.startswith("part-") and name.endswith(".parquet") and number.isdigit() and int(number) >= pages
+            ):
+                os.remove(os.path.join(self.path, name))
+
+    def write_page(self, number: int, records: List[Dict[str, Any]]) -> int:
+        """Write a page as its own part file (atomically); parts need no offset."""
+        part = os.path.join(self.path, "part-{0:05d}.parquet".format(number))
+        temp = part + ".tmp"
+        self.pq.write_table(self.pa.Table.from_pylist(records, schema=self.schema), temp)
+        os.replace(temp, part)
+        return 0
+
+    def size(self) -> int:
+        return sum(
+            os.path.getsize(os.path.join(self.path, name))
+            for name in os.listdir(self.path) if name.endswith(".parquet")
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class ExportState:
+    """Progress of one export, saved next to its output after every page."""
+
+    def __init__(self, path: str, params: Dict[str, Any]):
+        self.path = path
+        self.params = params
+        self.pages = 0
+        self.offset = 0
+        self.total = None
+        self.exported = 0
+        self.failed = 0
+        self.seen: List[str] = []
+        self.complete = False
+        self.resumed = False
+
+    def load(self) -> None:
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("params") != self.params:
+            return
+        for name in ("pages", "offset", "total", "exported", "failed", "seen", "complete"):
+            setattr(self, name, state[name])
+        self.resumed = True
+
+    def save(self) -> None:
+        state = {
+            name: getattr(self, name)
+            for name in ("params", "pages", "offset", "total", "exported", "failed", "seen", "complete")
+        }
+        state["saved_at"] = time.time()
+        temp = "{0}.{1}.tmp".format(self.path, os.getpid())
+        with open(temp, "w") as f:
+            json.dump(state, f)
+        os.replace(temp, self.path)
+
+
+def _windows(max_results: int, total: Optional[int]) -> List[Tuple[int, int]]:
+    """Search page windows to read, never past the hit count once it is known."""
+    last = min(max_results, OPS_MAX_RESULTS)
+    if total is not None:
+        last = min(last, total)
+    return page_windows(1, last)
+
+
+async def _page_records(client, hits: List[Dict[str, Any]], include_claims: bool) -> List[Dict[str, Any]]:
+    models = [
+        epo_ops.models.Docdb(h["number"], h["country"], h["kind"]) if h.get("kind")
+        else epo_ops.models.Epodoc(h["country"] + h["number"])
+        for h in hits
+    ]
+    fetches = [fetch_published_data_batch(client, "publication", models, endpoint="biblio", include_raw=False)]
+    if include_claims:
+        fetches.append(fetch_published_data_batch(client, "publication", models, endpoint="claims", include_raw=False))
+    biblio, claims = (await asyncio.gather(*fetches) + [[None] * len(models)])[:2]
+
+    records = []
+    for hit, document, claim in zip(hits, biblio, claims):
+        errors = {}
+        parsed = dict(hit)
+        if document["status"] == "ok":
+            parsed = (document["response"].get("data", {}).get("documents") or [hit])[0]
+        else:
+            errors["biblio"] = document["error"]
+        texts = None
+        if claim is not None:
+            if claim["status"] == "ok":
+                fulltext = claim["response"].get("data", {}).get("fulltext_documents") or [{}]
+                texts = fulltext[0].get("claims")
+            else:
+                errors["claims"] = claim["error"]
+        records.append(export_record(parsed, texts, errors))
+    return records
+
+
+async def export_search(
+    client,
+    cql: str,
+    path: str,
+    output_format: str = "jsonl",
+    include_claims: bool = True,
+    max_results: int = OPS_MAX_RESULTS,
+    restart: bool = False,
+    on_progress: Optional[Callable[[int, Optional[int]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Export every hit of ``cql`` (up to ``max_results``, at most 2000) to ``path``.
+
+    Returns a summary: ``path``, ``format``, ``total`` (hits reported by
+    OPS), ``exported`` records, ``failed`` (records with a fetch error),
+    ``bytes`` written, ``complete`` and ``resumed``.
+    """
+    if output_format not in FORMATS:
+        raise ValueError("output_format must be one of {0}".format(", ".join(sorted(FORMATS))))
+
+    writer = ParquetWriter(path) if output_format == "parquet" else JsonlWriter(path)
+    params = {"cql": cql.strip(), "format": output_format, "claims": include_claims, "max_results": max_results}
+    state = ExportState(path + ".state.json", params)
+    if not restart:
+        state.load()
+    seen = set(state.seen)
+
+    writer.open(state.offset, state.pages)
+    try:
+        with priority(BULK):
+            windows = _windows(max_results, state.total)
+            while state.pages < len(windows) and not state.complete:
+                begin, end = windows[state.pages]
+                try:
+                    response = await client.published_data_search(cql=cql, range_begin=begin, range_end=end)
+                except httpx.HTTPStatusError as e:
+                    # OPS answers a query without results with 404
+                    if e.response.status_code != 404 or state.pages:
+                        raise
+                    state.total, state.complete = 0, True
+                    await asyncio.to_thread(state.save)
+                    break
+                search = parse_ops_xml(response.content).get("search", {})
+                if state.total is None:
+                    state.total = search.get("total")
+                    windows = _windows(max_results, state.total)
+
+                hits = []
+                for hit in search.get("hits", []):
+                    document = hit.get("id", {})
+                    key = canonical_key(document.get("number"), document.get("country"))
+                    if document.get("number") and key not in seen:
+                        seen.add(key)
+                        hits.append(document)
+
+                records = await _page_records(client, hits, include_claims) if hits else []
+                state.offset = await asyncio.to_thread(writer.write_page, state.pages, records)
+                state.pages += 1
+                state.exported += len(records)
+                state.failed += sum(1 for r in records if r["errors"])
+                state.seen = sorted(seen)
+                state.complete = state.pages >= len(windows) or len(search.get("hits", [])) < PAGE_SIZE
+                await asyncio.to_thread(state.save)
+                if on_progress is not None:
+                    await on_progress(state.exported, state.total)
+    finally:
+        writer.close()
+
+    return {
+        "path": path,
+        "format": output_format,
+        "total": state.total,
+        "exported": state.exported,
+        "failed": state.failed,
+        "bytes": writer.size(),
+        "complete": state.complete,
+        "resumed": state.resumed,
+    }
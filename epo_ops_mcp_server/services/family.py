@@ -0,0 +1,188 @@
+"""
+Family expansion for EPO OPS MCP Server
+
+``expand_family`` returns an INPADOC family together with the published data
+of every member: the family is looked up once, then the members are fetched
+with ``fetch_published_data_batch`` (multi-number requests, several in
+flight). A persistent ``FamilyIndex`` maps every member's publication number
+to its family, so expanding any member of a family seen before (by
+``expand_family`` or ``get_family``) needs no family request at all.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.batch import fetch_published_data_batch
+from epo_ops_mcp_server.utils.lazy import LazyModule
+from epo_ops_mcp_server.utils.numbers import canonical_key
+from epo_ops_mcp_server.utils.parser import Projection, parse_ops_xml
+
+epo_ops = LazyModule("epo_ops")
+
+_family_index = None
+
+
+class FamilyIndex:
+    """SQLite index of families: member publication number -> family ID -> members."""
+
+    def __init__(self, path: str = None, ttl: float = None, clock=time.time):
+        self.path = path or settings.FAMILY_INDEX_PATH
+        self.ttl = settings.FAMILY_INDEX_TTL if ttl is None else ttl
+        self.clock = clock
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                """CREATE TABLE IF NOT EXISTS families(
+                    family_id text primary key,
+                    members text,
+                    stored_at real
+                )"""
+            )
+            self.db.execute(
+                """CREATE TABLE IF NOT EXISTS members(
+                    member text primary key,
+                    family_id text
+                ) WITHOUT ROWID"""
+            )
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    def lookup(self, member: str) -> Optional[Dict[str, Any]]:
+        """``{"family_id", "members"}`` of the family ``member`` belongs to, if known and fresh."""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT f.family_id, f.members, f.stored_at FROM members m "
+                "JOIN families f ON f.family_id = m.family_id WHERE m.member = ?",
+                (member,),
+            ).fetchone()
+        if row is None or (self.ttl and row[2] + self.ttl < self.clock()):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return {"family_id": row[0], "members": json.loads(row[1])}
+
+    def store(self, family_id: str, members: List[Dict[str, Any]]) -> None:
+        """Record a family and index each member's publication number."""
+        keys = {
+            canonical_key(m["publication"].get("number"), m["publication"].get("country"))
+            for m in members if m.get("publication")
+        }
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO families VALUES (?, ?, ?)",
+                (family_id, json.dumps(members), self.clock()),
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO members VALUES (?, ?)", [(key, family_id) for key in keys]
+            )
+        self.stats["stored"] += 1
+
+    def store_parsed(self, data: Dict[str, Any]) -> Optional[str]:
+        """Index the family in parsed OPS family data (``parse_ops_xml`` output); return its ID."""
+        members = data.get("family_members") or []
+        family_id = (data.get("family") or {}).get("family_id") or next(
+            (m.get("family_id") for m in members if m.get("family_id")), None
+        )
+        if family_id is None or not members:
+            return None
+        self.store(family_id, [
+            {k: m[k] for k in ("publication", "application", "priorities") if m.get(k)}
+            for m in members
+        ])
+        return family_id
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            families, = self.db.execute("SELECT count(*) FROM families").fetchone()
+            members, = self.db.execute("SELECT count(*) FROM members").fetchone()
+        return {"families": families, "members": members, **self.stats}
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+
+def member_key(input_model) -> str:
+    """Index key of a requested number: its canonical country and number, without the kind code."""
+    return canonical_key(input_model.number, input_model.country_code)
+
+
+def get_family_index() -> FamilyIndex:
+    """Create or return the shared family index."""
+    global _family_index
+
+    if _family_index is None:
+        _family_index = FamilyIndex()
+    return _family_index
+
+
+async def family_of(client, input_model, index: FamilyIndex, refresh: bool = False) -> Dict[str, Any]:
+    """
+    ``{"family_id", "members", "source"}`` for a publication, from ``index``
+    when it knows the family, otherwise from OPS (and then indexed).
+    """
+    if not refresh:
+        known = await asyncio.to_thread(index.lookup, member_key(input_model))
+        if known is not None:
+            return dict(known, source="index")
+
+    response = await client.family(reference_type="publication", input=input_model)
+    data = parse_ops_xml(response.content)
+    family_id = await asyncio.to_thread(index.store_parsed, data)
+    if family_id is None:
+        raise ValueError("No family found for {0}".format(input_model.as_api_input()))
+    known = await asyncio.to_thread(index.lookup, member_key(input_model))
+    if known is None:
+        # The requested number is not among the listed publications (e.g. another kind)
+        return {"family_id": family_id, "members": data["family_members"], "source": "ops"}
+    return dict(known, source="ops")
+
+
+async def expand_family(
+    client,
+    input_model,
+    endpoint: str = "biblio",
+    include_raw: bool = False,
+    projection: Projection = None,
+    index: FamilyIndex = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    The family of ``input_model`` with ``endpoint`` data for every member.
+
+    Returns ``{"family_id", "source": "index"|"ops", "members": [...]}``; each
+    member has its ``publication`` (and ``application``/``priorities``) IDs,
+    ``status`` and either ``response`` or ``error``.
+    """
+    index = index or get_family_index()
+    family = await family_of(client, input_model, index, refresh)
+
+    members = [m for m in family["members"] if (m.get("publication") or {}).get("number")]
+    models = [
+        epo_ops.models.Docdb(
+            m["publication"]["number"], m["publication"]["country"], m["publication"].get("kind")
+        )
+        for m in members
+    ]
+    fetched = await fetch_published_data_batch(
+        client,
+        reference_type="publication",
+        input_models=models,
+        endpoint=endpoint,
+        include_raw=include_raw,
+        projection=projection,
+    )
+    return {
+        "family_id": family["family_id"],
+        "source": family["source"],
+        "members": [dict(member, **result) for member, result in zip(members, fetched)],
+    }
@@ -0,0 +1,301 @@
+"""
+Image retrieval for EPO OPS MCP Server
+
+OPS serves drawings and full documents one page per request as TIFF, PDF or
+PNG bytes. ``fetch_image_pages`` fetches a page selection with bounded
+concurrency, keeps every page as bytes in an on-disk ``ImageStore`` (which also
+backs the ``ops-image://`` MCP resources), and optionally converts pages to
+PNG or thumbnails in a process pool. Conversion needs Pillow
+(``pip install epo-ops-mcp-server[images]``).
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from epo_ops_mcp_server.config import settings
+
+log = logging.getLogger(__name__)
+
+MIME_EXTENSIONS = {
+    "application/tiff": "tiff",
+    "image/tiff": "tiff",
+    "application/pdf": "pdf",
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+}
+EXTENSION_MIMES = {
+    "tiff": "image/tiff",
+    "pdf": "application/pdf",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+}
+CONVERSIONS = ("png", "thumbnail")
+
+
+def parse_pages(pages: str, max_pages: int = None) -> List[int]:
+    """
+    Expand a page selection such as ``"1-3,5"`` into page numbers.
+
+    Raises:
+        ValueError: If the selection is malformed or selects too many pages.
+    """
+    max_pages = max_pages or settings.IMAGE_MAX_PAGES
+    # A list for the order, a set for the lookups
+    selected, seen = [], set()
+    for part in str(pages).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        try:
+            first, last = int(first), int(last or first)
+        except ValueError:
+            raise ValueError("Invalid page selection: {0!r}".format(pages))
+        if first < 1 or last < first:
+            raise ValueError("Invalid page selection: {0!r}".format(pages))
+        # Checked before expanding, so a huge range costs nothing
+        if last - first + 1 > max_pages:
+            raise ValueError("At most {0} pages can be fetched at once".format(max_pages))
+        for page in range(first, last + 1):
+            if page not in seen:
+                seen.add(page)
+                selected.append(page)
+        if len(selected) > max_pages:
+            raise ValueError("At most {0} pages can be fetched at once".format(max_pages))
+    if not selected:
+        raise ValueError("Invalid page selection: {0!r}".format(pages))
+    return selected
+
+
+def convert_image(data: bytes, thumbnail: Optional[int] = None) -> bytes:
+    """
+    Convert one image page to PNG, shrunk to fit ``thumbnail`` pixels if given.
+
+    Runs in a worker process; Pillow is imported there so the server itself
+    starts without it.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("Image conversion requires Pillow: pip install Pillow")
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        if image.mode not in ("1", "L", "RGB", "RGBA"):
+            image = image.convert("RGB")
+        if thumbnail:
+            image.thumbnail((thumbnail, thumbnail))
+        output = io.BytesIO()
+        image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+_pool = None
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """Create or return the shared process pool used for image conversion."""
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _pool
+
+
+def shutdown_image_pool():
+    """Stop the conversion worker processes, if any were started."""
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class ImageStore:
+    """
+    Content store for image pages, one file per page under ``root``.
+
+    Files are named after a hash of the page request, so the name doubles as
+    the resource id. Writes are atomic; once the store grows past
+    ``max_bytes`` the least recently written files are removed.
+    """
+
+    def __init__(self, root: str = None, max_bytes: int = None):
+        self.root = root or settings.IMAGE_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.IMAGE_CACHE_MAX_BYTES
+        self._size = None
+
+    @staticmethod
+    def name_for(path: str, page: int, document_format: str, variant: str = "") -> str:
+        """Resource name of one page: request hash plus file extension."""
+        digest = hashlib.sha256(
+            "|".join((path.strip("/"), str(page), document_format, variant)).encode()
+        ).hexdigest()
+        if variant:
+            extension = "png"
+        else:
+            extension = MIME_EXTENSIONS.get(document_format.split(";")[0].strip(), "bin")
+        return "{0}.{1}".format(digest[:32], extension)
+
+    @staticmethod
+    def mime_type(name: str) -> str:
+        return EXTENSION_MIMES.get(name.rsplit(".", 1)[-1], "application/octet-stream")
+
+    def file_for(self, name: str) -> str:
+        if os.path.basename(name) != name or name.startswith("."):
+            raise ValueError("Invalid image name: {0!r}".format(name))
+        return os.path.join(self.root, name[:2], name)
+
+    def get(self, name: str) -> Optional[bytes]:
+        try:
+            with open(self.file_for(name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, name: str, data: bytes):
+        filename = self.file_for(name)
+        directory = os.path.dirname(filename)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp, filename)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        if self._size is None:
+            self._size = self._disk_usage()
+        else:
+            self._size += len(data)
+        if self.max_bytes and self._size > self.max_bytes:
+            self.prune()
+
+    def _files(self):
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                filename = os.path.join(directory, name)
+                try:
+                    stat = os.stat(filename)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, filename
+
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def prune(self):
+        """Remove the oldest files until the store is back under 90% of ``max_bytes``."""
+        files = sorted(self._files())
+        size = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for _, file_size, filename in files:
+            if size <= target:
+                break
+            try:
+                os.unlink(filename)
+            except FileNotFoundError:
+                pass
+            size -= file_size
+        self._size = size
+
+
+@dataclass(slots=True)
+class ImagePage:
+    page: int
+    name: str
+    mime_type: str
+    data: bytes
+
+
+_image_store = None
+
+
+def get_image_store() -> ImageStore:
+    """Create or return the shared image store."""
+    global _image_store
+
+    if _image_store is None:
+        _image_store = ImageStore()
+    return _image_store
+
+
+async def fetch_image_page(
+    client,
+    path: str,
+    page: int,
+    document_format: str,
+    convert: Optional[str] = None,
+    store: ImageStore = None,
+) -> ImagePage:
+    """Fetch one page as bytes, from the store when possible, converting it if asked."""
+    store = store or get_image_store()
+    variant = ""
+    if convert == "thumbnail":
+        variant = "thumbnail-{0}".format(settings.IMAGE_THUMBNAIL_SIZE)
+    elif convert:
+        variant = convert
+
+    name = ImageStore.name_for(path, page, document_format, variant)
+    data = await asyncio.to_thread(store.get, name)
+    if data is not None:
+        return ImagePage(page, name, ImageStore.mime_type(name), data)
+
+    original = ImageStore.name_for(path, page, document_format)
+    data = await asyncio.to_thread(store.get, original)
+    if data is None:
+        response = await client.image(path=path, range=page, document_format=document_format)
+        response.raise_for_status()
+        data = response.content
+        await asyncio.to_thread(store.put, original, data)
+    if not variant:
+        return ImagePage(page, original, ImageStore.mime_type(original), data)
+
+    if "pdf" in document_format:
+        raise ValueError("PDF pages cannot be converted; request application/tiff instead")
+    thumbnail = settings.IMAGE_THUMBNAIL_SIZE if convert == "thumbnail" else None
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(get_image_pool(), convert_image, data, thumbnail)
+    await asyncio.to_thread(store.put, name, data)
+    return ImagePage(page, name, "image/png", data)
+
+
+async def fetch_image_pages(
+    client,
+    path: str,
+    pages: List[int],
+    document_format: str = "application/tiff",
+    convert: Optional[str] = None,
+    concurrency: int = None,
+    store: ImageStore = None,
+) -> List[dict]:
+    """
+    Fetch several pages of one image with at most ``concurrency`` in flight.
+
+    Returns:
+        One item per page, in page order: ``{"page", "status": "ok", "image"}``
+        with an ``ImagePage``, or ``{"page", "status": "error", "error"}``.
+    """
+    if convert is not None and convert not in CONVERSIONS:
+        raise ValueError("convert must be one of {0}".format(", ".join(CONVERSIONS)))
+    semaphore = asyncio.Semaphore(concurrency or settings.IMAGE_CONCURRENCY)
+
+    async def fetch(page):
+        async with semaphore:
+            try:
+                image = await fetch_image_page(client, path, page, document_format, convert, store)
+            except Exception as e:
+                log.debug("Image page %s of %s failed: %s", page, path, e)
+                return {"page": page, "status": "error", "error": str(e)}
+        return {"page": page, "status": "ok", "image": image}
+
+    return await asyncio.gather(*(fetch(page) for page in pages))
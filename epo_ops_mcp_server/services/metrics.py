@@ -0,0 +1,244 @@
+"""
+Latency and traffic metrics for EPO OPS MCP Server
+
+Every tool call is traced from the moment the MCP request arrives until its
+result is serialized. Code on the hot path reports the time it spends in
+each phase into the trace of the call it runs for:
+
+- ``validate``: patent number validation (``validate_pat_number``)
+- ``throttle``: waiting for a throttle slot
+- ``upstream``: waiting for OPS to answer
+- ``parse``: turning OPS XML into the response structure (``format_response``)
+- ``serialize``: converting the result into MCP content (measured around the tool)
+- ``local``: everything else spent inside the tool
+
+Phase times of concurrent requests add up, so for batch tools ``upstream``
+can exceed the call's wall time. The client also records per-service upstream
+latency, response sizes and statuses. ``render_prometheus`` exports
+everything in the Prometheus text format and ``summary`` as a JSON-friendly
+dict with estimated percentiles.
+"""
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from fastmcp.server.middleware import Middleware
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+# Upper bounds in bytes of the size histogram buckets
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))
+
+PHASES = ("validate", "throttle", "upstream", "parse", "serialize", "local")
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as exported by Prometheus."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the ``q`` quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if seen + count >= rank and count:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1]
+
+
+class Trace:
+    """Phase times of one tool call."""
+
+    __slots__ = ("tool", "phases")
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.phases: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("ops_tool_trace", default=None)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    """Add ``seconds`` to ``phase`` of the tool call in progress, if any."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(phase, seconds)
+
+
+@contextmanager
+def phase(name: str):
+    """Time the enclosed block as ``name`` of the tool call in progress."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start)
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        '{0}="{1}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels
+    ) + "}"
+
+
+class MetricsRegistry:
+    """Counters and histograms keyed by metric name and labels."""
+
+    def __init__(self):
+        self.counters: Dict[str, Dict[Tuple, float]] = {}
+        self.histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS, **labels) -> None:
+        series = self.histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        if key not in series:
+            series[key] = Histogram(buckets)
+        series[key].observe(value)
+
+    # Tool calls
+
+    @contextmanager
+    def tool_call(self, tool: str):
+        """
+        Trace one tool call; yields the ``Trace`` that phases are recorded into.
+
+        The tool reports its own run time as the ``handler`` phase (see
+        ``timed``); whatever the call took beyond that counts as ``serialize``.
+        """
+        trace = Trace(tool)
+        token = _trace.set(trace)
+        start = time.perf_counter()
+        try:
+            yield trace
+        except Exception as e:
+            # FastMCP wraps tool exceptions in ToolError; count the original
+            self.inc("mcp_tool_errors_total", tool=tool, error=type(e.__cause__ or e).__name__)
+            raise
+        finally:
+            _trace.reset(token)
+            total = time.perf_counter() - start
+            self.observe("mcp_tool_duration_seconds", total, tool=tool)
+            phases = dict(trace.phases)
+            handler = phases.pop("handler", total)
+            phases["serialize"] = max(0.0, total - handler)
+            measured = sum(v for k, v in phases.items() if k in ("validate", "parse"))
+            # throttle/upstream waits overlap when requests run concurrently
+            waits = min(handler, phases.get("throttle", 0.0) + phases.get("upstream", 0.0))
+            phases["local"] = max(0.0, handler - waits - measured)
+            for name in PHASES:
+                self.observe("mcp_tool_phase_seconds", phases.get(name, 0.0), tool=tool, phase=name)
+
+    # Export
+
+    def render_prometheus(self, gauges: Dict[str, Dict[Tuple, float]] = None) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, series in sorted(self.counters.items()):
+            lines.append("# TYPE {0} counter".format(name))
+            for labels, value in sorted(series.items()):
+                lines.append("{0}{1} {2}".format(name, _label_text(labels), value))
+        for name, series in sorted(self.histograms.items()):
+            lines.append("# TYPE {0} histogram".format(name))
+            for labels, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append("{0}_bucket{1} {2}".format(
+                        name, _label_text(labels + (("le", bound),)), cumulative
+                    ))
+                lines.append("{0}_sum{1} {2}".format(name, _label_text(labels), histogram.sum))
+                lines.append("{0}_count{1} {2}".format(name, _label_text(labels), histogram.count))
+        for name, series in sorted((gauges or {}).items()):
+            lines.append("# TYPE {0} gauge".format(name))
+            for labels, value in sorted(series.items()):
+                lines.append("{0}{1} {2}".format(name, _label_text(labels), value))
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict:
+        """Counters and histogram count/mean/p50/p95/p99, keyed by name and labels."""
+        def key(labels):
+            return ",".join("{0}={1}".format(k, v) for k, v in labels) or "all"
+
+        def rounded(value):
+            return round(value, 6) if value is not None else None
+
+        output = {}
+        for name, series in self.counters.items():
+            output[name] = {key(labels): value for labels, value in series.items()}
+        for name, series in self.histograms.items():
+            output[name] = {
+                key(labels): {
+                    "count": h.count,
+                    "mean": rounded(h.sum / h.count if h.count else None),
+                    "p50": rounded(h.quantile(0.5)),
+                    "p95": rounded(h.quantile(0.95)),
+                    "p99": rounded(h.quantile(0.99)),
+                }
+                for labels, h in series.items()
+            }
+        return output
+
+
+metrics = MetricsRegistry()
+
+
+def timed(fn):
+    """Report the run time of the async tool ``fn`` as its handler time."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            record_phase("handler", time.perf_counter() - start)
+    return wrapper
+
+
+class MetricsMiddleware(Middleware):
+    """Traces every MCP tool call into ``metrics``."""
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        with metrics.tool_call(tool):
+            result = await call_next(context)
+        size = 0
+        for block in result.content:
+            size += len(getattr(block, "text", None) or getattr(block, "data", None) or "")
+        metrics.observe("mcp_tool_response_bytes", size, buckets=SIZE_BUCKETS, tool=tool)
+        return result
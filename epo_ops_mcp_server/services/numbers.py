@@ -0,0 +1,119 @@
+"""
+Number conversion for EPO OPS MCP Server
+
+``convert_numbers`` converts any number of patent numbers between original,
+epodoc and docdb formats. Publication numbers of the major offices are
+normalized locally (``utils.numbers``); only the rest (ambiguous numbers,
+application and priority numbers, ``original`` output) is sent to the OPS
+number service, several requests at a time at bulk priority.
+"""
+import asyncio
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, Union
+
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.priority import BULK, priority
+from epo_ops_mcp_server.utils.lazy import LazyModule
+from epo_ops_mcp_server.utils.numbers import AmbiguousNumber, PatentNumber, normalize_number, split_number
+
+epo_ops = LazyModule("epo_ops")
+
+OUTPUT_FORMATS = {"original", "epodoc", "docdb"}
+
+
+def _fields(item: Union[str, Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    if isinstance(item, str):
+        return {"number": item, "country_code": None, "kind_code": None, "date": None}
+    if not isinstance(item, dict) or not item.get("number"):
+        raise ValueError("Expected a number string or an object with a 'number' field")
+    return {k: item.get(k) for k in ("number", "country_code", "kind_code", "date")}
+
+
+def _local(fields, reference_type, output_format) -> PatentNumber:
+    if output_format == "original":
+        raise AmbiguousNumber("Original numbers are formatted by OPS")
+    return normalize_number(fields["number"], fields["country_code"], fields["kind_code"], reference_type)
+
+
+def _result(document: PatentNumber, output_format: str, source: str) -> Dict[str, Any]:
+    number = document.epodoc if output_format == "epodoc" else document.number
+    result = {"status": "ok", "source": source, "country": document.country, "number": number}
+    if document.kind:
+        result["kind"] = document.kind
+    return result
+
+
+def parse_number_response(content: Union[str, bytes]) -> PatentNumber:
+    """The converted number in an OPS number-service response."""
+    root = ET.fromstring(content)
+    for output in root.iter():
+        if output.tag.rsplit("}", 1)[-1] != "output":
+            continue
+        for document in output.iter():
+            if document.tag.rsplit("}", 1)[-1] != "document-id":
+                continue
+            values = {child.tag.rsplit("}", 1)[-1]: (child.text or "").strip() for child in document}
+            return PatentNumber(values.get("country", ""), values.get("doc-number", ""), values.get("kind") or None)
+    raise ValueError("No converted number in the OPS response")
+
+
+async def _convert_remote(client, reference_type, fields, output_format):
+    try:
+        country, number, kind = split_number(fields["number"], fields["country_code"], fields["kind_code"])
+    except AmbiguousNumber:
+        country, number, kind = fields["country_code"], fields["number"], fields["kind_code"]
+    response = await client.number(
+        reference_type=reference_type,
+        input=epo_ops.models.Original(number, country_code=country, kind_code=kind, date=fields["date"]),
+        output_format=output_format,
+    )
+    return _result(parse_number_response(response.content), output_format, "ops")
+
+
+async def convert_numbers(
+    client,
+    reference_type: str,
+    items: List[Union[str, Dict[str, Any]]],
+    output_format: str = "docdb",
+    use_ops: bool = True,
+    concurrency: int = None,
+) -> List[Dict[str, Any]]:
+    """
+    Convert ``items`` (number strings or ``{"number", "country_code",
+    "kind_code", "date"}`` objects) into ``output_format``.
+
+    The result list is aligned with ``items``; each entry has ``status`` "ok"
+    with ``source`` ("local" or "ops"), ``country``, ``number`` and ``kind``,
+    or "error" with an ``error`` message. With ``use_ops`` false, numbers
+    that cannot be converted locally are reported as errors instead.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError("output_format must be one of {0}".format(", ".join(sorted(OUTPUT_FORMATS))))
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    remote = []
+    for index, item in enumerate(items):
+        try:
+            fields = _fields(item)
+            results[index] = _result(_local(fields, reference_type, output_format), output_format, "local")
+        except AmbiguousNumber as e:
+            if use_ops:
+                remote.append((index, fields))
+            else:
+                results[index] = {"status": "error", "error": str(e)}
+        except ValueError as e:
+            results[index] = {"status": "error", "error": str(e)}
+
+    semaphore = asyncio.Semaphore(concurrency or settings.BATCH_CONCURRENCY)
+
+    async def run(index, fields):
+        async with semaphore:
+            try:
+                results[index] = await _convert_remote(client, reference_type, fields, output_format)
+            except Exception as e:
+                results[index] = {"status": "error", "error": str(e)}
+
+    if remote:
+        with priority(BULK):
+            await asyncio.gather(*[run(index, fields) for index, fields in remote])
+    return results
@@ -0,0 +1,39 @@
+"""
+Request priorities for EPO OPS MCP Server
+
+Every upstream request runs at one of three priorities, carried in a context
+variable so it follows the task that issued it (including coalesced requests
+and cache refreshes):
+
+- ``interactive``: a tool call answering one question (the default)
+- ``bulk``: batch retrieval and the extra pages of an auto-paginated search
+- ``background``: work nobody waits for, such as stale-cache refreshes
+
+The throttle scheduler serves higher priorities first and the quota ledger
+sheds or defers lower priorities as the quota runs out.
+"""
+import contextvars
+from contextlib import contextmanager
+
+INTERACTIVE = 0
+BULK = 1
+BACKGROUND = 2
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk", BACKGROUND: "background"}
+
+_priority = contextvars.ContextVar("ops_request_priority", default=INTERACTIVE)
+
+
+def current_priority() -> int:
+    """Priority of requests issued from the current context."""
+    return _priority.get()
+
+
+@contextmanager
+def priority(level: int):
+    """Run the enclosed requests at ``level`` (never raising the current priority)."""
+    token = _priority.set(max(level, _priority.get()))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
@@ -0,0 +1,238 @@
+"""
+Quota ledger for EPO OPS MCP Server
+
+OPS meters traffic in bytes against an hourly individual quota and a weekly
+registered quota, and reports the usage so far on every response::
+
+    X-IndividualQuotaPerHour-Used: 1296421
+    X-RegisteredQuotaPerWeek-Used: 39481234
+
+The ledger records these values (persisted at ``settings.QUOTA_PATH`` so a
+restart does not forget them, and merged with the file by every process
+sharing it, so each one learns the usage the others saw), estimates the consumption rate to predict when
+each quota runs out, and admits requests by priority: background work is shed
+first, bulk work is deferred and then shed, and interactive calls always go
+ahead so OPS stays the final judge of the hard limit.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.priority import (
+    BACKGROUND,
+    BULK,
+    INTERACTIVE,
+    PRIORITY_NAMES,
+    current_priority,
+)
+
+log = logging.getLogger(__name__)
+
+HOUR_HEADER = "X-IndividualQuotaPerHour-Used"
+WEEK_HEADER = "X-RegisteredQuotaPerWeek-Used"
+
+# Length in seconds of each quota window
+WINDOWS = {"hour": 60 * 60, "week": 7 * 24 * 60 * 60}
+
+# Usage samples kept for the consumption rate estimate
+RATE_WINDOW = 10 * 60
+# Admission looks at the usage projected this many seconds ahead
+PREDICTION_HORIZON = 60
+
+
+class QuotaShed(Exception):
+    """A low-priority request was refused to protect the remaining quota."""
+
+
+class QuotaWindow:
+    """Last reported usage of one quota window."""
+
+    __slots__ = ("name", "limit", "used", "seen_at", "samples")
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.used = 0
+        self.seen_at: Optional[float] = None
+        self.samples = deque()
+
+    def record(self, used: int, now: float) -> None:
+        self.used = used
+        self.seen_at = now
+        self.samples.append((now, used))
+        while self.samples and self.samples[0][0] < now - RATE_WINDOW:
+            self.samples.popleft()
+
+    def estimated_used(self, now: float) -> float:
+        """
+        Usage now, assuming the reported usage leaves the rolling window at an
+        even pace while no new value is reported.
+        """
+        if self.seen_at is None:
+            return 0.0
+        age = now - self.seen_at
+        return self.used * max(0.0, 1.0 - age / WINDOWS[self.name])
+
+    def utilization(self, now: float) -> Optional[float]:
+        """Share of the limit used ``PREDICTION_HORIZON`` seconds from now at the current rate."""
+        if not self.limit:
+            return None
+        return (self.estimated_used(now) + self.rate() * PREDICTION_HORIZON) / self.limit
+
+    def rate(self) -> float:
+        """Bytes per second consumed over the recent samples."""
+        if len(self.samples) < 2:
+            return 0.0
+        (start, first), (end, last) = self.samples[0], self.samples[-1]
+        if end <= start or last <= first:
+            return 0.0
+        return (last - first) / (end - start)
+
+    def exhausted_in(self, now: float) -> Optional[float]:
+        """Predicted seconds until the limit is reached at the current rate."""
+        rate = self.rate()
+        if not self.limit or not rate:
+            return None
+        return max(0.0, (self.limit - self.estimated_used(now)) / rate)
+
+
+class QuotaLedger:
+    """Records OPS quota usage and applies priority-based admission control."""
+
+    def __init__(
+        self,
+        path: str = None,
+        hour_limit: int = None,
+        week_limit: int = None,
+        bulk_threshold: float = None,
+        background_threshold: float = None,
+        defer_max: float = None,
+        save_interval: float = 30.0,
+        clock=time.time,
+    ):
+        self.path = path if path is not None else settings.QUOTA_PATH
+        self.windows = {
+            "hour": QuotaWindow("hour", settings.QUOTA_HOUR_BYTES if hour_limit is None else hour_limit),
+            "week": QuotaWindow("week", settings.QUOTA_WEEK_BYTES if week_limit is None else week_limit),
+        }
+        self.thresholds = {
+            BULK: settings.QUOTA_BULK_THRESHOLD if bulk_threshold is None else bulk_threshold,
+            BACKGROUND: (
+                settings.QUOTA_BACKGROUND_THRESHOLD if background_threshold is None
+                else background_threshold
+            ),
+        }
+        self.defer_max = settings.QUOTA_DEFER_MAX if defer_max is None else defer_max
+        self.save_interval = save_interval
+        self.clock = clock
+        self.stats = {"admitted": 0, "deferred": 0, "shed": 0}
+        self._saved_at = 0.0
+        self._dirty = False
+
+    def utilization(self) -> float:
+        """Highest estimated utilization across windows with a known limit."""
+        now = self.clock()
+        values = [w.utilization(now) for w in self.windows.values()]
+        return max([v for v in values if v is not None], default=0.0)
+
+    def _over(self, level: int) -> bool:
+        return level != INTERACTIVE and self.utilization() >= self.thresholds[level]
+
+    async def admit(self, level: int = None) -> None:
+        """
+        Wait until a request at ``level`` (default: the current priority) may
+        be sent.
+
+        Raises:
+            QuotaShed: If the quota is too close to exhaustion for this priority.
+        """
+        level = current_priority() if level is None else level
+        if self._over(level) and level == BULK:
+            self.stats["deferred"] += 1
+            deadline = self.clock() + self.defer_max
+            while self._over(level) and self.clock() < deadline:
+                await asyncio.sleep(min(5.0, self.defer_max))
+        if self._over(level):
+            self.stats["shed"] += 1
+            raise QuotaShed(
+                "OPS quota {0:.0%} used; {1} request refused".format(
+                    self.utilization(), PRIORITY_NAMES[level]
+                )
+            )
+        self.stats["admitted"] += 1
+
+    def update(self, headers) -> None:
+        """Record the quota usage reported on a response."""
+        now = self.clock()
+        for name, header in (("hour", HOUR_HEADER), ("week", WEEK_HEADER)):
+            value = headers.get(header)
+            if value is None:
+                continue
+            try:
+                self.windows[name].record(int(value), now)
+            except ValueError:
+                continue
+            self._dirty = True
+
+    async def record(self, headers) -> None:
+        """``update`` from ``headers`` and sync the ledger with its file every ``save_interval``."""
+        self.update(headers)
+        if self.clock() - self._saved_at >= self.save_interval:
+            await asyncio.to_thread(self.save)
+
+    def save(self) -> None:
+        """Merge in newer usage from the file (other processes), then write the result."""
+        if not self.path:
+            return
+        self.load()
+        state = {
+            name: {"used": window.used, "seen_at": window.seen_at}
+            for name, window in self.windows.items()
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp = "{0}.{1}.tmp".format(self.path, os.getpid())
+            with open(temp, "w") as f:
+                json.dump(state, f)
+            os.replace(temp, self.path)
+        except OSError as e:
+            log.warning("Could not save quota ledger to %s: %s", self.path, e)
+            return
+        self._saved_at = self.clock()
+        self._dirty = False
+
+    def load(self) -> None:
+        """Adopt usage from the file that is newer than this ledger's (a previous run or another process)."""
+        if not self.path:
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, window in self.windows.items():
+            saved = state.get(name) or {}
+            seen_at = saved.get("seen_at")
+            if seen_at is not None and (window.seen_at is None or float(seen_at) > window.seen_at):
+                window.record(int(saved.get("used") or 0), float(seen_at))
+
+    def snapshot(self) -> Dict:
+        """Current quota usage and predictions, for diagnostics."""
+        now = self.clock()
+        windows = {}
+        for name, window in self.windows.items():
+            utilization = window.utilization(now)
+            exhausted_in = window.exhausted_in(now)
+            windows[name] = {
+                "used": window.used,
+                "limit": window.limit or None,
+                "utilization": round(utilization, 4) if utilization is not None else None,
+                "bytes_per_second": round(window.rate(), 1),
+                "exhausted_in": round(exhausted_in) if exhausted_in is not None else None,
+            }
+        return {"windows": windows, **self.stats}
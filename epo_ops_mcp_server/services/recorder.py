@@ -0,0 +1,172 @@
+"""
+Record/replay of OPS traffic for EPO OPS MCP Server
+
+With ``OPS_MODE=record`` every successful OPS answer seen by the async
+client is stored in a ``ResponseStore``: one SQLite file, indexed by a hash of
+the request (method, service path, query, body and the headers that shape the
+answer), with zlib-compressed bodies. With ``OPS_MODE=replay`` the client
+never touches the network: requests are answered from the store, and a
+request that was not recorded fails with ``ReplayMiss`` naming the request,
+so gaps in a recording are easy to spot. Replayed responses carry only their
+content type, so they cost no quota and are not throttled.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Dict, Optional
+
+import httpx
+from epo_ops_mcp_server.config import settings
+
+log = logging.getLogger(__name__)
+
+# Answers worth replaying; throttling, quota and server errors are transient
+RECORDED_STATUS_CODES = (200, 404)
+
+AUTH_PATH = "/auth/accesstoken"
+REPLAY_TOKEN = json.dumps({"access_token": "replay", "token_type": "BearerToken", "expires_in": "86399"})
+
+
+def describe(request: httpx.Request) -> str:
+    """Human-readable identity of an OPS request, independent of the OPS host."""
+    path = request.url.path.split("rest-services/", 1)[-1]
+    query = "&".join("{0}={1}".format(k, v) for k, v in sorted(request.url.params.multi_items()))
+    parts = [request.method, path + ("?" + query if query else "")]
+    for header in ("Accept", "X-OPS-Range", "Range"):
+        if request.headers.get(header):
+            parts.append("{0}: {1}".format(header, request.headers[header]))
+    body = request.content.decode("utf-8", "replace")
+    if body:
+        parts.append("body: " + body.replace("\n", " | "))
+    return " ".join(parts)
+
+
+def record_key(request: httpx.Request) -> bytes:
+    return hashlib.sha256(describe(request).encode("utf-8")).digest()
+
+
+class ResponseStore:
+    """Compressed, indexed store of recorded OPS responses."""
+
+    def __init__(self, path: str = None, max_misses: int = 100):
+        self.path = path or settings.OPS_RECORDING_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                """CREATE TABLE IF NOT EXISTS responses(
+                    key blob primary key,
+                    request text,
+                    status_code integer,
+                    content_type text,
+                    body blob,
+                    size integer,
+                    recorded_at real
+                ) WITHOUT ROWID"""
+            )
+        self.stats = {"recorded": 0, "hits": 0, "misses": 0}
+        self.recent_misses = deque(maxlen=max_misses)
+
+    def get(self, request: httpx.Request) -> Optional[httpx.Response]:
+        with self._lock:
+            row = self.db.execute(
+                "SELECT status_code, content_type, body FROM responses WHERE key = ?",
+                (record_key(request),),
+            ).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            self.recent_misses.append(describe(request))
+            return None
+        self.stats["hits"] += 1
+        status_code, content_type, body = row
+        headers = {"content-type": content_type} if content_type else {}
+        return httpx.Response(status_code, headers=headers, content=zlib.decompress(body), request=request)
+
+    def put(self, request: httpx.Request, response: httpx.Response) -> None:
+        content = response.content
+        with self._lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record_key(request),
+                    describe(request),
+                    response.status_code,
+                    response.headers.get("content-type", ""),
+                    zlib.compress(content, 6),
+                    len(content),
+                    time.time(),
+                ),
+            )
+        self.stats["recorded"] += 1
+
+    def info(self) -> Dict:
+        with self._lock:
+            entries, size, stored = self.db.execute(
+                "SELECT count(*), coalesce(sum(size), 0), coalesce(sum(length(body)), 0) FROM responses"
+            ).fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "stored_bytes": stored,
+            **self.stats,
+            "recent_misses": list(self.recent_misses),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+
+class ReplayMiss(httpx.TransportError):
+    """No recorded response exists for a request made in replay mode."""
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests on to ``transport`` and records the answers in ``store``."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, store: ResponseStore):
+        self.transport = transport
+        self.store = store
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        if request.url.path.endswith(AUTH_PATH) or response.status_code not in RECORDED_STATUS_CODES:
+            return response
+        await response.aread()
+        await asyncio.to_thread(self.store.put, request, response)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+        self.store.close()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers requests from ``store`` only; never opens a connection."""
+
+    def __init__(self, store: ResponseStore):
+        self.store = store
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith(AUTH_PATH):
+            return httpx.Response(200, headers={"content-type": "application/json"}, content=REPLAY_TOKEN.encode())
+        response = await asyncio.to_thread(self.store.get, request)
+        if response is None:
+            log.warning("Replay miss: %s", describe(request))
+            raise ReplayMiss("No recorded OPS response for {0}".format(describe(request)), request=request)
+        return response
+
+    async def aclose(self) -> None:
+        self.store.close()
@@ -0,0 +1,158 @@
+"""
+Retries, hedging and circuit breaking for EPO OPS MCP Server
+
+``RetryPolicy`` decides which failed OPS answers are worth another attempt
+(server errors, timeouts and throttling rejections, never quota rejections)
+and how long to wait: full-jitter exponential backoff, at least the
+``Retry-After`` the answer asked for. Throttling rejections are also paced
+by the ``ThrottleScheduler``, which blocks the service for the time OPS
+reports.
+
+``LatencyTracker`` keeps recent upstream latencies per service; once it has
+enough of them, a retrieval that takes longer than the service's p95 may be
+hedged with a second copy of the request (first answer wins).
+
+``CircuitBreaker`` fails calls to a service fast after repeated failures,
+lets one probe through after a cool-down, and closes again once a probe
+succeeds. The response cache serves whatever it holds for a request that
+fails this way.
+"""
+import random
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import httpx
+
+from epo_ops_mcp_server.config import settings
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpen(httpx.TransportError):
+    """Calls to an OPS service are suspended after repeated failures."""
+
+
+def is_throttled(response: httpx.Response) -> bool:
+    """A 403 that OPS sent for throttling, as opposed to an exhausted quota or a denial."""
+    if response.status_code != httpx.codes.FORBIDDEN:
+        return False
+    if "quota" in response.headers.get("X-Rejection-Reason", "").lower():
+        return False
+    return "X-Throttling-Control" in response.headers or "Retry-After" in response.headers
+
+
+def retry_after(headers) -> float:
+    """Seconds an answer asks the client to wait (throttled OPS answers give milliseconds)."""
+    try:
+        value = float(headers.get("Retry-After") or 0)
+    except ValueError:
+        # HTTP-date values are not used by OPS
+        return 0.0
+    if "X-Throttling-Control" in headers:
+        return value / 1000.0
+    return value
+
+
+class RetryPolicy:
+    """Which answers to retry, how often and after how long."""
+
+    def __init__(
+        self,
+        retries: int = None,
+        backoff: float = None,
+        max_delay: float = None,
+        rng: random.Random = None,
+    ):
+        self.retries = settings.OPS_RETRIES if retries is None else retries
+        self.backoff = settings.OPS_RETRY_BACKOFF if backoff is None else backoff
+        self.max_delay = settings.OPS_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.rng = rng or random.Random()
+
+    def retryable(self, response: httpx.Response) -> bool:
+        return response.status_code in RETRY_STATUS_CODES or is_throttled(response)
+
+    def delay(self, attempt: int, headers=None) -> Optional[float]:
+        """
+        Wait before retry number ``attempt`` (0-based), or ``None`` when the
+        answer asks for a longer wait than ``max_delay`` (no retry then).
+        """
+        wait = self.rng.uniform(0, min(self.max_delay, self.backoff * 2 ** attempt))
+        requested = retry_after(headers) if headers is not None else 0.0
+        if requested > self.max_delay:
+            return None
+        return max(wait, requested)
+
+
+class LatencyTracker:
+    """Recent upstream latencies per service, for hedging delays."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+
+    def observe(self, service: str, seconds: float) -> None:
+        if service not in self._samples:
+            self._samples[service] = deque(maxlen=self.window)
+        self._samples[service].append(seconds)
+
+    def percentile(self, service: str, q: float = 0.95) -> Optional[float]:
+        """The ``q`` quantile of recent latencies, once there are enough samples."""
+        samples = self._samples.get(service)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one OPS service."""
+
+    def __init__(self, service: str, failures: int = None, reset_after: float = None, clock=time.monotonic):
+        self.service = service
+        self.threshold = settings.OPS_CIRCUIT_FAILURES if failures is None else failures
+        self.reset_after = settings.OPS_CIRCUIT_RESET if reset_after is None else reset_after
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.stats = {"opened": 0, "rejected": 0}
+        self._probing = False
+
+    def check(self) -> bool:
+        """
+        Raise ``CircuitOpen`` unless a call may go upstream; after the
+        cool-down a single probe is let through. Return whether the caller
+        is that probe, which must end in ``success``, ``failure`` or ``release``.
+        """
+        if self.threshold <= 0 or self.state == "closed":
+            return False
+        if self.state == "open" and self.clock() - self.opened_at >= self.reset_after:
+            self.state = "half-open"
+        if self.state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        self.stats["rejected"] += 1
+        raise CircuitOpen("OPS {0} service is failing; calls suspended".format(self.service))
+
+    def success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def release(self) -> None:
+        """End a probe that failed before reaching OPS, so another one may go."""
+        self._probing = False
+
+    def failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.threshold > 0 and (self.state == "half-open" or self.failures >= self.threshold):
+            if self.state != "open":
+                self.stats["opened"] += 1
+            self.state = "open"
+            self.opened_at = self.clock()
+
+    def snapshot(self) -> Dict:
+        return {"state": self.state, "failures": self.failures, **self.stats}
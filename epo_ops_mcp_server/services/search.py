@@ -0,0 +1,159 @@
+"""
+Auto-paginating search for EPO OPS MCP Server
+
+OPS returns at most 100 results per search request and never more than 2000
+results for one query. ``paginate`` fetches the first window to learn the
+result count, then fetches the remaining windows concurrently (each request
+still goes through the client's per-service throttle), merges them in range
+order and drops duplicate hits.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.priority import BULK, priority
+
+PAGE_SIZE = 100
+OPS_MAX_RESULTS = 2000
+
+
+def page_windows(begin: int, end: int, page_size: int = PAGE_SIZE) -> List[Tuple[int, int]]:
+    """Split the 1-based inclusive range ``begin``-``end`` into OPS-sized windows."""
+    return [
+        (start, min(start + page_size - 1, end))
+        for start in range(begin, end + 1, page_size)
+    ]
+
+
+def item_key(section: str, item: Dict[str, Any]) -> Tuple:
+    """Identity of a result item, used to drop duplicates across pages."""
+    if section == "hits":
+        doc = item.get("id", {})
+        return (doc.get("country"), doc.get("number"), doc.get("kind"))
+    if section == "documents":
+        return (item.get("country"), item.get("number"), item.get("kind"))
+    return (item.get("application"), item.get("publication"))
+
+
+def page_items(page: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Result items of one parsed page, by section."""
+    items = {}
+    if page.get("search", {}).get("hits"):
+        items["hits"] = page["search"]["hits"]
+    for section in ("documents", "register_documents"):
+        if page.get(section):
+            items[section] = page[section]
+    return items
+
+
+class ResultMerger:
+    """Accumulates result items across pages, keeping the first copy of each."""
+
+    def __init__(self):
+        self.items: Dict[str, List[Dict[str, Any]]] = {}
+        self.duplicates = 0
+        self._seen = set()
+
+    def add(self, page: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Merge ``page``; return only the items not seen before."""
+        new_items = {}
+        for section, items in page_items(page).items():
+            for item in items:
+                key = (section, item_key(section, item))
+                if key in self._seen:
+                    self.duplicates += 1
+                    continue
+                self._seen.add(key)
+                new_items.setdefault(section, []).append(item)
+                self.items.setdefault(section, []).append(item)
+        return new_items
+
+
+async def paginate(
+    fetch_page: Callable[[int, int], Awaitable[Dict[str, Any]]],
+    range_begin: int = 1,
+    range_end: int = OPS_MAX_RESULTS,
+    concurrency: int = None,
+    on_page: Optional[Callable[[int, int, Dict[str, Any]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Fetch every result of a search between ``range_begin`` and ``range_end``.
+
+    Args:
+        fetch_page: Coroutine fetching one window ``(begin, end)`` and returning
+                    the parsed page (``parse_ops_xml`` output).
+        range_begin: First result wanted (1-based).
+        range_end: Last result wanted; capped at the result count and at 2000.
+        concurrency: Maximum windows fetched at once.
+        on_page: Awaited after each page with ``(pages_done, pages_total, new_items)``
+                 so callers can stream partial results.
+
+    Returns:
+        ``{"search": {...}, "hits": [...], "documents": [...], "errors": [...]}``
+        with only the sections that have content.
+    """
+    range_end = min(range_end, OPS_MAX_RESULTS)
+    windows = page_windows(range_begin, range_end)
+    if not windows:
+        return {"search": {"total": None, "returned": 0, "pages": 0}}
+
+    merger = ResultMerger()
+    pages: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    errors = []
+
+    first = windows[0]
+    pages[first] = await fetch_page(*first)
+    search = pages[first].get("search", {})
+    total = search.get("total")
+    if total is not None:
+        windows = page_windows(range_begin, min(range_end, total)) or [first]
+    new_items = merger.add(pages[first])
+    if on_page is not None:
+        await on_page(1, len(windows), new_items)
+
+    semaphore = asyncio.Semaphore(concurrency or settings.SEARCH_PAGE_CONCURRENCY)
+
+    async def fetch(window):
+        async with semaphore:
+            try:
+                return window, await fetch_page(*window), None
+            except Exception as e:
+                return window, None, e
+
+    done = 1
+    # The first page answers the caller; the rest is bulk work
+    with priority(BULK):
+        pending = [asyncio.ensure_future(fetch(w)) for w in windows[1:]]
+    for next_page in asyncio.as_completed(pending):
+        window, page, error = await next_page
+        done += 1
+        if error is not None:
+            errors.append({"range": "{0}-{1}".format(*window), "error": str(error)})
+            new_items = {}
+        else:
+            pages[window] = page
+            new_items = merger.add(page)
+        if on_page is not None:
+            await on_page(done, len(windows), new_items)
+
+    # Final result in range order, independent of arrival order
+    ordered = ResultMerger()
+    for window in windows:
+        if window in pages:
+            ordered.add(pages[window])
+
+    result: Dict[str, Any] = {
+        "search": {
+            "total": total,
+            "query": search.get("query"),
+            "begin": range_begin,
+            "end": windows[-1][1],
+            "returned": sum(len(items) for items in ordered.items.values()),
+            "duplicates": ordered.duplicates,
+            "pages": len(windows),
+        },
+    }
+    result.update(ordered.items)
+    if errors:
+        result["errors"] = errors
+    return result
@@ -0,0 +1,120 @@
+"""
+Tenants for EPO OPS MCP Server
+
+A server shared by several teams can route each team's calls through its own
+OPS credentials, configured in ``settings.OPS_TENANTS``::
+
+    {"team-a": {"token": "<secret sent by the team's MCP client>",
+                "key": "<OPS key>", "secret": "<OPS secret>"}}
+
+HTTP clients identify their tenant with the ``X-Tenant-Token`` header.
+``TenantMiddleware`` resolves it for every MCP request and stores the tenant
+name in a context variable, which ``get_async_epo_client`` uses to pick the
+tenant's own client (connection pool, throttle state, quota ledger and token).
+Requests without a token use the default ``EPO_OPS_KEY``/``EPO_OPS_SECRET``
+credentials, if any; an unknown token is refused.
+"""
+import contextvars
+import hmac
+import os
+import re
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware
+
+from epo_ops_mcp_server.config import settings
+
+TENANT_HEADER = "x-tenant-token"
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+_tenant = contextvars.ContextVar("ops_tenant", default=None)
+
+
+class UnknownTenant(PermissionError):
+    """A request carried no usable tenant credentials."""
+
+
+class Tenant:
+    """One tenant's name and OPS credentials."""
+
+    __slots__ = ("name", "token", "key", "secret")
+
+    def __init__(self, name: str, token: str, key: str, secret: str):
+        if not _NAME_RE.match(name):
+            raise ValueError("Invalid tenant name: {0!r}".format(name))
+        if not (token and key and secret):
+            raise ValueError("Tenant {0} needs a token, key and secret".format(name))
+        self.name = name
+        self.token = token
+        self.key = key
+        self.secret = secret
+
+
+def load_tenants(config: Dict[str, Dict[str, str]] = None) -> Dict[str, Tenant]:
+    """Tenants by name from ``config`` (default: ``settings.OPS_TENANTS``)."""
+    config = settings.OPS_TENANTS if config is None else config
+    return {
+        name: Tenant(name, entry.get("token"), entry.get("key"), entry.get("secret"))
+        for name, entry in config.items()
+    }
+
+
+def resolve_tenant(token: Optional[str], tenants: Dict[str, Tenant]) -> Optional[str]:
+    """
+    Name of the tenant ``token`` belongs to, or ``None`` for the default
+    credentials.
+
+    Raises:
+        UnknownTenant: If the token matches no tenant, or there is no token
+            and no default credentials.
+    """
+    if not token:
+        if not (settings.EPO_OPS_KEY and settings.EPO_OPS_SECRET) and tenants:
+            raise UnknownTenant("This server requires an X-Tenant-Token header")
+        return None
+    match = None
+    for tenant in tenants.values():
+        # Compare against every tenant so timing does not reveal which one matched
+        if hmac.compare_digest(tenant.token.encode("utf-8"), token.encode("utf-8")):
+            match = tenant.name
+    if match is None:
+        raise UnknownTenant("Unknown tenant token")
+    return match
+
+
+def current_tenant() -> Optional[str]:
+    """Tenant of the request being served (``None``: default credentials)."""
+    return _tenant.get()
+
+
+@contextmanager
+def tenant(name: Optional[str]):
+    """Serve the enclosed calls on behalf of tenant ``name``."""
+    token = _tenant.set(name)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def tenant_path(path: str, name: Optional[str]) -> str:
+    """Per-tenant variant of a state file path: ``quota.json`` -> ``quota-<name>.json``."""
+    if not path or name is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return "{0}-{1}{2}".format(root, name, ext)
+
+
+class TenantMiddleware(Middleware):
+    """Resolves the tenant of every MCP request from its HTTP headers."""
+
+    def __init__(self, tenants: Dict[str, Tenant] = None):
+        self.tenants = load_tenants() if tenants is None else tenants
+
+    async def on_request(self, context, call_next):
+        name = resolve_tenant(get_http_headers().get(TENANT_HEADER), self.tenants)
+        with tenant(name):
+            return await call_next(context)
@@ -0,0 +1,350 @@
+"""
+Throttle-aware request scheduler for EPO OPS MCP Server
+
+OPS reports its current throttling state on every response in the
+``X-Throttling-Control`` header, e.g.::
+
+    busy (images=green:100, inpadoc=yellow:45, other=green:1000, retrieval=green:200, search=green:15)
+
+Each service has a traffic-light status and a per-minute request limit. The
+scheduler keeps one lane per service and spaces requests in a lane at
+``60 / limit`` seconds, so a burst against one service (e.g. search) never
+delays calls to another (e.g. images or legal). Within a lane, waiting
+requests are served by priority (interactive before bulk before background),
+then in arrival order.
+
+When several server processes share one OPS account, their schedulers book
+slots in a ``SharedThrottleState`` (a small SQLite file) as well, so the
+processes together still pace requests like a single client. Its SQLite
+transactions run on a thread of their own, never on the event loop.
+"""
+import asyncio
+import heapq
+import logging
+import itertools
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.priority import current_priority
+from epo_ops_mcp_server.utils.lazy import LazyModule
+
+epo_ops = LazyModule("epo_ops")
+
+log = logging.getLogger(__name__)
+
+SERVICES = ("images", "inpadoc", "other", "retrieval", "search")
+
+_SYSTEM_RE = re.compile(r"^\s*(\w+)")
+_SERVICE_RE = re.compile(r"(\w+)=(\w+):(\d+)")
+
+
+def parse_throttling_control(header: str) -> Dict:
+    """
+    Parse an ``X-Throttling-Control`` header value.
+
+    Returns:
+        ``{"system_status": str, "services": {name: {"status": str, "limit": int}}}``
+    """
+    match = _SYSTEM_RE.match(header or "")
+    status = {
+        "system_status": match.group(1).lower() if match else None,
+        "services": {},
+    }
+    for service, color, limit in _SERVICE_RE.findall(header or ""):
+        status["services"][service] = {"status": color.lower(), "limit": int(limit)}
+    return status
+
+
+class ServiceLane:
+    """Pacing state and priority queue for one OPS service."""
+
+    __slots__ = ("status", "limit", "next_slot", "blocked_until", "queued", "waiting")
+
+    def __init__(self):
+        self.status = "green"
+        self.limit: Optional[int] = None
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+        self.queued = 0
+        # Heap of (priority, sequence, wake-up event) of the requests waiting
+        self.waiting = []
+
+    def wake_head(self) -> None:
+        if self.waiting:
+            self.waiting[0][2].set()
+
+    @property
+    def interval(self) -> float:
+        if not self.limit:
+            return 0.0
+        return 60.0 / self.limit
+
+
+def _log_failure(future: Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        log.warning("Could not publish throttling state: %s", future.exception())
+
+
+class SharedThrottleState:
+    """
+    Per-service pacing state shared by processes through SQLite.
+
+    Holds, for each service, the last reported status and limit, the next
+    free slot and the time until which it is blocked, in wall-clock time.
+    Slots are booked in ``BEGIN IMMEDIATE`` transactions, so two processes
+    never get the same slot. The scheduler runs these calls through
+    ``submit``, on one dedicated thread, in the order they were made.
+    """
+
+    def __init__(self, path: str = None, clock=time.time):
+        self.path = path or settings.THROTTLE_PATH
+        self.clock = clock
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="throttle-state")
+        self.db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                """CREATE TABLE IF NOT EXISTS lanes(
+                    service text primary key,
+                    status text,
+                    rate_limit integer,
+                    next_slot real not null default 0,
+                    blocked_until real not null default 0
+                )"""
+            )
+
+    def delay(self, service: str) -> float:
+        """Time until the next slot for ``service`` no other process has booked."""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT next_slot, blocked_until FROM lanes WHERE service = ?", (service,)
+            ).fetchone()
+        if row is None:
+            return 0.0
+        return max(0.0, max(row) - self.clock())
+
+    def reserve(self, service: str, interval: float) -> float:
+        """Book the next free slot for ``service`` and return the delay until it."""
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.db.execute(
+                    "SELECT rate_limit, next_slot, blocked_until FROM lanes WHERE service = ?", (service,)
+                ).fetchone()
+                rate_limit, next_slot, blocked_until = row or (None, 0.0, 0.0)
+                if rate_limit:
+                    # The strictest limit any process has seen
+                    interval = max(interval, 60.0 / rate_limit)
+                now = self.clock()
+                start = max(now, next_slot, blocked_until)
+                self.db.execute(
+                    "INSERT INTO lanes(service, next_slot) VALUES (?, ?) "
+                    "ON CONFLICT(service) DO UPDATE SET next_slot = excluded.next_slot",
+                    (service, start + interval),
+                )
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        return start - now
+
+    def update(self, service: str, status: str, limit: Optional[int], blocked_until: float = 0.0) -> None:
+        """Publish the state of ``service`` reported to one process."""
+        with self._lock:
+            self.db.execute(
+                "INSERT INTO lanes(service, status, rate_limit, blocked_until) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(service) DO UPDATE SET status = excluded.status, "
+                "rate_limit = excluded.rate_limit, "
+                "blocked_until = max(blocked_until, excluded.blocked_until)",
+                (service, status, limit, blocked_until),
+            )
+
+    def submit(self, fn, *args) -> Future:
+        """Run ``fn(*args)`` on the state's thread, after every call submitted before it."""
+        return self._executor.submit(fn, *args)
+
+    def close(self) -> None:
+        # Publishes still queued are written first
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self.db.close()
+
+
+class ThrottleScheduler:
+    """
+    Paces OPS requests per service from the throttling headers OPS returns.
+
+    With ``shared``, slots are also booked in state shared with other
+    processes, and the throttling reported to this process is published
+    there.
+    """
+
+    def __init__(self, clock=time.monotonic, shared: SharedThrottleState = None):
+        self.clock = clock
+        self.shared = shared
+        self.system_status: Optional[str] = None
+        self.lanes = {service: ServiceLane() for service in SERVICES}
+        self.total_wait = 0.0
+        self._sequence = itertools.count()
+        self._published: Dict[str, tuple] = {}
+
+    @staticmethod
+    def service_for_url(url: str) -> str:
+        return epo_ops.middlewares.throttle.utils.service_for_url(url)
+
+    def lane(self, service: str) -> ServiceLane:
+        if service not in self.lanes:
+            self.lanes[service] = ServiceLane()
+        return self.lanes[service]
+
+    def _local_delay(self, service: str) -> float:
+        lane = self.lane(service)
+        return max(0.0, lane.next_slot - self.clock(), lane.blocked_until - self.clock())
+
+    def delay(self, service: str) -> float:
+        """Time until the next free slot for ``service`` (blocks on shared state; see ``wait_time``)."""
+        delay = self._local_delay(service)
+        if self.shared is not None and delay <= 0:
+            delay = self.shared.submit(self.shared.delay, service).result()
+        return delay
+
+    async def wait_time(self, service: str) -> float:
+        """``delay`` without blocking the event loop."""
+        delay = self._local_delay(service)
+        if self.shared is not None and delay <= 0:
+            delay = await asyncio.wrap_future(self.shared.submit(self.shared.delay, service))
+        return delay
+
+    def _book_local(self, service: str):
+        lane = self.lane(service)
+        now = self.clock()
+        start = max(now, lane.next_slot, lane.blocked_until)
+        lane.next_slot = start + lane.interval
+        return lane, now, start
+
+    def reserve(self, service: str) -> float:
+        """Book the next free slot for ``service`` and return the delay until it."""
+        lane, now, start = self._book_local(service)
+        if self.shared is not None:
+            # Another process may have booked the slot since ``delay`` looked
+            shared = self.shared.submit(self.shared.reserve, service, lane.interval).result()
+            start = max(start, now + shared)
+            lane.next_slot = max(lane.next_slot, start + lane.interval)
+        return start - now
+
+    async def _reserve(self, service: str) -> float:
+        """``reserve`` without blocking the event loop."""
+        # Booked locally first, so the next request in the lane never gets the same slot
+        lane, now, start = self._book_local(service)
+        if self.shared is not None:
+            shared = await asyncio.wrap_future(self.shared.submit(self.shared.reserve, service, lane.interval))
+            start = max(start, now + shared)
+            lane.next_slot = max(lane.next_slot, start + lane.interval)
+        return start - now
+
+    async def acquire(self, service: str, priority: int = None) -> float:
+        """
+        Wait until a request to ``service`` may be sent; return the time waited.
+
+        The request waits its turn behind higher-priority requests and earlier
+        ones of the same priority (default: the current context's priority).
+        """
+        lane = self.lane(service)
+        priority = current_priority() if priority is None else priority
+        entry = (priority, next(self._sequence), asyncio.Event())
+        heapq.heappush(lane.waiting, entry)
+        lane.queued += 1
+        started = self.clock()
+        try:
+            while True:
+                if lane.waiting[0] is entry:
+                    delay = await self.wait_time(service)
+                    if delay <= 0:
+                        break
+                    entry[2].clear()
+                    try:
+                        # Woken early if a higher-priority request queues up
+                        await asyncio.wait_for(entry[2].wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    entry[2].clear()
+                    await entry[2].wait()
+            heapq.heappop(lane.waiting)
+            booked = await self._reserve(service)
+        except BaseException:
+            if entry in lane.waiting:
+                lane.waiting.remove(entry)
+                heapq.heapify(lane.waiting)
+            raise
+        finally:
+            lane.queued -= 1
+            lane.wake_head()
+        if booked > 0:
+            await asyncio.sleep(booked)
+        waited = self.clock() - started
+        self.total_wait += waited
+        return waited
+
+    def update(self, service: str, headers) -> None:
+        """Record the throttling state reported on a response to ``service``."""
+        header = headers.get("X-Throttling-Control")
+        if not header:
+            return
+
+        status = parse_throttling_control(header)
+        self.system_status = status["system_status"]
+        now = self.clock()
+        for name, state in status["services"].items():
+            lane = self.lane(name)
+            lane.status = state["status"]
+            lane.limit = state["limit"] or None
+            if state["status"] == "black" or state["limit"] == 0:
+                # Retry-After is given in milliseconds for throttled services
+                retry_after = float(headers.get("Retry-After", 60000) or 0) / 1000.0
+                lane.blocked_until = max(lane.blocked_until, now + retry_after)
+                self._publish(name, lane, retry_after)
+            else:
+                self._publish(name, lane)
+
+    def _publish(self, name: str, lane: ServiceLane, retry_after: float = 0.0) -> None:
+        if self.shared is None:
+            return
+        state = (lane.status, lane.limit)
+        # Only changes (and blocks) are written
+        if retry_after <= 0 and self._published.get(name) == state:
+            return
+        self._published[name] = state
+        # Written in the background; later reads of the shared state are queued behind it
+        self.shared.submit(
+            self.shared.update,
+            name, lane.status, lane.limit, self.shared.clock() + retry_after if retry_after > 0 else 0.0,
+        ).add_done_callback(_log_failure)
+
+    def snapshot(self) -> Dict:
+        """Current throttling state, for diagnostics."""
+        now = self.clock()
+        return {
+            "system_status": self.system_status,
+            "total_wait": round(self.total_wait, 3),
+            "services": {
+                name: {
+                    "status": lane.status,
+                    "limit": lane.limit,
+                    "queued": lane.queued,
+                    "blocked_for": round(max(0.0, lane.blocked_until - now), 3),
+                }
+                for name, lane in self.lanes.items()
+            },
+        }
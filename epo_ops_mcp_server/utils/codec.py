@@ -0,0 +1,143 @@
+"""
+Compression codecs for cached OPS responses
+
+OPS XML compresses several times over, so cache entries are stored
+compressed in both tiers and only decompressed when a response is served.
+``zstd`` (the ``zstandard`` package, optionally with a dictionary trained on
+cached responses) is used when installed, otherwise ``zlib``. Every entry
+records the codec it was written with; an entry whose codec is no longer
+available (e.g. written with another dictionary) is treated as missing.
+
+Train a dictionary from an existing cache with::
+
+    python -m epo_ops_mcp_server.utils.codec /var/tmp/epo-ops-server/cache.db cache.dict
+"""
+import sqlite3
+import sys
+import zlib
+from typing import Dict, Optional
+
+from epo_ops_mcp_server.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+
+class Codec:
+    """Stores content as is."""
+
+    name = "identity"
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class ZlibCodec(Codec):
+
+    name = "zlib"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCodec(Codec):
+
+    def __init__(self, level: int = 3, dictionary: bytes = None):
+        if zstandard is None:
+            raise RuntimeError("The zstd codec requires zstandard: pip install zstandard")
+        self.dictionary = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        # Entries written with a dictionary can only be read with the same one
+        self.name = "zstd-{0}".format(self.dictionary.dict_id()) if self.dictionary else "zstd"
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=self.dictionary)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionary)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+
+IDENTITY = Codec()
+
+
+def get_codec(name: str = None, dictionary_path: str = None) -> Codec:
+    """
+    The codec named by ``name`` (default ``settings.CACHE_CODEC``): "auto"
+    (zstd if installed, else zlib), "zstd", "zlib" or "identity".
+    """
+    name = name or settings.CACHE_CODEC
+    dictionary_path = settings.CACHE_CODEC_DICTIONARY if dictionary_path is None else dictionary_path
+    if name == "auto":
+        name = "zstd" if zstandard is not None else "zlib"
+    if name == "zstd":
+        dictionary = None
+        if dictionary_path:
+            with open(dictionary_path, "rb") as f:
+                dictionary = f.read()
+        return ZstdCodec(dictionary=dictionary)
+    if name == "zlib":
+        return ZlibCodec()
+    if name == "identity":
+        return IDENTITY
+    raise ValueError("Unknown cache codec: {0}".format(name))
+
+
+class CodecRegistry:
+    """Codecs by stored name: the current one plus those readable without configuration."""
+
+    def __init__(self, current: Codec):
+        self.current = current
+        self.codecs: Dict[str, Codec] = {IDENTITY.name: IDENTITY, "zlib": ZlibCodec(), current.name: current}
+        if zstandard is not None and "zstd" not in self.codecs:
+            self.codecs["zstd"] = ZstdCodec()
+
+    def get(self, name: Optional[str]) -> Optional[Codec]:
+        return self.codecs.get(name or IDENTITY.name)
+
+
+def train_dictionary(cache_path: str, size: int = 112640, limit: int = 10000) -> bytes:
+    """Train a zstd dictionary on the content of up to ``limit`` cached responses."""
+    if zstandard is None:
+        raise RuntimeError("Training a dictionary requires zstandard: pip install zstandard")
+    registry = CodecRegistry(IDENTITY)
+    db = sqlite3.connect(cache_path)
+    try:
+        rows = db.execute(
+            "SELECT content, codec FROM entries ORDER BY stored_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+    finally:
+        db.close()
+    samples = []
+    for content, codec in rows:
+        codec = registry.get(codec)
+        if codec is not None:
+            samples.append(codec.decompress(bytes(content)))
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python -m epo_ops_mcp_server.utils.codec CACHE_DB OUTPUT_DICT", file=sys.stderr)
+        return 2
+    dictionary = train_dictionary(argv[0])
+    with open(argv[1], "wb") as f:
+        f.write(dictionary)
+    print("Wrote {0} byte dictionary to {1}; set CACHE_CODEC_DICTIONARY to use it".format(len(dictionary), argv[1]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+Deferred imports for EPO OPS MCP Server
+
+``python-epo-ops-client`` pulls in ``requests``, ``dogpile.cache`` and
+``dateutil`` when it is imported, about a tenth of the server's start-up
+time, yet it is only needed once the first OPS request is made. Modules
+refer to it through a ``LazyModule``, which imports it on first attribute
+access (or when ``load`` is called, e.g. from a background warm-up).
+"""
+import importlib
+import threading
+from types import ModuleType
+
+
+class LazyModule:
+    """Stand-in for the module ``name`` that imports it on first use."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self) -> ModuleType:
+        """Import the module now (thread-safe) and return it."""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return "<lazy module {0!r} ({1})>".format(self._name, state)
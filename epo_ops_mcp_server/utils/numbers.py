@@ -0,0 +1,187 @@
+"""
+Local patent number normalization
+
+Parses publication numbers as people and documents write them ("EP 1 000 000
+A1", "US 2020/0123456 A1", "WO2025/158691", "KR 10-2020-0012345 A") into the
+canonical docdb form OPS uses (country, number, kind) for the major offices,
+so most conversions never reach the OPS number service. Numbers whose
+canonical form depends on rules this module does not know (older WO and
+Japanese era numbering, US design and reissue numbers, application and
+priority numbers, other offices) raise ``AmbiguousNumber`` and are left to
+OPS. Results are memoized, so a number is parsed once per process.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Union
+
+from epo_ops_mcp_server.config import settings
+
+# "EP", "EP 1000000", "EP-1000000"
+_COUNTRY_RE = re.compile(r"^([A-Z]{2})[\s.\-]*(.*)$")
+# Trailing kind code after the last digit: "1000000A1", "1000000 B", "1000000.A1"
+_KIND_RE = re.compile(r"^(.*\d)[\s.]*([A-Z]\d?)$")
+_SEPARATORS_RE = re.compile(r"[\s,]")
+
+
+class AmbiguousNumber(ValueError):
+    """The canonical form of a number cannot be decided locally."""
+
+
+@dataclass(frozen=True, slots=True)
+class PatentNumber:
+    """A publication number in canonical docdb form."""
+
+    country: str
+    number: str
+    kind: Optional[str] = None
+
+    @property
+    def docdb(self) -> str:
+        """``EP.1000000.A1`` (``EP.1000000`` without a kind)."""
+        return ".".join(p for p in (self.country, self.number, self.kind) if p)
+
+    @property
+    def epodoc(self) -> str:
+        """``EP1000000``: epodoc numbers carry the kind separately."""
+        return self.country + self.number
+
+    @property
+    def key(self) -> str:
+        """Canonical key of the document, independent of kind and spelling."""
+        return self.epodoc
+
+
+def _digits(body: str, max_length: int) -> Optional[str]:
+    body = _SEPARATORS_RE.sub("", body).replace(".", "")
+    if body.isdigit() and len(body) <= max_length:
+        return body
+    return None
+
+
+def _ep(body):
+    digits = _digits(body, 7)
+    return digits.zfill(7) if digits else None
+
+
+def _wo(body):
+    match = re.match(r"^(\d{4})/?(\d{1,6})$", _SEPARATORS_RE.sub("", body))
+    # Two-digit years and five-digit serials (before July 2004) follow other rules
+    if match and int(match.group(1)) >= 2004:
+        return match.group(1) + match.group(2).zfill(6)
+    return None
+
+
+def _us(body):
+    body = _SEPARATORS_RE.sub("", body)
+    # Pre-grant publications: 2020/0123456 -> 2020123456
+    match = re.match(r"^(\d{4})/?0?(\d{6})$", body)
+    if match and int(match.group(1)) >= 2001:
+        return match.group(1) + match.group(2)
+    # Grants: 10,123,456 -> 10123456
+    if body.isdigit() and len(body) <= 8:
+        return body.lstrip("0")
+    return None
+
+
+def _jp(body):
+    body = _SEPARATORS_RE.sub("", body)
+    match = re.match(r"^(\d{4})[-/]?(\d{6})$", body)
+    if match:
+        return match.group(1) + match.group(2)
+    return body if body.isdigit() and 7 <= len(body) <= 10 else None
+
+
+def _kr(body):
+    body = _SEPARATORS_RE.sub("", body)
+    # Unexamined publications: 10-2020-0012345 -> 20200012345
+    match = re.match(r"^(?:10-?)?(\d{4})-?(\d{7})$", body)
+    if match:
+        return match.group(1) + match.group(2)
+    body = body.replace("-", "")
+    return body if body.isdigit() and len(body) <= 9 else None
+
+
+def _digits_only(max_length):
+    return lambda body: _digits(body, max_length)
+
+
+# Publication number rules per office: body (after country, before kind) -> docdb number
+_PUBLICATION_RULES = {
+    "EP": _ep,
+    "WO": _wo,
+    "US": _us,
+    "JP": _jp,
+    "KR": _kr,
+    "CN": _digits_only(9),
+    "DE": _digits_only(12),
+    "GB": _digits_only(7),
+    "FR": _digits_only(7),
+    "CA": _digits_only(7),
+    "AU": _digits_only(10),
+    "CH": _digits_only(6),
+    "ES": _digits_only(7),
+}
+
+
+def split_number(text: str, country: str = None, kind: str = None):
+    """Split free text into (country, body, kind); explicit arguments win."""
+    text = (text or "").strip().upper()
+    if not country:
+        match = _COUNTRY_RE.match(text)
+        if not match:
+            raise AmbiguousNumber("No country code in {0!r}".format(text))
+        country, text = match.groups()
+    match = _KIND_RE.match(text)
+    if match:
+        text, found = match.groups()
+        kind = kind or found
+    return country.strip().upper(), text.strip(), (kind or "").strip().upper() or None
+
+
+@lru_cache(maxsize=settings.NUMBER_CACHE_SIZE)
+def _normalize(text: str, country: Optional[str], kind: Optional[str], reference_type: str) -> Union[PatentNumber, str]:
+    # Failures are cached too, as their message
+    if reference_type != "publication":
+        return "{0} numbers are converted by OPS".format(reference_type.capitalize())
+    try:
+        country, body, kind = split_number(text, country, kind)
+    except AmbiguousNumber as e:
+        return str(e)
+    rule = _PUBLICATION_RULES.get(country)
+    if rule is None:
+        return "No local rules for {0} numbers".format(country)
+    number = rule(body)
+    if not number:
+        return "Cannot normalize {0} number {1!r} locally".format(country, body)
+    return PatentNumber(country, number, kind)
+
+
+def normalize_number(
+    text: str,
+    country: str = None,
+    kind: str = None,
+    reference_type: str = "publication",
+) -> PatentNumber:
+    """
+    Canonical docdb form of a patent number.
+
+    ``text`` is the number as written, with or without country and kind
+    ("EP 1 000 000 A1", "2020/0123456"); ``country`` and ``kind`` are used
+    when given separately.
+
+    Raises:
+        AmbiguousNumber: If the canonical form must come from OPS.
+    """
+    result = _normalize(text, country or None, kind or None, reference_type)
+    if isinstance(result, str):
+        raise AmbiguousNumber(result)
+    return result
+
+
+def canonical_key(text: str, country: str = None) -> str:
+    """One key per document for caches and indexes: ``EP1000000`` for any spelling of it."""
+    try:
+        return normalize_number(text, country).key
+    except AmbiguousNumber:
+        return "{0}{1}".format(country or "", text or "").replace(" ", "").upper()
@@ -0,0 +1,549 @@
+"""
+Structured parsing of EPO OPS XML responses
+
+The parser walks a response once with ``iterparse`` and turns each record
+element (exchange documents, search hits, family members, legal events,
+register documents, full-text documents, image inquiries) into a compact
+slotted record, clearing the XML subtree as soon as its record is built so
+memory stays proportional to the records rather than the document tree.
+"""
+import io
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+
+def _local(name: str) -> str:
+    return name.rsplit("}", 1)[-1]
+
+
+def _text(element: Optional[ET.Element]) -> Optional[str]:
+    if element is None:
+        return None
+    text = " ".join(t.strip() for t in element.itertext() if t.strip())
+    return text or None
+
+
+def compact(value: Any) -> Any:
+    """Convert records to plain JSON types, dropping empty fields."""
+    if hasattr(value, "__dataclass_fields__"):
+        result = {}
+        for f in fields(value):
+            item = compact(getattr(value, f.name))
+            if item not in (None, "", [], {}):
+                result[f.name] = item
+        return result
+    if isinstance(value, list):
+        return [compact(v) for v in value]
+    if isinstance(value, dict):
+        return {k: compact(v) for k, v in value.items()}
+    return value
+
+
+# Projection
+
+# Identity fields are always kept, whatever the requested projection
+IDENTITY_FIELDS = {"country", "number", "kind", "family_id", "publication", "application"}
+
+
+@dataclass(slots=True)
+class Projection:
+    """
+    Limits applied while parsing, so oversized sections are never materialized.
+
+    Attributes:
+        fields: Record fields to keep (identity fields are always kept).
+        max_claims: Maximum number of claims returned per document.
+        max_chars: Maximum characters per text section (abstract, claims, description).
+        offset: Index of the first description paragraph to return.
+        limit: Maximum number of description paragraphs to return.
+    """
+    fields: Optional[Set[str]] = None
+    max_claims: Optional[int] = None
+    max_chars: Optional[int] = None
+    offset: int = 0
+    limit: Optional[int] = None
+
+    @classmethod
+    def from_args(cls, fields=None, max_claims=None, max_chars=None, offset=0, limit=None):
+        """Build a projection from tool arguments, or None when nothing is limited."""
+        if not any([fields, max_claims is not None, max_chars is not None, offset, limit is not None]):
+            return None
+        return cls(
+            fields=set(fields) if fields else None,
+            max_claims=max_claims,
+            max_chars=max_chars,
+            offset=max(offset or 0, 0),
+            limit=limit,
+        )
+
+    def keeps(self, section: str, index: int) -> bool:
+        """Whether the ``index``-th element of ``section`` lies inside the window."""
+        if section == "claim-text":
+            return self.max_claims is None or index < self.max_claims
+        if index < self.offset:
+            return False
+        return self.limit is None or index < self.offset + self.limit
+
+    def select(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.fields:
+            return record
+        wanted = self.fields | IDENTITY_FIELDS
+        return {k: v for k, v in record.items() if k in wanted}
+
+
+def _capped(texts: Iterable[Optional[str]], max_chars: Optional[int]) -> Tuple[List[str], bool, int]:
+    """
+    Keep ``texts`` until ``max_chars`` is used up; return them, whether any
+    were cut and how many of ``texts`` were consumed (empty ones included,
+    a text returned only in part not).
+    """
+    kept, used, consumed = [], 0, 0
+    for text in texts:
+        if not text:
+            consumed += 1
+            continue
+        if max_chars is not None and used + len(text) > max_chars:
+            if max_chars - used > 0:
+                kept.append(text[:max_chars - used])
+            return kept, True, consumed
+        kept.append(text)
+        used += len(text)
+        consumed += 1
+    return kept, False, consumed
+
+
+# Records
+
+@dataclass(slots=True)
+class DocumentId:
+    country: Optional[str] = None
+    number: Optional[str] = None
+    kind: Optional[str] = None
+    date: Optional[str] = None
+
+    @classmethod
+    def from_element(cls, element: Optional[ET.Element]) -> Optional["DocumentId"]:
+        if element is None:
+            return None
+        return cls(
+            country=element.findtext("country"),
+            number=element.findtext("doc-number"),
+            kind=element.findtext("kind"),
+            date=element.findtext("date"),
+        )
+
+
+@dataclass(slots=True)
+class ExchangeDocument:
+    country: Optional[str] = None
+    number: Optional[str] = None
+    kind: Optional[str] = None
+    family_id: Optional[str] = None
+    status: Optional[str] = None
+    publication_date: Optional[str] = None
+    application: Optional[DocumentId] = None
+    priorities: List[DocumentId] = field(default_factory=list)
+    titles: Dict[str, str] = field(default_factory=dict)
+    abstracts: Dict[str, str] = field(default_factory=dict)
+    applicants: List[str] = field(default_factory=list)
+    inventors: List[str] = field(default_factory=list)
+    ipc: List[str] = field(default_factory=list)
+    cpc: List[str] = field(default_factory=list)
+    citations: List[DocumentId] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class SearchResult:
+    total: Optional[int] = None
+    begin: Optional[int] = None
+    end: Optional[int] = None
+    query: Optional[str] = None
+    hits: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class LegalEvent:
+    code: Optional[str] = None
+    description: Optional[str] = None
+    influence: Optional[str] = None
+    date: Optional[str] = None
+    country: Optional[str] = None
+    fields: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class FamilyMember:
+    family_id: Optional[str] = None
+    publication: Optional[DocumentId] = None
+    application: Optional[DocumentId] = None
+    priorities: List[DocumentId] = field(default_factory=list)
+    document: Optional[ExchangeDocument] = None
+    legal: List[LegalEvent] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class RegisterEvent:
+    code: Optional[str] = None
+    date: Optional[str] = None
+    text: Optional[str] = None
+
+
+@dataclass(slots=True)
+class RegisterDocument:
+    application: Optional[str] = None
+    filing_date: Optional[str] = None
+    publication: Optional[str] = None
+    status: Optional[str] = None
+    titles: Dict[str, str] = field(default_factory=dict)
+    applicants: List[str] = field(default_factory=list)
+    designated_states: List[str] = field(default_factory=list)
+    events: List[RegisterEvent] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class FulltextDocument:
+    publication: Optional[DocumentId] = None
+    claims: List[str] = field(default_factory=list)
+    claims_total: Optional[int] = None
+    description: List[str] = field(default_factory=list)
+    description_total: Optional[int] = None
+    description_offset: Optional[int] = None
+    next_offset: Optional[int] = None
+    truncated: Optional[bool] = None
+    lang: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ImageInstance:
+    description: Optional[str] = None
+    link: Optional[str] = None
+    pages: Optional[int] = None
+    formats: List[str] = field(default_factory=list)
+
+
+# Builders (elements have had their namespaces stripped)
+
+def _docdb_id(parent: ET.Element, path: str) -> Optional[DocumentId]:
+    for element in parent.iterfind(path):
+        if element.get("document-id-type", "docdb") == "docdb":
+            return DocumentId.from_element(element)
+    return None
+
+
+def _names(parent: ET.Element, path: str, name_path: str) -> List[str]:
+    preferred, fallback = [], []
+    for element in parent.iterfind(path):
+        name = _text(element.find(name_path))
+        if not name:
+            continue
+        if element.get("data-format") == "epodoc":
+            preferred.append(name)
+        else:
+            fallback.append(name)
+    return preferred or fallback
+
+
+def _by_lang(parent: ET.Element, path: str, max_chars: Optional[int] = None) -> Dict[str, str]:
+    result = {}
+    for element in parent.iterfind(path):
+        text = _text(element)
+        if text:
+            result[element.get("lang", "")] = text[:max_chars] if max_chars is not None else text
+    return result
+
+
+def build_exchange_document(element: ET.Element, projection: Optional[Projection] = None) -> ExchangeDocument:
+    biblio = element.find("bibliographic-data")
+    if biblio is None:
+        biblio = ET.Element("bibliographic-data")
+    publication = _docdb_id(biblio, "publication-reference/document-id")
+
+    cpc = []
+    for classification in biblio.iterfind("patent-classifications/patent-classification"):
+        parts = [
+            (classification.findtext(tag) or "").strip()
+            for tag in ("section", "class", "subclass", "main-group", "subgroup")
+        ]
+        if parts[0]:
+            cpc.append("{0}{1}{2}{3}/{4}".format(*parts))
+
+    return ExchangeDocument(
+        country=element.get("country"),
+        number=element.get("doc-number"),
+        kind=element.get("kind"),
+        family_id=element.get("family-id"),
+        status=element.get("status"),
+        publication_date=publication.date if publication else None,
+        application=_docdb_id(biblio, "application-reference/document-id"),
+        priorities=[
+            p for p in (
+                _docdb_id(claim, "document-id")
+                for claim in biblio.iterfind("priority-claims/priority-claim")
+            ) if p
+        ],
+        titles=_by_lang(biblio, "invention-title"),
+        abstracts=_by_lang(element, "abstract", projection.max_chars if projection else None),
+        applicants=_names(biblio, "parties/applicants/applicant", "applicant-name"),
+        inventors=_names(biblio, "parties/inventors/inventor", "inventor-name"),
+        ipc=[
+            " ".join(_text(c).split())
+            for c in biblio.iterfind("classifications-ipcr/classification-ipcr/text")
+            if _text(c)
+        ],
+        cpc=cpc,
+        citations=[
+            c for c in (
+                _docdb_id(citation, "patcit/document-id")
+                for citation in biblio.iterfind("references-cited/citation")
+            ) if c
+        ],
+    )
+
+
+def build_legal_event(element: ET.Element) -> LegalEvent:
+    values = {child.tag: _text(child) for child in element if _text(child)}
+    return LegalEvent(
+        code=element.get("code"),
+        description=element.get("desc"),
+        influence=element.get("infl"),
+        date=values.pop("L007EP", None),
+        country=values.pop("L001EP", None),
+        fields={k: v for k, v in values.items() if k != "pre"},
+    )
+
+
+def build_family_member(element: ET.Element, projection: Optional[Projection] = None) -> FamilyMember:
+    document = element.find("exchange-document")
+    return FamilyMember(
+        family_id=element.get("family-id"),
+        publication=_docdb_id(element, "publication-reference/document-id"),
+        application=_docdb_id(element, "application-reference/document-id"),
+        priorities=[
+            p for p in (
+                _docdb_id(claim, "document-id")
+                for claim in element.iterfind("priority-claim")
+            ) if p
+        ],
+        document=build_exchange_document(document, projection) if document is not None else None,
+        legal=[build_legal_event(e) for e in element.iterfind("legal")],
+    )
+
+
+def build_register_document(element: ET.Element, projection: Optional[Projection] = None) -> RegisterDocument:
+    biblio = element.find("bibliographic-data")
+    if biblio is None:
+        biblio = element
+    application = biblio.find("application-reference/document-id")
+    publication = biblio.find("publication-reference/document-id")
+
+    return RegisterDocument(
+        application=(
+            "{0}{1}".format(application.findtext("country") or "", application.findtext("doc-number") or "")
+            if application is not None else None
+        ),
+        filing_date=application.findtext("date") if application is not None else None,
+        publication=(
+            "{0}{1}{2}".format(
+                publication.findtext("country") or "",
+                publication.findtext("doc-number") or "",
+                publication.findtext("kind") or "",
+            )
+            if publication is not None else None
+        ),
+        status=_text(element.find("ep-patent-statuses/ep-patent-status")),
+        titles=_by_lang(biblio, "invention-title"),
+        applicants=[
+            name for name in (
+                _text(a.find("addressbook/name"))
+                for a in biblio.iterfind("parties/applicants/applicant")
+            ) if name
+        ],
+        designated_states=[
+            c.text.strip()
+            for c in biblio.iterfind("designation-of-states//country")
+            if c.text and c.text.strip()
+        ],
+        events=[
+            RegisterEvent(
+                code=event.findtext("event-code"),
+                date=event.findtext("event-date/date"),
+                text=_text(event.find("event-text")),
+            )
+            for event in element.iterfind("events-data/dossier-event")
+        ],
+    )
+
+
+def build_fulltext_document(element: ET.Element, projection: Optional[Projection] = None) -> FulltextDocument:
+    claims = element.find("claims")
+    description = element.find("description")
+    claim_elements = element.findall("claims/claim/claim-text")
+    paragraphs = element.findall("description/p")
+    lang = (
+        claims.get("lang") if claims is not None
+        else description.get("lang") if description is not None
+        else None
+    )
+    publication = _docdb_id(element, "bibliographic-data/publication-reference/document-id")
+
+    if projection is None:
+        return FulltextDocument(
+            publication=publication,
+            claims=[text for text in (_text(c) for c in claim_elements) if text],
+            description=[text for text in (_text(p) for p in paragraphs) if text],
+            lang=lang,
+        )
+
+    # Elements outside the window were already emptied during parsing
+    claim_window = claim_elements[:projection.max_claims] if projection.max_claims is not None else claim_elements
+    end = projection.offset + projection.limit if projection.limit is not None else len(paragraphs)
+    paragraph_window = paragraphs[projection.offset:end]
+
+    claim_texts, claims_cut, _ = _capped((_text(c) for c in claim_window), projection.max_chars)
+    description_texts, description_cut, consumed = _capped(
+        (_text(p) for p in paragraph_window), projection.max_chars
+    )
+    # The next page starts again with a paragraph cut at max_chars, unless it
+    # is the first one (it can never fit; skip it rather than repeat it forever)
+    if description_cut and not consumed:
+        consumed = 1
+    more = projection.offset + consumed < len(paragraphs)
+
+    return FulltextDocument(
+        publication=publication,
+        claims=claim_texts,
+        claims_total=len(claim_elements) if claim_elements else None,
+        description=description_texts,
+        description_total=len(paragraphs) if paragraphs else None,
+        description_offset=projection.offset if paragraphs else None,
+        next_offset=projection.offset + consumed if more else None,
+        truncated=claims_cut or description_cut or len(claim_window) < len(claim_elements) or more or None,
+        lang=lang,
+    )
+
+
+def build_image_instance(element: ET.Element, projection: Optional[Projection] = None) -> ImageInstance:
+    pages = element.get("number-of-pages")
+    return ImageInstance(
+        description=element.get("desc"),
+        link=element.get("link"),
+        pages=int(pages) if pages and pages.isdigit() else None,
+        formats=[f.text.strip() for f in element.iterfind("document-format-options/document-format") if f.text],
+    )
+
+
+def _search_hit(element: ET.Element) -> Dict[str, Any]:
+    return compact({
+        "family_id": element.get("family-id"),
+        "id": _docdb_id(element, "document-id"),
+    })
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value and value.isdigit() else None
+
+
+# Record elements that are built and then cleared, keyed by local tag name.
+# Elements nested in another record (e.g. exchange-document inside a family
+# member or search hit) are left for the enclosing builder.
+_RECORDS = {
+    "exchange-document": ("documents", build_exchange_document),
+    "family-member": ("family_members", build_family_member),
+    "register-document": ("register_documents", build_register_document),
+    "fulltext-document": ("fulltext_documents", build_fulltext_document),
+    "document-instance": ("images", build_image_instance),
+}
+_CONTAINERS = {"family-member", "search-result"}
+
+
+def parse_ops_xml(content: Union[str, bytes], projection: Optional[Projection] = None) -> Dict[str, Any]:
+    """
+    Parse an OPS XML response into compact JSON-ready structures.
+
+    Returns a dict with only the sections present in the response:
+    ``documents``, ``search``, ``family``, ``family_members``,
+    ``register_documents``, ``fulltext_documents``, ``images``.
+    When a ``projection`` is given, records are cut down to it during the parse.
+    """
+    return parse_ops_document(content, projection)[1]
+
+
+def parse_ops_document(
+    content: Union[str, bytes],
+    projection: Optional[Projection] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Like ``parse_ops_xml`` but also return the root element's tag and attributes."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    root: Dict[str, Any] = {}
+    result: Dict[str, List] = {}
+    search: Optional[SearchResult] = None
+    family: Dict[str, Any] = {}
+    stack: List[str] = []
+    # Per-document element counters for the projection window
+    counters: Dict[str, int] = {}
+
+    for event, element in ET.iterparse(io.BytesIO(content), events=("start", "end")):
+        if event == "start":
+            if not root:
+                root = {"tag": element.tag, "attributes": dict(element.attrib)}
+            tag = _local(element.tag)
+            stack.append(tag)
+            if tag in ("biblio-search", "register-search"):
+                search = SearchResult(total=_int(element.get("total-result-count")))
+            elif tag == "fulltext-document":
+                counters = {"claim-text": 0, "p": 0}
+            continue
+
+        # Strip namespaces once, bottom-up: children are already done
+        tag = stack.pop()
+        element.tag = tag
+        if any("}" in k for k in element.attrib):
+            element.attrib = {_local(k): v for k, v in element.attrib.items()}
+
+        if projection is not None and tag in counters and (
+            tag == "claim-text" or stack[-1] == "description"
+        ):
+            # Drop text outside the requested window as soon as it is parsed
+            if not projection.keeps(tag, counters[tag]):
+                element.clear()
+            counters[tag] += 1
+        elif tag in _RECORDS and not _CONTAINERS.intersection(stack):
+            key, build = _RECORDS[tag]
+            result.setdefault(key, []).append(build(element, projection))
+            element.clear()
+        elif tag == "publication-reference" and stack and stack[-1] == "search-result":
+            if search is not None:
+                search.hits.append(_search_hit(element))
+        elif tag == "search-result":
+            if search is not None:
+                for document in element.iterfind("exchange-documents/exchange-document"):
+                    result.setdefault("documents", []).append(build_exchange_document(document, projection))
+            element.clear()
+        elif tag == "query":
+            if search is not None:
+                search.query = _text(element)
+        elif tag == "range":
+            if search is not None:
+                search.begin = _int(element.get("begin"))
+                search.end = _int(element.get("end"))
+        elif tag == "patent-family":
+            family = {
+                "family_id": element.get("family-id"),
+                "total": _int(element.get("total-result-count")),
+            }
+            element.clear()
+
+    output = {key: compact(records) for key, records in result.items()}
+    if projection is not None and projection.fields:
+        output = {
+            key: [projection.select(record) for record in records]
+            for key, records in output.items()
+        }
+    if search is not None:
+        output["search"] = compact(search)
+    if family:
+        output["family"] = compact(family)
+    return root, output
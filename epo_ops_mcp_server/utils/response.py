@@ -1,44 +1,61 @@
 """
 Response utilities for EPO OPS MCP Server
 """
-from typing import Any, Dict
+from typing import Any, Dict, Union
 import xml.etree.ElementTree as ET
 import json
 
+from epo_ops_mcp_server.services.metrics import phase
+from epo_ops_mcp_server.utils.parser import Projection, parse_ops_document
 
-def format_response(content: str, content_type: str) -> Dict[str, Any]:
+
+def format_response(
+    content: Union[str, bytes],
+    content_type: str,
+    include_raw: bool = True,
+    projection: Projection = None,
+) -> Dict[str, Any]:
     """
     Format the response content based on its type.
-    
+
     Args:
-        content: The raw response content
+        content: The raw response content (text or undecoded bytes)
         content_type: The content type header
-        
+        include_raw: Keep the raw response text under ``raw``. Turn off to
+                     return only the parsed structure.
+        projection: Field selection and size limits applied while parsing.
+                    A projected response never carries ``raw``.
+
     Returns:
         Formatted response dictionary
     """
+    with phase("parse"):
+        return _format_response(content, content_type, include_raw, projection)
+
+
+def _format_response(content, content_type, include_raw, projection):
+    if projection is not None:
+        include_raw = False
+    if isinstance(content, bytes) and include_raw:
+        content = content.decode("utf-8", "replace")
+
     # Default response
-    response = {
-        "raw": content
-    }
-    
+    response = {}
+    if include_raw:
+        response["raw"] = content
+
     # Try to parse as JSON
     if "application/json" in content_type:
         try:
             response["json"] = json.loads(content)
         except json.JSONDecodeError:
             pass
-    
+
     # Try to parse as XML
     elif "application/xml" in content_type or "text/xml" in content_type:
         try:
-            root = ET.fromstring(content)
-            response["xml"] = {
-                "tag": root.tag,
-                "attributes": root.attrib,
-                # Note: We're not including full element text to keep response size manageable
-            }
+            response["xml"], response["data"] = parse_ops_document(content, projection)
         except ET.ParseError:
             pass
-    
-    return response
\ No newline at end of file
+
+    return response
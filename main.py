@@ -1,48 +1,138 @@
 """
 Main fastMCP server implementation for EPO OPS
 """
+import asyncio
+import base64
+import hashlib
+from contextlib import asynccontextmanager
+import json
+import os
+
 import fastmcp
-from epo_ops.models import Docdb, Epodoc, Original
-from epo_ops_mcp_server.services.epo_client import get_epo_client
+from fastmcp import Context
+from starlette.responses import PlainTextResponse
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.models import DocdbInput, EpodocInput
+from epo_ops_mcp_server.services.batch import fetch_published_data_batch
+from epo_ops_mcp_server.services.citations import crawl_citations as crawl_citation_graph, seed_node
+from epo_ops_mcp_server.services.epo_client import (
+    close_async_epo_client,
+    get_async_epo_client,
+    start_async_epo_client,
+)
+from epo_ops_mcp_server.services.export import export_search as export_search_results
+from epo_ops_mcp_server.services.family import expand_family as expand_family_members, get_family_index
+from epo_ops_mcp_server.services.images import (
+    fetch_image_pages,
+    get_image_store,
+    parse_pages,
+    shutdown_image_pool,
+)
+from epo_ops_mcp_server.services.metrics import MetricsMiddleware, metrics, phase, timed
+from epo_ops_mcp_server.services.numbers import convert_numbers
+from epo_ops_mcp_server.services.search import paginate
+from epo_ops_mcp_server.services.tenants import TenantMiddleware
+from epo_ops_mcp_server.utils.lazy import LazyModule
+from epo_ops_mcp_server.utils.numbers import AmbiguousNumber, normalize_number
+from epo_ops_mcp_server.utils.parser import Projection, parse_ops_xml
 from epo_ops_mcp_server.utils.response import format_response
 
+# Imported on first use (or by the start-up warm-up), see utils.lazy
+epo_ops = LazyModule("epo_ops")
+
+
+# Open lifespans; over HTTP every MCP session enters its own
+_lifespans = 0
+_warmup = None
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """
+    Warm the OPS client in the background on startup and release its
+    resources on shutdown (when the last session ends).
+    """
+    global _lifespans, _warmup
+    _lifespans += 1
+    if _lifespans == 1:
+        # Not awaited: the MCP handshake is served while the client warms up
+        _warmup = asyncio.create_task(start_async_epo_client())
+    try:
+        yield
+    finally:
+        _lifespans -= 1
+        if _lifespans == 0:
+            _warmup.cancel()
+            await asyncio.gather(_warmup, return_exceptions=True)
+            shutdown_image_pool()
+            await close_async_epo_client()
+
+
 # Create FastMCP server instance
-mcp = fastmcp.FastMCP("EPO OPS MCP Server")
+mcp = fastmcp.FastMCP("EPO OPS MCP Server", lifespan=lifespan)
+mcp.add_middleware(MetricsMiddleware())
+if settings.OPS_TENANTS:
+    mcp.add_middleware(TenantMiddleware())
 
-def validate_pat_number(input_data):
+def validate_pat_number(input_data, reference_type="publication"):
     
     '''
         Convert dict to appropriate input model using Pydantic models for validation
-        Determine if this is Docdb or Epodoc format based on presence of country_code
+        Numbers are normalized to their canonical docdb spelling where the local
+        rules for ``reference_type`` know it ("EP 1 000 000 A1" -> EP1000000, kind A1);
+        a country code without a kind code is sent in epodoc format
     '''
 
-    if 'country_code' in input_data and input_data["country_code"] is not None:
-        # Docdb format
-        from epo_ops_mcp_server.models import DocdbInput
-        validated_input = DocdbInput(**input_data)
-        input_model = Docdb(
-            number=validated_input.number,
-            country_code=validated_input.country_code,
-            kind_code=validated_input.kind_code,
-            date=validated_input.date
-        )
-    else:
-        # Epodoc format
-        from epo_ops_mcp_server.models import EpodocInput
-        validated_input = EpodocInput(**input_data)
-        input_model = Epodoc(
-            number=validated_input.number,
-            kind_code=validated_input.kind_code,
-            date=validated_input.date
-        )
+    with phase("validate"):
+        if input_data.get("country_code") and input_data.get("number") and not input_data.get("kind_code"):
+            # Country and number only: send the combined number in epodoc format
+            input_data = dict(input_data, number=input_data["country_code"] + input_data["number"], country_code=None)
+
+        if input_data.get("country_code"):
+            # Docdb format
+            validated_input = DocdbInput(**input_data)
+            try:
+                number = normalize_number(
+                    validated_input.number, validated_input.country_code, validated_input.kind_code,
+                    reference_type=reference_type,
+                ).number
+            except AmbiguousNumber:
+                number = validated_input.number
+            input_model = epo_ops.models.Docdb(
+                number=number,
+                country_code=validated_input.country_code,
+                kind_code=validated_input.kind_code,
+                date=validated_input.date
+            )
+        else:
+            # Epodoc format
+            validated_input = EpodocInput(**input_data)
+            number, kind_code = validated_input.number, validated_input.kind_code
+            try:
+                document = normalize_number(number, kind=kind_code, reference_type=reference_type)
+                number, kind_code = document.epodoc, document.kind
+            except AmbiguousNumber:
+                pass
+            input_model = epo_ops.models.Epodoc(
+                number=number,
+                kind_code=kind_code,
+                date=validated_input.date
+            )
     
     return input_model
 
 @mcp.tool()
-def get_published_data(
+@timed
+async def get_published_data(
     reference_type: str,
     input_data: dict,
-    endpoint: str = "biblio"
+    endpoint: str = "biblio",
+    include_raw: bool = True,
+    fields: list = None,
+    max_claims: int = None,
+    max_chars: int = None,
+    offset: int = 0,
+    limit: int = None
 ):
 
     """
@@ -87,28 +177,118 @@ def get_published_data(
                     Common values include:
                     `"biblio"`, `"abstract"`, `"claims"`, `"description"`, `"fulltext"`, `"images"`.
 
+            include_raw: Also return the raw XML under `raw`. Set to `false` to receive only
+                         the parsed structure under `data`, which is far smaller.
+
+            fields: Only return these fields of each parsed record, e.g. `["titles", "abstracts"]`
+                    or `["claims"]`. Identity fields (country, number, kind, ...) are always kept.
+            max_claims: Return at most this many claims.
+            max_chars: Cap each text section (abstract, claims, description) at this many characters.
+            offset: Index of the first description paragraph to return. Use the returned
+                    `next_offset` to page through long descriptions.
+            limit: Maximum number of description paragraphs to return.
+
+            Setting any of `fields`, `max_claims`, `max_chars`, `offset` or `limit` applies the
+            limits while the response is parsed and omits `raw`. For `"description"` and
+            `"fulltext"` the parsed document reports `claims_total`, `description_total`,
+            `next_offset` and `truncated`.
+
         Returns:
-            A formatted response from the EPO OPS API containing the requested section of the patent document.
+            A formatted response from the EPO OPS API containing the requested section of the patent document,
+            parsed into compact JSON under `data`.
     """
 
-    client = get_epo_client()
+    client = get_async_epo_client()
     
-    input_model = validate_pat_number(input_data)
+    input_model = validate_pat_number(input_data, reference_type)
     
-    response = client.published_data(
+    response = await client.published_data(
         reference_type=reference_type,
         input=input_model,
         endpoint=endpoint,
     )
     
-    return format_response(response.text, response.headers.get('content-type', ''))
+    projection = Projection.from_args(fields, max_claims, max_chars, offset, limit)
+    return format_response(
+        response.content,
+        response.headers.get('content-type', ''),
+        include_raw=include_raw,
+        projection=projection,
+    )
 
 @mcp.tool()
-def search_published_data(
+@timed
+async def get_published_data_batch(
+    reference_type: str,
+    input_data_list: list,
+    endpoint: str = "biblio",
+    constituents: list = None,
+    include_raw: bool = True,
+    fields: list = None,
+    max_claims: int = None,
+    max_chars: int = None
+):
+    """
+        Retrieve published data for many patents in one call.
+
+        Numbers are sent to EPO OPS in multi-number requests of up to 100 documents
+        (for `"biblio"` and `"abstract"` publication lookups; other endpoints are
+        fetched one number per request), with several requests running concurrently.
+        Prefer this tool over repeated `get_published_data` calls.
+
+        Args:
+            reference_type: `"publication"`, `"application"`, or `"priority"`.
+            input_data_list: List of patent numbers, each in **docdb** or **epodoc**
+                             format exactly as for `get_published_data`, e.g.
+                             `[{"number": "EP1000000"}, {"country_code": "WO", "number": "2025158691", "kind_code": "A1"}]`
+            endpoint: `"biblio"`, `"abstract"`, `"claims"`, `"description"` or `"fulltext"`.
+            constituents: Optional constituents for `"biblio"`, e.g. `["abstract"]`.
+            include_raw: Also return each document's raw XML. Set to `false` for parsed data only.
+            fields: Only return these fields of each parsed record (see `get_published_data`).
+            max_claims: Return at most this many claims per document.
+            max_chars: Cap each text section of each document at this many characters.
+
+        Returns:
+            A list aligned with `input_data_list`. Each item has `input`, `status`
+            (`"ok"` or `"error"`), and either `response` or `error`, so one bad number
+            does not fail the batch.
+    """
+    client = get_async_epo_client()
+
+    results = [None] * len(input_data_list)
+    valid_indexes = []
+    input_models = []
+    for index, input_data in enumerate(input_data_list):
+        try:
+            input_models.append(validate_pat_number(input_data, reference_type))
+            valid_indexes.append(index)
+        except Exception as e:
+            results[index] = {"input": input_data, "status": "error", "error": str(e)}
+
+    fetched = await fetch_published_data_batch(
+        client,
+        reference_type=reference_type,
+        input_models=input_models,
+        endpoint=endpoint,
+        constituents=constituents,
+        include_raw=include_raw,
+        projection=Projection.from_args(fields, max_claims, max_chars),
+    )
+    for index, result in zip(valid_indexes, fetched):
+        results[index] = {"input": input_data_list[index], **result}
+
+    return results
+
+@mcp.tool()
+@timed
+async def search_published_data(
     cql: str,
     range_begin: int = 1,
     range_end: int = 25,
-    constituents: list = None
+    constituents: list = None,
+    include_raw: bool = True,
+    auto_paginate: bool = False,
+    ctx: Context = None
 ):
     """
     
@@ -120,26 +300,117 @@ def search_published_data(
         range_begin: Start of result range
         range_end: End of result range, maxminum is 1000.
         constituents: List of data constituents to retrieve. Must be one of "full-cycle", "abstract".
+        include_raw: Also return the raw XML under `raw`; `false` returns only the parsed `data`.
+        auto_paginate: Fetch the whole range (up to 2000 results) in pages of 100,
+                       merged and de-duplicated under `data`. Progress and partial
+                       hits are streamed while pages arrive; `raw` is never included.
         
     Returns:
         Formatted response from EPO OPS API
     """
-    client = get_epo_client()
+    client = get_async_epo_client()
+    
+    if auto_paginate:
+        return await paginated_search(
+            client.published_data_search, cql, range_begin, range_end, ctx, constituents=constituents
+        )
     
-    response = client.published_data_search(
+    response = await client.published_data_search(
         cql=cql,
         range_begin=range_begin,
         range_end=range_end,
         constituents=constituents
     )
     
-    return format_response(response.text, response.headers.get('content-type', ''))
+    return format_response(response.content, response.headers.get('content-type', ''), include_raw=include_raw)
+
+async def paginated_search(search, cql, range_begin, range_end, ctx=None, **kwargs):
+    '''
+        Run a search over range_begin..range_end in OPS-sized pages.
+        Progress and each page's new hits are streamed to the client through ctx.
+    '''
+
+    async def fetch_page(begin, end):
+        response = await search(cql=cql, range_begin=begin, range_end=end, **kwargs)
+        with phase("parse"):
+            return parse_ops_xml(response.content)
+
+    async def on_page(done, total, new_items):
+        if ctx is None:
+            return
+        await ctx.report_progress(done, total, "Fetched page {0} of {1}".format(done, total))
+        if new_items:
+            await ctx.log(json.dumps(new_items), level="info", logger_name="search.partial")
+
+    return {"data": await paginate(fetch_page, range_begin, range_end, on_page=on_page)}
 
 @mcp.tool()
-def get_family(
+@timed
+async def export_search(
+    cql: str,
+    name: str = None,
+    output_format: str = "jsonl",
+    include_claims: bool = True,
+    max_results: int = 2000,
+    restart: bool = False,
+    ctx: Context = None
+):
+    """
+        Export the bibliographic data, abstract and claims of every hit of a search to a local file.
+
+        Use this instead of `search_published_data` plus `get_published_data` calls when
+        all documents of a result set are needed (e.g. landscaping): documents are
+        fetched and written page by page on the server and only a summary is returned.
+        Calling again with the same arguments resumes an interrupted export.
+
+        Args:
+            cql: CQL search query, as for `search_published_data`.
+            name: Output file name (default: derived from the query). Files are written
+                  to the server's export directory.
+            output_format: `"jsonl"` (one JSON record per line) or `"parquet"` (a directory
+                           of Parquet part files; requires pyarrow on the server).
+            include_claims: Also fetch each document's claims (one request per document).
+            max_results: Export at most this many hits (OPS returns at most 2000).
+            restart: Start over instead of resuming.
+
+        Returns:
+            `path`, `format`, `total` hits, `exported` records, `failed` (records with a
+            fetch error, listed in their `errors` column), `bytes`, `complete`, `resumed`.
+            Each record has `id`, `country`, `number`, `kind`, `family_id`,
+            `publication_date`, `title`, `abstract`, `applicants`, `inventors`, `ipc`,
+            `cpc`, `claims` and `errors`.
+    """
+    client = get_async_epo_client()
+
+    if name is None:
+        name = "search-{0}".format(hashlib.sha256(cql.strip().encode("utf-8")).hexdigest()[:12])
+    if os.path.basename(name) != name or name.startswith("."):
+        raise ValueError("name must be a plain file name")
+    if output_format == "jsonl" and not name.endswith(".jsonl"):
+        name += ".jsonl"
+
+    async def on_progress(exported, total):
+        if ctx is not None:
+            await ctx.report_progress(exported, total, "Exported {0} documents".format(exported))
+
+    return await export_search_results(
+        client,
+        cql,
+        os.path.join(settings.EXPORT_DIR, name),
+        output_format=output_format,
+        include_claims=include_claims,
+        max_results=max_results,
+        restart=restart,
+        on_progress=on_progress,
+    )
+
+@mcp.tool()
+@timed
+async def get_family(
     reference_type: str,
     input_data: dict,
-    endpoint=None
+    endpoint=None,
+    include_raw: bool = True
 ):
     """
     Retrieve patent family data.
@@ -172,26 +443,134 @@ def get_family(
                         - In **docdb**, all three fields are mandatory.
                         - In **epodoc**, the `number` must be a complete string including country code, number, and kind (e.g., "WO2025158691").
         constituents: List of data constituents to retrieve
+        include_raw: Also return the raw XML under `raw`; `false` returns only the parsed `data`.
         
     Returns:
         Formatted response from EPO OPS API
     """
-    client = get_epo_client()
+    client = get_async_epo_client()
     
-    input_model = validate_pat_number(input_data)
+    input_model = validate_pat_number(input_data, reference_type)
     
-    response = client.family(
+    response = await client.family(
         reference_type=reference_type,
         input=input_model,
         endpoint=endpoint
     )
     
-    return format_response(response.text, response.headers.get('content-type', ''))
+    result = format_response(response.content, response.headers.get('content-type', ''), include_raw=include_raw)
+    if result.get("data", {}).get("family_members"):
+        # Later expand_family calls for any member are answered from the index
+        await asyncio.to_thread(get_family_index().store_parsed, result["data"])
+    return result
+
+@mcp.tool()
+@timed
+async def expand_family(
+    input_data: dict,
+    endpoint: str = "biblio",
+    include_raw: bool = False,
+    fields: list = None,
+    max_chars: int = None,
+    refresh: bool = False
+):
+    """
+        Retrieve a patent family together with the data of every member in one call.
+
+        Replaces a `get_family` call followed by one `get_published_data` call per
+        member: the members are fetched in multi-number requests running concurrently.
+        Families already seen (by this tool or `get_family`) are remembered, so
+        expanding any other member of the same family needs no family lookup.
+
+        Args:
+            input_data: Publication number of any family member, in **docdb** or
+                        **epodoc** format exactly as for `get_family`, e.g.
+                        `{"number": "EP1000000"}`.
+            endpoint: `"biblio"` (default) or `"abstract"` for each member.
+            include_raw: Also return each member's raw XML.
+            fields: Only return these fields of each parsed record (see `get_published_data`).
+            max_chars: Cap each text section of each member at this many characters.
+            refresh: Ask OPS for the family even if it is already known.
+
+        Returns:
+            `family_id`, `source` (`"index"` or `"ops"`) and `members`: for every
+            member its `publication`, `application` and `priorities` numbers,
+            `status` (`"ok"` or `"error"`), and either `response` or `error`.
+    """
+    client = get_async_epo_client()
+
+    input_model = validate_pat_number(input_data)
+
+    return await expand_family_members(
+        client,
+        input_model,
+        endpoint=endpoint,
+        include_raw=include_raw,
+        projection=Projection.from_args(fields, None, max_chars),
+        refresh=refresh,
+    )
+
+@mcp.tool()
+@timed
+async def crawl_citations(
+    input_data_list: list,
+    depth: int = 1,
+    direction: str = "backward",
+    fan_out: int = 25,
+    max_nodes: int = 500,
+    restart: bool = False,
+    ctx: Context = None
+):
+    """
+        Walk the citation graph breadth-first from seed publications.
+
+        Replaces chains of `get_published_data` and `search_published_data` calls for
+        prior-art work: the server follows citations hop by hop, fetching each level in
+        bulk, and returns only the graph. Documents are identified by canonical number
+        (e.g. `EP1000000`), so kinds and spellings of one publication are one node.
+        An interrupted crawl resumes where it stopped when called again with the same
+        arguments.
+
+        Args:
+            input_data_list: Seed publication numbers in **docdb** or **epodoc** format,
+                             e.g. `[{"number": "EP1000000"}]`.
+            depth: Hops from the seeds (1 = their direct citations).
+            direction: `"backward"` (documents cited by each node), `"forward"`
+                       (documents citing it) or `"both"`.
+            fan_out: Maximum citations followed per node and direction (max 100 forward).
+            max_nodes: Stop adding documents beyond this many.
+            restart: Start over instead of resuming a previous run of the same crawl.
+
+        Returns:
+            `crawl_id`, `complete`, `resumed`, `truncated` (`max_nodes` reached),
+            `nodes` (`id`, `country`, `number`, `kind`, `depth`), `edges` as
+            `[citing, cited]` pairs of node IDs, and `errors` by node ID.
+    """
+    client = get_async_epo_client()
+
+    seeds = [seed_node(validate_pat_number(input_data)) for input_data in input_data_list]
+
+    async def on_progress(expanded, known):
+        if ctx is not None:
+            await ctx.report_progress(expanded, known, "Expanded {0} of {1} documents".format(expanded, known))
+
+    return await crawl_citation_graph(
+        client,
+        seeds,
+        depth=depth,
+        direction=direction,
+        fan_out=fan_out,
+        max_nodes=max_nodes,
+        restart=restart,
+        on_progress=on_progress,
+    )
 
 @mcp.tool()
-def get_legal(
+@timed
+async def get_legal(
     reference_type: str,
-    input_data: dict
+    input_data: dict,
+    include_raw: bool = True
 ):
     """
     Retrieve legal status information.
@@ -223,26 +602,73 @@ def get_legal(
                         - You must use **either** docdb **or** epodoc format, not both.
                         - In **docdb**, all three fields are mandatory.
                         - In **epodoc**, the `number` must be a complete string including country code, number, and kind (e.g., "WO2025158691").
+        include_raw: Also return the raw XML under `raw`; `false` returns only the parsed `data`.
         
     Returns:
         Formatted response from EPO OPS API
     """
-    client = get_epo_client()
+    client = get_async_epo_client()
     
-    input_model = validate_pat_number(input_data)
+    input_model = validate_pat_number(input_data, reference_type)
     
-    response = client.legal(
+    response = await client.legal(
         reference_type=reference_type,
         input=input_model
     )
     
-    return format_response(response.text, response.headers.get('content-type', ''))
+    return format_response(response.content, response.headers.get('content-type', ''), include_raw=include_raw)
 
 @mcp.tool()
-def get_register(
+@timed
+async def convert_number(
+    reference_type: str,
+    input_data,
+    output_format: str = "docdb",
+    use_ops: bool = True
+):
+    """
+        Convert patent numbers between original, epodoc and docdb formats.
+
+        Publication numbers of the major offices (EP, WO, US, JP, KR, CN, DE, GB, FR,
+        CA, AU, CH, ES) are converted locally and instantly, however they are written
+        ("EP 1 000 000 A1", "US 2020/0123456 A1", "KR 10-2020-0012345 A"). Other numbers
+        go to the EPO OPS number service. Thousands of numbers can be converted in one call.
+
+        Args:
+            reference_type: `"publication"`, `"application"`, or `"priority"`.
+            input_data: One number or a list of numbers. Each is either a string such as
+                        `"EP 1000000 A1"`, or an object with `number` and optional
+                        `country_code`, `kind_code` and `date`, e.g.
+                        `{"country_code": "US", "number": "2020/0123456", "kind_code": "A1"}`.
+            output_format: `"docdb"` (default), `"epodoc"` or `"original"`.
+            use_ops: Ask OPS for numbers that cannot be converted locally. Set to `false`
+                     to report those as errors without using quota.
+
+        Returns:
+            For a single number, one result; for a list, a list aligned with it. Each
+            result has `status` (`"ok"` or `"error"`); converted numbers have `source`
+            (`"local"` or `"ops"`), `country`, `number` and `kind`.
+    """
+    client = get_async_epo_client()
+
+    items = input_data if isinstance(input_data, list) else [input_data]
+    results = await convert_numbers(
+        client,
+        reference_type=reference_type,
+        items=items,
+        output_format=output_format,
+        use_ops=use_ops,
+    )
+    results = [{"input": item, **result} for item, result in zip(items, results)]
+    return results if isinstance(input_data, list) else results[0]
+
+@mcp.tool()
+@timed
+async def get_register(
     reference_type: str,
     input_data: dict,
-    constituents: list = None
+    constituents: list = None,
+    include_raw: bool = True
 ):
     """
     Retrieve European Patent Register data.
@@ -251,34 +677,39 @@ def get_register(
         reference_type: "publication", "application", or "priority"
         input_data: Dictionary with patent number information (Epodoc format only)
         constituents: List of data constituents to retrieve
+        include_raw: Also return the raw XML under `raw`; `false` returns only the parsed `data`.
         
     Returns:
         Formatted response from EPO OPS API
     """
-    client = get_epo_client()
+    client = get_async_epo_client()
     
     # Register only accepts Epodoc format
-    from epo_ops_mcp_server.models import EpodocInput
-    validated_input = EpodocInput(**input_data)
-    input_model = Epodoc(
-        number=validated_input.number,
-        kind_code=validated_input.kind_code,
-        date=validated_input.date
-    )
+    with phase("validate"):
+        validated_input = EpodocInput(**input_data)
+        input_model = epo_ops.models.Epodoc(
+            number=validated_input.number,
+            kind_code=validated_input.kind_code,
+            date=validated_input.date
+        )
     
-    response = client.register(
+    response = await client.register(
         reference_type=reference_type,
         input=input_model,
         constituents=constituents
     )
     
-    return format_response(response.text, response.headers.get('content-type', ''))
+    return format_response(response.content, response.headers.get('content-type', ''), include_raw=include_raw)
 
 @mcp.tool()
-def search_register(
+@timed
+async def search_register(
     cql: str,
     range_begin: int = 1,
-    range_end: int = 25
+    range_end: int = 25,
+    include_raw: bool = True,
+    auto_paginate: bool = False,
+    ctx: Context = None
 ):
     """
     Search European Patent Register.
@@ -287,48 +718,153 @@ def search_register(
         cql: CQL search query
         range_begin: Start of result range
         range_end: End of result range
+        include_raw: Also return the raw XML under `raw`; `false` returns only the parsed `data`.
+        auto_paginate: Fetch the whole range (up to 2000 results) in pages of 100,
+                       merged and de-duplicated under `data`. Progress and partial
+                       results are streamed while pages arrive; `raw` is never included.
         
     Returns:
         Formatted response from EPO OPS API
     """
-    client = get_epo_client()
+    client = get_async_epo_client()
     
-    response = client.register_search(
+    if auto_paginate:
+        return await paginated_search(client.register_search, cql, range_begin, range_end, ctx)
+    
+    response = await client.register_search(
         cql=cql,
         range_begin=range_begin,
         range_end=range_end
     )
     
-    return format_response(response.text, response.headers.get('content-type', ''))
+    return format_response(response.content, response.headers.get('content-type', ''), include_raw=include_raw)
 
 @mcp.tool()
-def get_image(
+@timed
+async def get_image(
     path: str,
     range_val: int = 1,
-    document_format: str = "application/tiff"
+    document_format: str = "application/tiff",
+    pages: str = None,
+    convert: str = None,
+    output: str = "auto"
 ):
     """
     Retrieve patent images.
     
     Args:
-        path: Image path
-        range_val: Range parameter
-        document_format: Document format
+        path: Image path, e.g. "published-data/images/EP/1000000/A1/fullimage"
+              (the `link` of an image listed by get_published_data with endpoint "images")
+        range_val: Page to retrieve when `pages` is not given
+        document_format: Document format, e.g. "application/tiff" or "application/pdf"
+        pages: Page selection such as "1-3,5"; pages are fetched concurrently.
+               The page count of each image is listed by the images endpoint.
+        convert: "png" to convert pages to PNG, "thumbnail" for small PNG previews
+        output: "base64" returns page bytes inline, "resource" returns only
+                `ops-image://` resource URIs to read the pages from, "auto" inlines
+                pages up to IMAGE_INLINE_MAX_BYTES and references larger ones.
         
     Returns:
-        Formatted response from EPO OPS API
+        One entry per page with its MIME type, size, resource URI and, if inlined,
+        base64 `data`; failed pages carry `error` instead.
     """
-    client = get_epo_client()
+    if output not in ("auto", "base64", "resource"):
+        raise ValueError('output must be one of "auto", "base64", "resource"')
+    client = get_async_epo_client()
     
-    response = client.image(
+    results = await fetch_image_pages(
+        client,
         path=path,
-        range=range_val,
-        document_format=document_format
+        pages=parse_pages(pages if pages is not None else str(range_val)),
+        document_format=document_format,
+        convert=convert,
     )
     
-    # For images, we might want to return the content differently
-    return format_response(response.text, response.headers.get('content-type', ''))
+    items = []
+    for result in results:
+        if result["status"] != "ok":
+            items.append({"page": result["page"], "error": result["error"]})
+            continue
+        image = result["image"]
+        item = {
+            "page": image.page,
+            "mime_type": image.mime_type,
+            "size": len(image.data),
+            "uri": "ops-image://{0}".format(image.name),
+        }
+        if output == "base64" or (output == "auto" and len(image.data) <= settings.IMAGE_INLINE_MAX_BYTES):
+            item["data"] = base64.b64encode(image.data).decode("ascii")
+        items.append(item)
+    
+    return {"path": path, "pages": items}
+
+@mcp.resource("ops-image://{name}", mime_type="application/octet-stream")
+async def ops_image(name: str) -> bytes:
+    """
+    An image page fetched earlier by get_image; the name extension gives the
+    format (tiff, pdf or png).
+    """
+    data = await asyncio.to_thread(get_image_store().get, name)
+    if data is None:
+        raise ValueError("Unknown image: {0}".format(name))
+    return data
+
+@mcp.resource("ops://stats")
+def ops_stats() -> dict:
+    """
+    Client-side counters: coalesced vs upstream requests, cache hits and
+    misses, and the current OPS throttling state.
+    """
+    return get_async_epo_client().stats()
+
+@mcp.resource("ops://metrics")
+def ops_metrics() -> dict:
+    """
+    Latency histograms per tool and phase (validate, throttle, upstream, parse,
+    serialize, local) with p50/p95/p99 estimates, response sizes and error
+    counts, plus per-service upstream latency.
+    """
+    return metrics.summary()
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request):
+    """Prometheus scrape endpoint (HTTP transports only)."""
+    text = metrics.render_prometheus(get_async_epo_client().gauges())
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+def create_http_app():
+    """
+    Streamable HTTP app for one worker process (see ``serve``).
+
+    Sessions are stateless, so any worker can answer any request, and the OPS
+    client lives as long as the app rather than a session.
+    """
+    app = mcp.http_app(stateless_http=True)
+    sessions = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def app_lifespan(app):
+        async with lifespan(mcp), sessions(app):
+            yield
+
+    app.router.lifespan_context = app_lifespan
+    return app
+
+def serve():
+    """Run over stdio, or over HTTP from ``SERVER_WORKERS`` processes."""
+    if settings.SERVER_WORKERS > 1:
+        import uvicorn
+
+        uvicorn.run(
+            "main:create_http_app",
+            factory=True,
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            workers=settings.SERVER_WORKERS,
+        )
+    else:
+        mcp.run()
 
 if __name__ == "__main__":
     # Run the server
-    mcp.run()
\ No newline at end of file
+    serve()
\ No newline at end of file
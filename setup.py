@@ -29,6 +29,7 @@ setup(
         "python-epo-ops-client",
         "dogpile.cache",
         "pydantic-settings",
+        "httpx",
     ],
     extras_require={
         "dev": [
@@ -36,6 +37,15 @@ setup(
             "black>=21.0",
             "flake8>=3.0",
         ],
+        "images": [
+            "Pillow",
+        ],
+        "parquet": [
+            "pyarrow",
+        ],
+        "zstd": [
+            "zstandard",
+        ],
         "test": [
             "pytest>=6.0",
             "pytest-cov>=2.0",
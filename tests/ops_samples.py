@@ -0,0 +1,187 @@
+"""
+Sample EPO OPS XML responses used by the tests
+"""
+
+BIBLIO = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data xmlns="http://www.epo.org/exchange" xmlns:ops="http://ops.epo.org">
+  <exchange-documents>
+    <exchange-document system="ops.epo.org" family-id="19768124" country="EP" doc-number="1000000" kind="A1">
+      <bibliographic-data>
+        <publication-reference>
+          <document-id document-id-type="docdb">
+            <country>EP</country><doc-number>1000000</doc-number><kind>A1</kind><date>20000517</date>
+          </document-id>
+          <document-id document-id-type="epodoc"><doc-number>EP1000000</doc-number><date>20000517</date></document-id>
+        </publication-reference>
+        <classifications-ipcr>
+          <classification-ipcr sequence="1"><text>B65G  49/    07            A I</text></classification-ipcr>
+        </classifications-ipcr>
+        <patent-classifications>
+          <patent-classification sequence="1">
+            <classification-scheme office="EP" scheme="CPCI"/>
+            <section>B</section><class>65</class><subclass>G</subclass><main-group>49</main-group><subgroup>068</subgroup>
+          </patent-classification>
+        </patent-classifications>
+        <application-reference doc-id="17775323">
+          <document-id document-id-type="docdb">
+            <country>EP</country><doc-number>99203729</doc-number><kind>A</kind><date>19991108</date>
+          </document-id>
+        </application-reference>
+        <priority-claims>
+          <priority-claim sequence="1" kind="national">
+            <document-id document-id-type="docdb">
+              <country>NL</country><doc-number>1010536</doc-number><kind>A</kind><date>19981112</date>
+            </document-id>
+          </priority-claim>
+        </priority-claims>
+        <parties>
+          <applicants>
+            <applicant sequence="1" data-format="epodoc"><applicant-name><name>SPEED FAM CO LTD [JP]</name></applicant-name></applicant>
+            <applicant sequence="1" data-format="original"><applicant-name><name>SpeedFam Co., Ltd.</name></applicant-name></applicant>
+          </applicants>
+          <inventors>
+            <inventor sequence="1" data-format="epodoc"><inventor-name><name>ZWEERS JOHANNES [NL]</name></inventor-name></inventor>
+          </inventors>
+        </parties>
+        <invention-title lang="de">Vorrichtung zum Trocknen von Scheiben</invention-title>
+        <invention-title lang="en">Apparatus for manufacturing green bricks</invention-title>
+        <references-cited>
+          <citation cited-phase="search" sequence="1">
+            <patcit num="1">
+              <document-id document-id-type="docdb">
+                <country>US</country><doc-number>4211594</doc-number><kind>A</kind>
+              </document-id>
+            </patcit>
+          </citation>
+        </references-cited>
+      </bibliographic-data>
+      <abstract lang="en"><p>The invention relates to a method for manufacturing green bricks.</p></abstract>
+    </exchange-document>
+  </exchange-documents>
+</ops:world-patent-data>
+"""
+
+SEARCH = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data xmlns="http://www.epo.org/exchange" xmlns:ops="http://ops.epo.org">
+  <ops:biblio-search total-result-count="2317">
+    <ops:query syntax="CQL">ti=plastic</ops:query>
+    <ops:range begin="1" end="2"/>
+    <ops:search-result>
+      <ops:publication-reference system="ops.epo.org" family-id="70000001" logical-doc-id="1">
+        <document-id document-id-type="docdb"><country>CN</country><doc-number>110000001</doc-number><kind>A</kind></document-id>
+      </ops:publication-reference>
+      <ops:publication-reference system="ops.epo.org" family-id="70000002" logical-doc-id="2">
+        <document-id document-id-type="docdb"><country>US</country><doc-number>2019000002</doc-number><kind>A1</kind></document-id>
+      </ops:publication-reference>
+    </ops:search-result>
+  </ops:biblio-search>
+</ops:world-patent-data>
+"""
+
+FAMILY_LEGAL = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data xmlns="http://www.epo.org/exchange" xmlns:ops="http://ops.epo.org">
+  <ops:patent-family family-id="19768124" total-result-count="2">
+    <ops:family-member family-id="19768124">
+      <publication-reference>
+        <document-id document-id-type="docdb"><country>EP</country><doc-number>1000000</doc-number><kind>A1</kind><date>20000517</date></document-id>
+      </publication-reference>
+      <application-reference>
+        <document-id document-id-type="docdb"><country>EP</country><doc-number>99203729</doc-number><kind>A</kind></document-id>
+      </application-reference>
+      <priority-claim kind="national" sequence="1">
+        <document-id document-id-type="docdb"><country>NL</country><doc-number>1010536</doc-number><kind>A</kind></document-id>
+      </priority-claim>
+      <ops:legal code="AK" desc="DESIGNATED CONTRACTING STATES:" infl="+">
+        <ops:pre>AK  20000517  EP  A1</ops:pre>
+        <ops:L001EP>EP</ops:L001EP>
+        <ops:L007EP>20000517</ops:L007EP>
+        <ops:L500EP>AT BE CH</ops:L500EP>
+      </ops:legal>
+    </ops:family-member>
+    <ops:family-member family-id="19768124">
+      <publication-reference>
+        <document-id document-id-type="docdb"><country>NL</country><doc-number>1010536</doc-number><kind>C2</kind></document-id>
+      </publication-reference>
+    </ops:family-member>
+  </ops:patent-family>
+</ops:world-patent-data>
+"""
+
+REGISTER = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data xmlns:ops="http://ops.epo.org" xmlns:reg="http://www.epo.org/register">
+  <reg:register-documents>
+    <reg:register-document>
+      <reg:bibliographic-data>
+        <reg:publication-reference>
+          <reg:document-id><reg:country>EP</reg:country><reg:doc-number>1000000</reg:doc-number><reg:kind>A1</reg:kind></reg:document-id>
+        </reg:publication-reference>
+        <reg:application-reference>
+          <reg:document-id><reg:country>EP</reg:country><reg:doc-number>99203729</reg:doc-number><reg:date>19991108</reg:date></reg:document-id>
+        </reg:application-reference>
+        <reg:parties>
+          <reg:applicants>
+            <reg:applicant><reg:addressbook><reg:name>SpeedFam Co., Ltd.</reg:name></reg:addressbook></reg:applicant>
+          </reg:applicants>
+        </reg:parties>
+        <reg:designation-of-states>
+          <reg:designation-pct><reg:regional><reg:country>DE</reg:country><reg:country>FR</reg:country></reg:regional></reg:designation-pct>
+        </reg:designation-of-states>
+        <reg:invention-title lang="en">Apparatus for manufacturing green bricks</reg:invention-title>
+      </reg:bibliographic-data>
+      <reg:ep-patent-statuses>
+        <reg:ep-patent-status status-code="7">The application is deemed to be withdrawn</reg:ep-patent-status>
+      </reg:ep-patent-statuses>
+      <reg:events-data>
+        <reg:dossier-event>
+          <reg:event-date><reg:date>20020122</reg:date></reg:event-date>
+          <reg:event-code>0009199EPPU</reg:event-code>
+          <reg:event-text>Application deemed to be withdrawn</reg:event-text>
+        </reg:dossier-event>
+      </reg:events-data>
+    </reg:register-document>
+  </reg:register-documents>
+</ops:world-patent-data>
+"""
+
+FULLTEXT = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data xmlns="http://www.epo.org/fulltext" xmlns:ops="http://ops.epo.org">
+  <ftxt:fulltext-documents xmlns:ftxt="http://www.epo.org/fulltext">
+    <ftxt:fulltext-document system="ops.epo.org" fulltext-format="text-only">
+      <bibliographic-data>
+        <publication-reference data-format="docdb">
+          <document-id><country>EP</country><doc-number>1000000</doc-number><kind>A1</kind></document-id>
+        </publication-reference>
+      </bibliographic-data>
+      <claims lang="EN">
+        <claim><claim-text>1. Apparatus for manufacturing green bricks.</claim-text>
+        <claim-text>2. Apparatus according to claim 1, comprising a mould.</claim-text></claim>
+      </claims>
+      <description lang="EN">
+        <p>The invention relates to an apparatus.</p>
+        <p>Such apparatus is known.</p>
+        <p>The object of the invention is improvement.</p>
+      </description>
+    </ftxt:fulltext-document>
+  </ftxt:fulltext-documents>
+</ops:world-patent-data>
+"""
+
+IMAGES = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data xmlns="http://www.epo.org/exchange" xmlns:ops="http://ops.epo.org">
+  <ops:document-inquiry>
+    <ops:inquiry-result>
+      <ops:document-instance system="ops.epo.org" number-of-pages="2" desc="Drawing" link="published-data/images/EP/1000000/A1/thumbnail">
+        <ops:document-format-options>
+          <ops:document-format>application/tiff</ops:document-format>
+          <ops:document-format>application/pdf</ops:document-format>
+        </ops:document-format-options>
+      </ops:document-instance>
+      <ops:document-instance system="ops.epo.org" number-of-pages="7" desc="FullDocument" link="published-data/images/EP/1000000/A1/fullimage">
+        <ops:document-format-options>
+          <ops:document-format>application/pdf</ops:document-format>
+        </ops:document-format-options>
+      </ops:document-instance>
+    </ops:inquiry-result>
+  </ops:document-inquiry>
+</ops:world-patent-data>
+"""
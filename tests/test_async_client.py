@@ -0,0 +1,119 @@
+"""
+Test cases for the asyncio EPO OPS client
+"""
+import asyncio
+import json
+import unittest
+
+import httpx
+from epo_ops.exceptions import IndividualQuotaPerHourExceeded
+from epo_ops.models import Docdb, Epodoc
+
+from epo_ops_mcp_server.services.epo_client import AsyncEpoClient
+from epo_ops_mcp_server.services.resilience import RetryPolicy
+
+TOKEN_BODY = json.dumps({"access_token": "token", "expires_in": "1199"})
+
+
+def make_client(handler):
+    """Build a client whose requests are answered by ``handler``."""
+    def dispatch(request):
+        if request.url.path.endswith("/auth/accesstoken"):
+            return httpx.Response(200, text=TOKEN_BODY)
+        return handler(request)
+
+    # Failures are retried without waiting
+    return AsyncEpoClient(
+        "key", "secret", transport=httpx.MockTransport(dispatch), retry=RetryPolicy(backoff=0)
+    )
+
+
+class TestAsyncEpoClient(unittest.IsolatedAsyncioTestCase):
+
+    async def test_published_data_docdb(self):
+        """Test that Docdb input is posted like epo_ops.Client does"""
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, text="<ok/>", headers={"content-type": "application/xml"})
+
+        client = make_client(handler)
+        response = await client.published_data(
+            "publication", Docdb("2025160170", "WO", "A1"), "abstract"
+        )
+        await client.aclose()
+
+        self.assertEqual(response.text, "<ok/>")
+        self.assertTrue(
+            str(seen[0].url).endswith("/published-data/publication/docdb/abstract")
+        )
+        self.assertEqual(seen[0].content, b"(WO).(2025160170).(A1)")
+        self.assertEqual(seen[0].headers["Authorization"], "Bearer token")
+
+    async def test_family_uses_get(self):
+        """Test that family requests put the number in the URL"""
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, text="<family/>")
+
+        client = make_client(handler)
+        await client.family("publication", Epodoc("EP1000000"))
+        await client.aclose()
+
+        self.assertEqual(seen[0].method, "GET")
+        self.assertIn("/family/publication/epodoc/(EP1000000)", str(seen[0].url))
+
+    async def test_search_range_header(self):
+        """Test that search requests carry the CQL form and range header"""
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, text="<search/>")
+
+        client = make_client(handler)
+        await client.published_data_search("ti=plastic", 1, 10)
+        await client.aclose()
+
+        self.assertEqual(seen[0].headers["X-OPS-Range"], "1-10")
+        self.assertEqual(seen[0].content, b"q=ti%3Dplastic")
+
+    async def test_quota_rejection(self):
+        """Test that quota rejections raise the epo_ops exception types"""
+        def handler(request):
+            return httpx.Response(
+                403, headers={"X-Rejection-Reason": "IndividualQuotaPerHour"}
+            )
+
+        client = make_client(handler)
+        with self.assertRaises(IndividualQuotaPerHourExceeded):
+            await client.legal("publication", Epodoc("EP1000000"))
+        await client.aclose()
+
+    async def test_concurrent_calls_overlap(self):
+        """Test that concurrent calls wait on the network together"""
+        in_flight = []
+        peak = []
+
+        async def handler(request):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.05)
+            in_flight.pop()
+            return httpx.Response(200, text="<ok/>")
+
+        client = make_client(handler)
+        await asyncio.gather(*[
+            client.published_data("publication", Epodoc("EP100000%d" % i))
+            for i in range(5)
+        ])
+        await client.aclose()
+
+        self.assertEqual(max(peak), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
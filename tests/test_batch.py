@@ -0,0 +1,119 @@
+"""
+Test cases for batch published-data retrieval
+"""
+import unittest
+
+import httpx
+from epo_ops.models import Docdb, Epodoc
+
+from epo_ops_mcp_server.services.batch import fetch_published_data_batch
+from tests.test_async_client import make_client
+
+DOCUMENT = (
+    '<exchange-document country="{0}" doc-number="{1}" kind="A1"{2}>'
+    '<abstract><p>{0}{1}</p></abstract></exchange-document>'
+)
+
+
+def bulk_handler(requests_seen):
+    """Answer multi-number POSTs with one exchange-document per number."""
+    def handler(request):
+        requests_seen.append(request)
+        documents = []
+        for line in request.content.decode().split("\n"):
+            parts = [p.strip("()") for p in line.split(".")]
+            if len(parts) >= 2:
+                country, number = parts[0], parts[1]
+            else:
+                country, number = parts[0][:2], parts[0][2:]
+            status = ' status="not found"' if number.endswith("999") else ""
+            documents.append(DOCUMENT.format(country, number, status))
+        return httpx.Response(
+            200,
+            text='<world-patent-data><exchange-documents>{0}</exchange-documents></world-patent-data>'.format(
+                "".join(documents)
+            ),
+            headers={"content-type": "application/xml"},
+        )
+    return handler
+
+
+class TestBatchRetrieval(unittest.IsolatedAsyncioTestCase):
+
+    async def test_results_aligned_with_inputs(self):
+        """Test that mixed formats come back in input order"""
+        seen = []
+        client = make_client(bulk_handler(seen))
+        inputs = [
+            Epodoc("EP1000000"),
+            Docdb("2025160170", "WO", "A1"),
+            Epodoc("EP1000001"),
+        ]
+        results = await fetch_published_data_batch(client, "publication", inputs, "abstract")
+        await client.aclose()
+
+        self.assertEqual(len(seen), 2)
+        self.assertEqual([r["status"] for r in results], ["ok", "ok", "ok"])
+        self.assertIn("EP1000000", results[0]["response"]["raw"])
+        self.assertIn("WO2025160170", results[1]["response"]["raw"])
+        self.assertIn("EP1000001", results[2]["response"]["raw"])
+
+    async def test_chunking(self):
+        """Test that large lists are split into requests of at most chunk_size"""
+        seen = []
+        client = make_client(bulk_handler(seen))
+        inputs = [Epodoc("EP1%06d" % i) for i in range(250)]
+        results = await fetch_published_data_batch(client, "publication", inputs)
+        await client.aclose()
+
+        self.assertEqual(len(seen), 3)
+        self.assertTrue(all(r["status"] == "ok" for r in results))
+
+    async def test_not_found_reported_per_item(self):
+        """Test that a missing document does not fail the rest of the batch"""
+        client = make_client(bulk_handler([]))
+        inputs = [Epodoc("EP1000000"), Epodoc("EP1000999")]
+        results = await fetch_published_data_batch(client, "publication", inputs)
+        await client.aclose()
+
+        self.assertEqual(results[0]["status"], "ok")
+        self.assertEqual(results[1]["status"], "error")
+        self.assertEqual(results[1]["error"], "not found")
+
+    async def test_rejected_chunk_falls_back_to_single_requests(self):
+        """Test that a rejected POST is retried number by number"""
+        def handler(request):
+            if b"BAD" in request.content:
+                return httpx.Response(400, text="<error/>")
+            return bulk_handler([])(request)
+
+        client = make_client(handler)
+        inputs = [Epodoc("EP1000000"), Epodoc("BAD")]
+        results = await fetch_published_data_batch(client, "publication", inputs)
+        await client.aclose()
+
+        self.assertEqual(results[0]["status"], "ok")
+        self.assertEqual(results[1]["status"], "error")
+
+    async def test_failing_service_is_not_fanned_out(self):
+        """Test that a 5xx on the bulk POST fails the chunk without single requests"""
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(503, text="<fault/>")
+
+        client = make_client(handler)
+        inputs = [Epodoc("EP1000000"), Epodoc("EP1000001"), Epodoc("EP1000002")]
+        results = await fetch_published_data_batch(client, "publication", inputs)
+        await client.aclose()
+
+        self.assertEqual([r["status"] for r in results], ["error"] * 3)
+        self.assertIn("503", results[0]["error"])
+        # The bulk request and its retries only
+        self.assertEqual(len(seen), 1 + client.retry.retries)
+        self.assertTrue(all("\n" in r.content.decode() for r in seen))
+
+
+if __name__ == '__main__':
+    unittest.main()
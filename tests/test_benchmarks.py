@@ -0,0 +1,84 @@
+"""
+Test cases for the OPS stand-in server and benchmark helpers
+"""
+import unittest
+
+import httpx
+from epo_ops.models import Epodoc
+
+from benchmarks.fake_ops import FakeOpsConfig, create_app
+from benchmarks.run import compare, percentile
+from epo_ops_mcp_server.services.epo_client import AsyncEpoClient
+from epo_ops_mcp_server.services.resilience import RetryPolicy
+from epo_ops_mcp_server.utils.parser import parse_ops_xml
+
+
+class TestFakeOps(unittest.IsolatedAsyncioTestCase):
+
+    def client(self, **config):
+        app = create_app(FakeOpsConfig(seed=1, **config))
+        return AsyncEpoClient(
+            "key", "secret", transport=httpx.ASGITransport(app=app), base_url="http://fake-ops/3.2",
+            retry=RetryPolicy(backoff=0),
+        )
+
+    async def test_services(self):
+        """Test that every service the client calls gets a parseable answer"""
+        client = self.client(fulltext_paragraphs=5)
+        number = Epodoc("EP1000000")
+        try:
+            biblio = parse_ops_xml((await client.published_data("publication", number)).content)
+            self.assertEqual(biblio["documents"][0]["number"], "1000000")
+
+            fulltext = parse_ops_xml((await client.published_data("publication", number, "fulltext")).content)
+            self.assertEqual(len(fulltext["fulltext_documents"][0]["description"]), 5)
+
+            family = parse_ops_xml((await client.family("publication", number)).content)
+            self.assertEqual(family["family"]["total"], 5)
+
+            legal = parse_ops_xml((await client.legal("publication", number)).content)
+            self.assertTrue(legal["family_members"][0]["legal"])
+
+            register = parse_ops_xml((await client.register("publication", number)).content)
+            self.assertEqual(register["register_documents"][0]["publication"], "EP1000000A1")
+
+            search = parse_ops_xml((await client.published_data_search("ti=brick", 11, 20)).content)
+            self.assertEqual((search["search"]["begin"], len(search["search"]["hits"])), (11, 10))
+
+            image = await client.image("published-data/images/EP/1000000/A1/fullimage", range=2)
+            self.assertTrue(image.content.startswith(b"II*\x00"))
+        finally:
+            await client.aclose()
+        self.assertEqual(client.scheduler.snapshot()["system_status"], "idle")
+
+    async def test_errors(self):
+        """Test that configured error rates are answered with OPS-style errors"""
+        client = self.client(error_503=1.0)
+        try:
+            with self.assertRaises(httpx.HTTPStatusError) as raised:
+                await client.published_data("publication", Epodoc("EP1000000"))
+        finally:
+            await client.aclose()
+        self.assertEqual(raised.exception.response.status_code, 503)
+
+
+class TestBenchmarkReport(unittest.TestCase):
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        samples = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(samples, 0.5), 50.0)
+        self.assertEqual(percentile(samples, 0.99), 99.0)
+        self.assertEqual(percentile([3.0], 0.95), 3.0)
+
+    def test_compare(self):
+        """Test that slower p95 or lower throughput beyond the tolerance is a regression"""
+        baseline = {"stdio": {"get_family@1": {"p95_ms": 10.0, "rps": 100.0}}}
+        same = {"stdio": {"get_family@1": {"p95_ms": 11.0, "rps": 95.0}}}
+        slower = {"stdio": {"get_family@1": {"p95_ms": 20.0, "rps": 50.0}}}
+        self.assertEqual(compare(same, baseline, 0.25), [])
+        self.assertEqual(len(compare(slower, baseline, 0.25)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+"""
+Test cases for the tiered OPS response cache
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+import httpx
+from epo_ops.models import Epodoc
+
+from epo_ops_mcp_server.services.cache import (
+    CacheEntry,
+    MemoryTier,
+    ResponseCache,
+    endpoint_for_url,
+)
+from epo_ops_mcp_server.services.epo_client import AsyncEpoClient
+from epo_ops_mcp_server.utils import codec
+from epo_ops_mcp_server.utils.codec import ZlibCodec
+
+PREFIX = "https://ops.epo.org/3.2/rest-services/"
+REQUEST = httpx.Request("POST", PREFIX + "legal/publication/epodoc")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_cache(self):
+        return ResponseCache(
+            path=self.path,
+            ttls={"legal": 10},
+            stale_ttl=100,
+            clock=self.clock,
+        )
+
+    def test_endpoint_for_url(self):
+        """Test that URLs are classified for per-endpoint TTLs"""
+        self.assertEqual(endpoint_for_url(PREFIX + "published-data/publication/docdb/claims"), "claims")
+        self.assertEqual(endpoint_for_url(PREFIX + "published-data/publication/epodoc"), "biblio")
+        self.assertEqual(endpoint_for_url(PREFIX + "published-data/search/biblio"), "search")
+        self.assertEqual(endpoint_for_url(PREFIX + "register/publication/epodoc/biblio"), "register")
+        self.assertEqual(endpoint_for_url(PREFIX + "legal/publication/epodoc"), "legal")
+
+    def test_memory_tier_eviction(self):
+        """Test that the memory tier evicts least recently used entries"""
+        tier = MemoryTier(max_items=2, max_bytes=1000)
+        for key in "abc":
+            tier.put(key, CacheEntry(200, {}, b"x", 0, 1, 2))
+            if key == "b":
+                tier.get("a")
+        self.assertEqual(tier.keys(), ["a", "c"])
+
+    def test_oversized_replacement_drops_old_entry(self):
+        """Test that an entry too large for memory does not leave the old one in place"""
+        tier = MemoryTier(max_items=2, max_bytes=10)
+        tier.put("k", CacheEntry(200, {}, b"old", 0, 1, 2))
+        tier.put("k", CacheEntry(200, {}, b"x" * 11, 0, 1, 2))
+        self.assertIsNone(tier.get("k"))
+        self.assertEqual(tier.bytes, 0)
+
+    async def test_fresh_hit_skips_loader(self):
+        """Test that a fresh entry is served without calling upstream"""
+        cache = self.make_cache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return httpx.Response(200, text="<legal/>", request=REQUEST)
+
+        await cache.fetch("k", REQUEST, loader)
+        response = await cache.fetch("k", REQUEST, loader)
+        await cache.aclose()
+
+        self.assertEqual(response.text, "<legal/>")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats["memory_hits"], 1)
+
+    async def test_stale_while_revalidate(self):
+        """Test that stale entries are served while refreshing in the background"""
+        cache = self.make_cache()
+        versions = iter(["<v1/>", "<v2/>"])
+
+        async def loader():
+            return httpx.Response(200, text=next(versions), request=REQUEST)
+
+        await cache.fetch("k", REQUEST, loader)
+        self.clock.now += 50
+        stale = await cache.fetch("k", REQUEST, loader)
+        self.assertEqual(stale.text, "<v1/>")
+
+        await asyncio.gather(*cache._refreshing.values())
+        fresh = await cache.fetch("k", REQUEST, loader)
+        await cache.aclose()
+
+        self.assertEqual(fresh.text, "<v2/>")
+        self.assertEqual(cache.stats["refreshes"], 1)
+
+    async def test_not_modified_renews_entry(self):
+        """Test that an expired entry is revalidated with its ETag and kept on 304"""
+        cache = self.make_cache()
+        request = httpx.Request("POST", PREFIX + "legal/publication/epodoc")
+        sent = []
+
+        async def loader():
+            sent.append(request.headers.get("If-None-Match"))
+            if sent[-1] == '"v1"':
+                return httpx.Response(304, request=request)
+            return httpx.Response(200, text="<v1/>", headers={"ETag": '"v1"'}, request=request)
+
+        await cache.fetch("k", request, loader)
+        self.clock.now += 500
+        response = await cache.fetch("k", request, loader)
+
+        self.assertEqual(sent, [None, '"v1"'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "<v1/>")
+        self.assertEqual(cache.stats["not_modified"], 1)
+        self.assertEqual(cache.stats["bytes_saved"], len(b"<v1/>"))
+        # Renewed on disk too
+        self.assertTrue(cache.disk.get("k").is_fresh(self.clock.now))
+        await cache.aclose()
+
+    async def test_bytes_saved_counts_decoded_body(self):
+        """Test that a 304 for a compressed entry counts the full response body as saved"""
+        cache = self.make_cache()
+        request = httpx.Request("POST", PREFIX + "legal/publication/epodoc")
+        body = "<legal>{0}</legal>".format("event " * 500)
+
+        async def loader():
+            if request.headers.get("If-None-Match"):
+                return httpx.Response(304, request=request)
+            return httpx.Response(200, text=body, headers={"ETag": '"v1"'}, request=request)
+
+        await cache.fetch("k", request, loader)
+        self.clock.now += 500
+        await cache.fetch("k", request, loader)
+        self.assertLess(cache.disk.get("k").size, len(body))
+        self.assertEqual(cache.stats["bytes_saved"], len(body))
+        await cache.aclose()
+
+    async def test_unchanged_content_renews_entry(self):
+        """Test that without validators an identical answer only renews the entry"""
+        cache = self.make_cache()
+        versions = iter(["<v1/>", "<v1/>", "<v2/>"])
+
+        async def loader():
+            return httpx.Response(200, text=next(versions), request=REQUEST)
+
+        await cache.fetch("k", REQUEST, loader)
+        stored_at = cache.memory.get("k").stored_at
+        self.clock.now += 50
+        await cache.fetch("k", REQUEST, loader)
+        await asyncio.gather(*cache._refreshing.values())
+        self.assertEqual(cache.stats["unchanged"], 1)
+        self.assertGreater(cache.memory.get("k").stored_at, stored_at)
+
+        self.clock.now += 500
+        response = await cache.fetch("k", REQUEST, loader)
+        await cache.aclose()
+        self.assertEqual(response.text, "<v2/>")
+        self.assertEqual(cache.stats["changed"], 1)
+
+    async def test_entries_stored_compressed(self):
+        """Test that both tiers hold compressed content, decoded only when served"""
+        cache = ResponseCache(path=self.path, ttls={"legal": 10}, clock=self.clock, codec=ZlibCodec())
+        body = "<legal>" + "<event code='AK'>designated states</event>" * 200 + "</legal>"
+
+        async def loader():
+            return httpx.Response(200, text=body, request=REQUEST)
+
+        await cache.fetch("k", REQUEST, loader)
+        entry = cache.memory.get("k")
+        self.assertLess(entry.size * 5, len(body))
+        self.assertEqual(cache.memory.bytes, entry.size)
+        self.assertGreater(cache.info()["compression_ratio"], 5)
+
+        on_disk = cache.disk.get("k")
+        self.assertEqual(on_disk.codec.name, "zlib")
+        self.assertEqual(on_disk.data, entry.data)
+        self.assertEqual((await cache.fetch("k", REQUEST, loader)).text, body)
+        await cache.aclose()
+
+    async def test_unreadable_codec_is_a_miss(self):
+        cache = self.make_cache()
+        cache.disk.put("k", CacheEntry(200, {}, b"x", 0, 1, 2))
+        with cache.disk.db:
+            cache.disk.db.execute("UPDATE entries SET codec = 'zstd-12345'")
+        self.assertIsNone(cache.disk.get("k"))
+        await cache.aclose()
+
+    @unittest.skipUnless(codec.zstandard, "zstandard not installed")
+    def test_zstd_dictionary_codec(self):
+        samples = [("<doc n='{0}'>apparatus for bricks {0}</doc>".format(i) * 20).encode() for i in range(500)]
+        dictionary = codec.zstandard.train_dictionary(4096, samples).as_bytes()
+        zstd = codec.ZstdCodec(dictionary=dictionary)
+        self.assertTrue(zstd.name.startswith("zstd-"))
+        self.assertEqual(zstd.decompress(zstd.compress(samples[0])), samples[0])
+
+    async def test_errors_are_not_cached(self):
+        """Test that server errors always go upstream"""
+        cache = self.make_cache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return httpx.Response(503, request=REQUEST)
+
+        await cache.fetch("k", REQUEST, loader)
+        await cache.fetch("k", REQUEST, loader)
+        await cache.aclose()
+        self.assertEqual(len(calls), 2)
+
+    async def test_snapshot_and_preload(self):
+        """Test that a restarted cache starts warm from the snapshot"""
+        cache = self.make_cache()
+
+        async def loader():
+            return httpx.Response(200, text="<legal/>", request=REQUEST)
+
+        await cache.fetch("k", REQUEST, loader)
+        await cache.snapshot()
+        await cache.aclose()
+
+        restarted = self.make_cache()
+        self.assertEqual(await restarted.preload(), 1)
+        self.assertEqual(len(restarted.memory), 1)
+        await restarted.aclose()
+
+    async def test_client_serves_from_cache(self):
+        """Test that the async client answers repeat calls from the cache"""
+        calls = []
+
+        def handler(request):
+            if request.url.path.endswith("/auth/accesstoken"):
+                return httpx.Response(200, json={"access_token": "t", "expires_in": "1199"})
+            calls.append(request)
+            return httpx.Response(200, text="<legal/>", headers={"content-type": "application/xml"})
+
+        client = AsyncEpoClient(
+            "key", "secret",
+            transport=httpx.MockTransport(handler),
+            cache=self.make_cache(),
+        )
+        for _ in range(3):
+            response = await client.legal("publication", Epodoc("EP1000000"))
+        await client.aclose()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.headers["content-type"], "application/xml")
+        # Compressed answers are asked for, in encodings httpx can decode
+        self.assertIn("gzip", calls[0].headers["Accept-Encoding"])
+        self.assertEqual(calls[0].headers["Accept-Encoding"], httpx.AsyncClient().headers["Accept-Encoding"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Test cases for the citation graph crawler
+"""
+import os
+import tempfile
+import unittest
+from urllib.parse import parse_qs
+
+import httpx
+
+from benchmarks.fake_ops import _numbers, biblio, search
+from epo_ops_mcp_server.services.citations import crawl_citations
+from tests.test_async_client import make_client
+
+SEED = {"country": "EP", "number": "1000000", "kind": "A1"}
+
+
+def xml(body):
+    return httpx.Response(200, text=body, headers={"Content-Type": "application/xml"})
+
+
+class TestCrawlCitations(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.requested = []
+        self.failing = False
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def handler(self, request):
+        if "/search" in request.url.path:
+            query = parse_qs(request.content.decode())["q"][0]
+            self.requested.append(query)
+            return xml(search(query, 1, 2, total=2))
+        numbers = _numbers(request.content.decode())
+        self.requested.extend(country + number for country, number, _ in numbers)
+        if self.failing and any(country == "US" for country, _, _ in numbers):
+            return httpx.Response(500, text="<fault/>")
+        # Every fake document cites US4000001 to US4000008
+        return xml(biblio(numbers))
+
+    async def crawl(self, **kwargs):
+        client = make_client(self.handler)
+        try:
+            return await crawl_citations(client, [SEED], checkpoint_dir=self.tmp.name, **kwargs)
+        finally:
+            await client.aclose()
+
+    async def test_backward_crawl(self):
+        """Test that each level is fetched once and nodes are deduplicated"""
+        result = await self.crawl(depth=2, fan_out=3)
+
+        self.assertTrue(result["complete"])
+        self.assertEqual([n["id"] for n in result["nodes"]], ["EP1000000", "US4000001", "US4000002", "US4000003"])
+        self.assertEqual([n["depth"] for n in result["nodes"]], [0, 1, 1, 1])
+        self.assertIn(["EP1000000", "US4000001"], result["edges"])
+        self.assertIn(["US4000001", "US4000002"], result["edges"])
+        self.assertNotIn(["US4000001", "US4000001"], result["edges"])
+        self.assertEqual(len(result["edges"]), 3 + 3 * 2)
+        self.assertEqual(sorted(self.requested), ["EP1000000", "US4000001", "US4000002", "US4000003"])
+
+    async def test_forward_crawl(self):
+        result = await self.crawl(direction="forward", fan_out=2)
+        self.assertEqual(self.requested, ["ct=EP1000000"])
+        self.assertEqual(result["edges"], [["EP3000001", "EP1000000"], ["EP3000002", "EP1000000"]])
+
+    async def test_resume_retries_failed_nodes(self):
+        """Test that a crawl run again resumes from its checkpoint"""
+        self.failing = True
+        first = await self.crawl(depth=2, fan_out=2)
+        self.assertFalse(first["complete"])
+        self.assertEqual(set(first["errors"]), {"US4000001", "US4000002"})
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, first["crawl_id"] + ".json")))
+
+        self.failing = False
+        self.requested.clear()
+        second = await self.crawl(depth=2, fan_out=2)
+        self.assertTrue(second["resumed"])
+        self.assertTrue(second["complete"])
+        self.assertEqual(second["errors"], {})
+        # The seed is not fetched again
+        self.assertEqual(sorted(self.requested), ["US4000001", "US4000002"])
+
+        self.requested.clear()
+        await self.crawl(depth=2, fan_out=2, restart=True)
+        self.assertIn("EP1000000", self.requested)
+
+    async def test_max_nodes(self):
+        result = await self.crawl(depth=1, fan_out=8, max_nodes=3)
+        self.assertTrue(result["truncated"])
+        self.assertEqual(len(result["nodes"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
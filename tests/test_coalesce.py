@@ -0,0 +1,82 @@
+"""
+Test cases for single-flight request coalescing
+"""
+import asyncio
+import unittest
+
+import httpx
+from epo_ops.models import Docdb, Epodoc
+
+from epo_ops_mcp_server.services.coalesce import SingleFlight, flight_key
+from tests.test_async_client import make_client
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    def test_flight_key_normalizes_input(self):
+        """Test that equivalent calls produce the same key"""
+        a = flight_key(dict(service="legal", reference_type="publication", input=Epodoc("ep1000000")))
+        b = flight_key(dict(service="legal", reference_type="publication", input=Epodoc("EP1000000")))
+        c = flight_key(dict(service="legal", reference_type="publication", input=Docdb("1000000", "EP", "A1")))
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    def test_flight_key_ignores_constituent_order(self):
+        """Test that constituent order does not split flights"""
+        a = flight_key(dict(service="family", input=Epodoc("EP1"), constituents=["biblio", "legal"]))
+        b = flight_key(dict(service="family", input=Epodoc("EP1"), constituents=["legal", "biblio"]))
+        self.assertEqual(a, b)
+
+    async def test_concurrent_calls_share_one_run(self):
+        """Test that concurrent identical calls run once"""
+        flights = SingleFlight()
+        runs = []
+
+        async def fn():
+            runs.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*[flights.do("k", fn) for _ in range(5)])
+        self.assertEqual(results, ["result"] * 5)
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(flights.stats, {"calls": 5, "upstream": 1, "coalesced": 4})
+        self.assertEqual(len(flights), 0)
+
+    async def test_errors_are_shared(self):
+        """Test that every waiter sees the leader's error"""
+        flights = SingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *[flights.do("k", fn) for _ in range(3)], return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    async def test_client_coalesces_identical_calls(self):
+        """Test that the client sends one request for concurrent identical calls"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(0.02)
+            return httpx.Response(200, text="<legal/>")
+
+        client = make_client(handler)
+        responses = await asyncio.gather(
+            client.legal("publication", Epodoc("EP1000000")),
+            client.legal("publication", Epodoc("ep1000000")),
+            client.legal("publication", Epodoc("EP1000001")),
+        )
+        await client.aclose()
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([r.text for r in responses], ["<legal/>"] * 3)
+        self.assertEqual(client.stats()["coalescing"]["coalesced"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Test cases for bulk export of search results
+"""
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from urllib.parse import parse_qs
+
+import httpx
+
+from benchmarks.fake_ops import _numbers, biblio, fulltext, search
+from epo_ops_mcp_server.services.export import export_search
+from tests.test_async_client import make_client
+
+
+def xml(body):
+    return httpx.Response(200, text=body, headers={"Content-Type": "application/xml"})
+
+
+class TestExportSearch(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "landscape.jsonl")
+        self.searches = []
+        self.fail_at = None
+        self.total = 150
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def handler(self, request):
+        if "/search" in request.url.path:
+            begin, end = map(int, request.headers["X-OPS-Range"].split("-"))
+            self.searches.append(begin)
+            if begin == self.fail_at:
+                return httpx.Response(503, text="<fault/>")
+            if begin > self.total:
+                # OPS rejects ranges past the last hit
+                return httpx.Response(404, text="<fault/>")
+            return xml(search(parse_qs(request.content.decode())["q"][0], begin, end, total=self.total))
+        numbers = _numbers(request.content.decode())
+        if request.url.path.endswith("/claims"):
+            return xml(fulltext(numbers, "claims", 20))
+        return xml(biblio(numbers))
+
+    async def export(self, path=None, **kwargs):
+        client = make_client(self.handler)
+        try:
+            return await export_search(client, "ti=brick", path or self.path, **kwargs)
+        finally:
+            await client.aclose()
+
+    def records(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    async def test_jsonl_export(self):
+        """Test that every hit is written with biblio, abstract and claims"""
+        summary = await self.export()
+
+        self.assertEqual(summary["total"], 150)
+        self.assertEqual(summary["exported"], 150)
+        self.assertTrue(summary["complete"])
+        self.assertEqual(summary["bytes"], os.path.getsize(self.path))
+        records = self.records()
+        self.assertEqual(len({r["id"] for r in records}), 150)
+        self.assertEqual(records[0]["id"], "EP3000001")
+        self.assertTrue(records[0]["abstract"])
+        self.assertEqual(len(records[0]["claims"]), 3)
+        self.assertIsNone(records[0]["errors"])
+
+    async def test_resume_after_interruption(self):
+        """Test that a second run continues after the last complete page"""
+        self.fail_at = 101
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.export()
+        self.assertEqual(len(self.records()), 100)
+
+        # A partly written page is dropped on resume
+        with open(self.path, "a") as f:
+            f.write('{"id": "partial"')
+        self.fail_at = None
+        self.searches.clear()
+        summary = await self.export()
+
+        self.assertTrue(summary["resumed"])
+        self.assertEqual(self.searches, [101])
+        self.assertEqual(summary["exported"], 150)
+        self.assertEqual(len({r["id"] for r in self.records()}), 150)
+
+    async def test_resume_with_exact_multiple_total(self):
+        """Test that a resumed export stops at the hit count it saved"""
+        self.total = 200
+        self.fail_at = 101
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.export()
+
+        self.fail_at = None
+        self.searches.clear()
+        summary = await self.export()
+        self.assertEqual(self.searches, [101])
+        self.assertTrue(summary["complete"])
+        self.assertEqual(summary["exported"], 200)
+
+    async def test_without_claims_and_limited(self):
+        summary = await self.export(include_claims=False, max_results=40)
+        self.assertEqual(summary["exported"], 40)
+        self.assertEqual(self.records()[0]["claims"], [])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+    async def test_parquet_export(self):
+        import pyarrow.parquet
+
+        path = os.path.join(self.tmp.name, "landscape")
+        summary = await self.export(path=path, output_format="parquet")
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.num_rows, summary["exported"])
+        self.assertEqual(len(os.listdir(path)), 2)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+    async def test_parquet_restart_removes_old_parts(self):
+        """Test that starting over does not mix in part files of the previous export"""
+        import pyarrow.parquet
+
+        path = os.path.join(self.tmp.name, "landscape")
+        await self.export(path=path, output_format="parquet")
+        with open(os.path.join(path, "part-00001.parquet.tmp"), "w") as f:
+            f.write("partial")
+        summary = await self.export(path=path, output_format="parquet", max_results=40, restart=True)
+        self.assertEqual(sorted(os.listdir(path)), ["part-00000.parquet"])
+        self.assertEqual(pyarrow.parquet.read_table(path).num_rows, summary["exported"])
+        self.assertEqual(summary["bytes"], os.path.getsize(os.path.join(path, "part-00000.parquet")))
+
+
+if __name__ == "__main__":
+    unittest.main()
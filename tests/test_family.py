@@ -0,0 +1,105 @@
+"""
+Test cases for family expansion and the family index
+"""
+import os
+import tempfile
+import unittest
+
+import epo_ops
+import httpx
+
+from benchmarks.fake_ops import _numbers, biblio, family
+from epo_ops_mcp_server.services.family import FamilyIndex, expand_family, member_key
+from tests.test_async_client import make_client
+
+
+class TestExpandFamily(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = FamilyIndex(os.path.join(self.tmp.name, "families.db"))
+        self.requests = []
+
+        def handler(request):
+            path = request.url.path
+            self.requests.append(path.split("/rest-services/", 1)[1])
+            if "/family/" in path:
+                body = family([("EP", "1000000", "A1")], with_legal=False)
+            else:
+                body = biblio(_numbers(request.content.decode()))
+            return httpx.Response(200, text=body, headers={"Content-Type": "application/xml"})
+
+        self.client = make_client(handler)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        self.index.close()
+        self.tmp.cleanup()
+
+    async def test_expands_members_in_one_batch(self):
+        """Test that all members are fetched in a single multi-number request"""
+        result = await expand_family(self.client, epo_ops.models.Epodoc("EP1000000"), index=self.index)
+
+        self.assertEqual(result["source"], "ops")
+        self.assertEqual(result["family_id"], "11000000")
+        self.assertEqual(len(result["members"]), 5)
+        self.assertEqual(self.requests, [
+            "family/publication/epodoc/(EP1000000)",
+            "published-data/publication/docdb/biblio",
+        ])
+        member = result["members"][1]
+        self.assertEqual(member["publication"]["number"], "1000001")
+        self.assertEqual(member["status"], "ok")
+        self.assertEqual(member["response"]["data"]["documents"][0]["number"], "1000001")
+
+    async def test_other_member_answered_from_index(self):
+        """Test that a later lookup for another member needs no family request"""
+        await expand_family(self.client, epo_ops.models.Epodoc("EP1000000"), index=self.index)
+        self.requests.clear()
+
+        result = await expand_family(
+            self.client, epo_ops.models.Docdb("1000002", "CN", "A1"), index=self.index
+        )
+        self.assertEqual(result["source"], "index")
+        self.assertEqual(self.requests, ["published-data/publication/docdb/biblio"])
+
+        await expand_family(self.client, epo_ops.models.Epodoc("CN1000002"), index=self.index, refresh=True)
+        self.assertIn("family/publication/epodoc/(CN1000002)", self.requests)
+
+
+class TestFamilyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "families.db")
+        self.now = 1_000_000.0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_persistent_and_expiring(self):
+        index = FamilyIndex(self.path, ttl=60, clock=lambda: self.now)
+        index.store("42", [{"publication": {"country": "EP", "number": "1000000", "kind": "A1"}}])
+        index.close()
+
+        index = FamilyIndex(self.path, ttl=60, clock=lambda: self.now)
+        self.assertEqual(index.lookup("EP1000000")["family_id"], "42")
+        self.now += 61
+        self.assertIsNone(index.lookup("EP1000000"))
+        self.assertEqual(index.info()["members"], 1)
+        index.close()
+
+    def test_members_stored_under_canonical_keys(self):
+        """Test that a member stored in a non-canonical spelling is found by its canonical number"""
+        index = FamilyIndex(self.path, clock=lambda: self.now)
+        index.store("42", [{"publication": {"country": "US", "number": "2020/0123456", "kind": "A1"}}])
+        self.assertEqual(index.lookup(member_key(epo_ops.models.Epodoc("US2020123456")))["family_id"], "42")
+        index.close()
+
+    def test_member_key_ignores_kind(self):
+        self.assertEqual(member_key(epo_ops.models.Epodoc("EP1000000A1")), "EP1000000")
+        self.assertEqual(member_key(epo_ops.models.Docdb("1000000", "EP", "B1")), "EP1000000")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Test cases for binary image retrieval
+"""
+import io
+import os
+import tempfile
+import time
+import unittest
+
+import httpx
+
+from epo_ops_mcp_server.services.images import (
+    ImageStore,
+    fetch_image_pages,
+    parse_pages,
+    shutdown_image_pool,
+)
+from tests.test_async_client import make_client
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def tiff_page(page):
+    """A small TIFF whose width encodes the page number."""
+    output = io.BytesIO()
+    Image.new("L", (100 + page, 50)).save(output, format="TIFF")
+    return output.getvalue()
+
+
+def image_handler(requests_seen, body=None):
+    """Answer image requests with a binary body per requested page."""
+    def handler(request):
+        page = int(request.url.params["Range"])
+        requests_seen.append(page)
+        if page == 99:
+            return httpx.Response(404, text="Not found")
+        content = body(page) if body else b"\x00\xff\x89binary" + bytes([page])
+        return httpx.Response(200, content=content, headers={"content-type": "application/tiff"})
+    return handler
+
+
+class TestImages(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ImageStore(self.directory.name, max_bytes=0)
+
+    def tearDown(self):
+        shutdown_image_pool()
+        self.directory.cleanup()
+
+    async def fetch(self, handler, pages, convert=None):
+        client = make_client(handler)
+        try:
+            return await fetch_image_pages(
+                client, "published-data/images/EP/1000000/A1/fullimage", pages,
+                convert=convert, store=self.store,
+            )
+        finally:
+            await client.aclose()
+
+    def test_parse_pages(self):
+        """Test page selections and their limits"""
+        self.assertEqual(parse_pages("1-3,5,2"), [1, 2, 3, 5])
+        self.assertEqual(parse_pages(4), [4])
+        for invalid in ("0", "3-1", "a", ""):
+            with self.assertRaises(ValueError):
+                parse_pages(invalid)
+        with self.assertRaises(ValueError):
+            parse_pages("1-10", max_pages=5)
+        # Overlapping ranges only count their new pages
+        self.assertEqual(parse_pages("1-5,3-6", max_pages=6), [1, 2, 3, 4, 5, 6])
+
+    def test_parse_pages_huge_range(self):
+        """Test that a huge range is refused without being expanded"""
+        start = time.perf_counter()
+        for pages in ("1-1000000000", "1-40,41-1000000000"):
+            with self.assertRaises(ValueError):
+                parse_pages(pages, max_pages=50)
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+    async def test_pages_are_bytes(self):
+        """Test that binary bodies are returned byte-for-byte in page order"""
+        results = await self.fetch(image_handler([]), [1, 2, 3])
+        self.assertEqual([r["page"] for r in results], [1, 2, 3])
+        self.assertEqual(results[1]["image"].data, b"\x00\xff\x89binary\x02")
+        self.assertEqual(results[1]["image"].mime_type, "image/tiff")
+
+    async def test_pages_cached_on_disk(self):
+        """Test that a page fetched once is served from the store"""
+        seen = []
+        await self.fetch(image_handler(seen), [1, 2])
+        results = await self.fetch(image_handler(seen), [1, 2])
+        self.assertEqual(sorted(seen), [1, 2])
+        name = results[0]["image"].name
+        self.assertEqual(self.store.get(name), b"\x00\xff\x89binary\x01")
+
+    async def test_failed_page(self):
+        """Test that a failing page is reported without losing the others"""
+        results = await self.fetch(image_handler([]), [1, 99])
+        self.assertEqual(results[0]["status"], "ok")
+        self.assertEqual(results[1]["status"], "error")
+
+    def test_prune(self):
+        """Test that the oldest files are removed once the store is full"""
+        store = ImageStore(self.directory.name, max_bytes=250)
+        for page in range(1, 4):
+            name = ImageStore.name_for("path", page, "application/tiff")
+            store.put(name, b"x" * 100)
+            os.utime(store.file_for(name), (page, page))
+        self.assertIsNone(store.get(ImageStore.name_for("path", 1, "application/tiff")))
+        self.assertIsNotNone(store.get(ImageStore.name_for("path", 3, "application/tiff")))
+
+    def test_names_are_not_paths(self):
+        """Test that resource names cannot escape the store directory"""
+        with self.assertRaises(ValueError):
+            self.store.get("../cache.db")
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    async def test_thumbnail(self):
+        """Test conversion of TIFF pages to PNG thumbnails"""
+        results = await self.fetch(image_handler([], tiff_page), [1, 2], convert="thumbnail")
+        image = results[1]["image"]
+        self.assertEqual(image.mime_type, "image/png")
+        with Image.open(io.BytesIO(image.data)) as png:
+            self.assertEqual(png.format, "PNG")
+            self.assertLessEqual(max(png.size), 256)
+
+
+if __name__ == '__main__':
+    unittest.main()
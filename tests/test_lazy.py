@@ -0,0 +1,62 @@
+"""
+Test cases for deferred imports
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+from epo_ops_mcp_server.utils.lazy import LazyModule
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyModule(unittest.TestCase):
+
+    def test_imports_on_first_attribute(self):
+        """Test that the module is imported when an attribute is used"""
+        module = LazyModule("json")
+        self.assertIn("not loaded", repr(module))
+        self.assertEqual(module.dumps([1]), "[1]")
+        self.assertIs(module.load(), sys.modules["json"])
+
+    def test_concurrent_load_imports_once(self):
+        """Test that threads racing on the first access import the module once"""
+        imported = []
+
+        def slow_import(name):
+            imported.append(name)
+            time.sleep(0.05)
+            return sys.modules[name]
+
+        module = LazyModule("json")
+        with mock.patch("importlib.import_module", side_effect=slow_import):
+            threads = [threading.Thread(target=module.load) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(imported, ["json"])
+        self.assertIs(module.load(), sys.modules["json"])
+
+    def test_missing_module(self):
+        with self.assertRaises(ImportError):
+            LazyModule("epo_ops_mcp_server.missing").anything
+
+    def test_main_defers_epo_ops(self):
+        """Test that importing the server does not import epo_ops (and requests)"""
+        result = subprocess.run(
+            [
+                sys.executable, "-W", "ignore", "-c",
+                "import sys, main; print(sorted(m for m in ('epo_ops', 'requests', 'dogpile') if m in sys.modules))",
+            ],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Test cases for latency and traffic metrics
+"""
+import unittest
+
+import httpx
+from fastmcp import Client
+
+import main
+from epo_ops_mcp_server.services import epo_client
+from epo_ops_mcp_server.services.metrics import Histogram, MetricsRegistry, metrics, phase
+from tests import ops_samples
+from tests.test_async_client import make_client
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_quantiles(self):
+        """Test percentile estimates from bucket counts"""
+        histogram = Histogram((1.0, 2.0, 4.0))
+        for value in (0.5, 1.5, 1.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.quantile(0.5), 1.5)
+        self.assertEqual(histogram.quantile(1.0), 4.0)
+        self.assertIsNone(Histogram((1.0,)).quantile(0.5))
+
+    def test_prometheus_text(self):
+        """Test the Prometheus text exposition of each metric type"""
+        registry = MetricsRegistry()
+        registry.inc("ops_responses_total", service="search", status=200)
+        registry.observe("ops_upstream_seconds", 0.2, service="search")
+        text = registry.render_prometheus({"ops_cache_hit_ratio": {(): 0.5}})
+        self.assertIn('ops_responses_total{service="search",status="200"} 1', text)
+        self.assertIn('ops_upstream_seconds_bucket{service="search",le="0.25"} 1', text)
+        self.assertIn('ops_upstream_seconds_bucket{service="search",le="+Inf"} 1', text)
+        self.assertIn('ops_upstream_seconds_count{service="search"} 1', text)
+        self.assertIn("# TYPE ops_cache_hit_ratio gauge\nops_cache_hit_ratio 0.5", text)
+
+    def test_phases_need_a_trace(self):
+        """Test that phases outside a tool call are ignored"""
+        registry = MetricsRegistry()
+        with phase("parse"):
+            pass
+        with registry.tool_call("tool") as trace:
+            with phase("parse"):
+                pass
+        self.assertIn("parse", trace.phases)
+        self.assertEqual(registry.histograms["mcp_tool_phase_seconds"][
+            (("phase", "parse"), ("tool", "tool"))
+        ].count, 1)
+
+
+class TestToolMetrics(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        epo_client._async_epo_client = make_client(lambda request: httpx.Response(
+            200, text=ops_samples.BIBLIO, headers={"content-type": "application/xml"}
+        ))
+
+    async def asyncTearDown(self):
+        await epo_client.close_async_epo_client()
+
+    def count(self, name, **labels):
+        series = metrics.histograms.get(name, {})
+        histogram = series.get(tuple(sorted(labels.items())))
+        return histogram.count if histogram else 0
+
+    async def test_tool_phases_recorded(self):
+        """Test that a tool call records every phase, its size and errors"""
+        tool = "get_published_data"
+        before = self.count("mcp_tool_duration_seconds", tool=tool)
+        async with Client(main.mcp) as client:
+            await client.call_tool(tool, {
+                "reference_type": "publication", "input_data": {"number": "EP1000000"}
+            })
+            with self.assertRaises(Exception):
+                await client.call_tool(tool, {
+                    "reference_type": "publication", "input_data": {"country_code": "E"}
+                })
+            resource = await client.read_resource("ops://metrics")
+
+        self.assertEqual(self.count("mcp_tool_duration_seconds", tool=tool), before + 2)
+        for name in ("validate", "throttle", "upstream", "parse", "serialize", "local"):
+            self.assertEqual(self.count("mcp_tool_phase_seconds", tool=tool, phase=name), before + 2)
+        self.assertGreater(self.count("mcp_tool_response_bytes", tool=tool), 0)
+        self.assertIn((("error", "ValidationError"), ("tool", tool)), metrics.counters["mcp_tool_errors_total"])
+        self.assertIn("mcp_tool_phase_seconds", resource[0].text)
+
+
+if __name__ == '__main__':
+    unittest.main()
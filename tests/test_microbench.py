@@ -0,0 +1,39 @@
+"""
+Test cases comparing the local hot path against the microbenchmark baseline
+"""
+import os
+import unittest
+
+from benchmarks import micro
+
+
+class TestMicrobenchmarks(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.results = micro.run(min_time=0.01)
+        cls.baseline = micro.load_baseline()
+
+    def test_corpus_sizes(self):
+        """Test that the corpus keeps its real-world sizes"""
+        sizes = {name: len(content) for name, content in micro.corpus().items()}
+        self.assertGreater(sizes["description_1mb"], 1000000)
+        self.assertGreater(sizes["family_large"], 500000)
+
+    def test_every_case_has_a_baseline(self):
+        """Test that the baseline covers every stage and payload"""
+        self.assertEqual(set(self.results), set(self.baseline))
+
+    def test_memory_against_baseline(self):
+        """Test that no stage needs much more memory than the baseline"""
+        self.assertEqual(micro.compare(self.results, self.baseline, None, 0.5), [])
+
+    @unittest.skipUnless(os.environ.get("OPS_BENCH_TIMING"), "set OPS_BENCH_TIMING=1 to compare timings")
+    def test_timing_against_baseline(self):
+        """Test that no stage got much slower than the baseline (machine dependent)"""
+        results = micro.run(min_time=0.2)
+        self.assertEqual(micro.compare(results, self.baseline, 0.5, 0.5), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
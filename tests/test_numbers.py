@@ -0,0 +1,99 @@
+"""
+Test cases for patent number normalization and conversion
+"""
+import unittest
+
+import httpx
+
+from epo_ops_mcp_server.services.numbers import convert_numbers
+from epo_ops_mcp_server.utils.numbers import AmbiguousNumber, canonical_key, normalize_number
+from main import validate_pat_number
+from tests.test_async_client import make_client
+
+NUMBER_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<ops:world-patent-data xmlns:ops="http://ops.epo.org" xmlns="http://www.epo.org/exchange">
+  <ops:standardization inputFormat="original" outputFormat="docdb">
+    <ops:input><ops:publication-reference><document-id document-id-type="original">
+      <doc-number>99/12345</doc-number></document-id></ops:publication-reference></ops:input>
+    <ops:output><ops:publication-reference><document-id document-id-type="docdb">
+      <country>WO</country><doc-number>9912345</doc-number><kind>A1</kind></document-id></ops:publication-reference></ops:output>
+  </ops:standardization>
+</ops:world-patent-data>"""
+
+
+class TestNormalizeNumber(unittest.TestCase):
+
+    def test_major_offices(self):
+        cases = {
+            "EP 1 000 000 A1": ("EP", "1000000", "A1"),
+            "ep1000000.b1": ("EP", "1000000", "B1"),
+            "WO2025/158691": ("WO", "2025158691", None),
+            "US 2020/0123456 A1": ("US", "2020123456", "A1"),
+            "US 10,123,456 B2": ("US", "10123456", "B2"),
+            "JP 2020-123456 A": ("JP", "2020123456", "A"),
+            "KR 10-2020-0012345 A": ("KR", "20200012345", "A"),
+            "DE 10 2019 123 456 A1": ("DE", "102019123456", "A1"),
+        }
+        for text, expected in cases.items():
+            document = normalize_number(text)
+            self.assertEqual((document.country, document.number, document.kind), expected, text)
+
+    def test_ambiguous_numbers_are_left_to_ops(self):
+        for text in ("WO 99/12345", "JP H10-123456", "US D123456", "XX 123"):
+            with self.assertRaises(AmbiguousNumber, msg=text):
+                normalize_number(text)
+        with self.assertRaises(AmbiguousNumber):
+            normalize_number("EP 19123456.7", reference_type="application")
+
+    def test_one_key_per_document(self):
+        self.assertEqual(canonical_key("EP 1000000 A1"), canonical_key("1000000", "EP"))
+        self.assertEqual(canonical_key("XX 123"), "XX123")
+
+    def test_validate_pat_number_normalizes(self):
+        model = validate_pat_number({"number": "EP 1 000 000 A1"})
+        self.assertEqual((model.number, model.kind_code), ("EP1000000", "A1"))
+        model = validate_pat_number({"country_code": "US", "number": "2020/0123456", "kind_code": "A1"})
+        self.assertEqual(model.number, "2020123456")
+        # A country code without a kind code is sent in epodoc format
+        self.assertEqual(validate_pat_number({"country_code": "EP", "number": "1000000"}).number, "EP1000000")
+
+    def test_validate_pat_number_leaves_application_numbers(self):
+        """Test that application numbers do not get publication number rewriting"""
+        model = validate_pat_number({"number": "US2020/0123456"}, "application")
+        self.assertEqual(model.number, "US2020/0123456")
+        model = validate_pat_number({"country_code": "US", "number": "2020/0123456", "kind_code": "A"}, "application")
+        self.assertEqual(model.number, "2020/0123456")
+        self.assertEqual(validate_pat_number({"number": "US2020/0123456"}).number, "US2020123456")
+
+
+class TestConvertNumbers(unittest.IsolatedAsyncioTestCase):
+
+    async def test_only_ambiguous_numbers_reach_ops(self):
+        """Test that a bulk conversion sends only what cannot be converted locally"""
+        seen = []
+
+        def handler(request):
+            seen.append(request.url.path)
+            return httpx.Response(200, text=NUMBER_RESPONSE, headers={"Content-Type": "application/xml"})
+
+        client = make_client(handler)
+        items = ["EP 1000000 A1"] * 1000 + [{"country_code": "WO", "number": "99/12345", "kind_code": "A1"}]
+        results = await convert_numbers(client, "publication", items, "epodoc")
+        await client.aclose()
+
+        self.assertEqual(len(seen), 1)
+        self.assertIn("/number-service/publication/original/", seen[0])
+        self.assertEqual(results[0], {"status": "ok", "source": "local", "country": "EP", "number": "EP1000000", "kind": "A1"})
+        self.assertEqual(results[-1]["source"], "ops")
+        self.assertEqual(results[-1]["number"], "WO9912345")
+
+    async def test_without_ops(self):
+        results = await convert_numbers(None, "publication", ["WO 99/12345", {"kind_code": "A1"}], use_ops=False)
+        self.assertEqual([r["status"] for r in results], ["error", "error"])
+
+        with self.assertRaises(ValueError):
+            await convert_numbers(None, "publication", [], "docdb-xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Test cases for structured OPS XML parsing
+"""
+import unittest
+
+from epo_ops_mcp_server.utils.parser import Projection, parse_ops_xml
+from epo_ops_mcp_server.utils.response import format_response
+from tests import ops_samples
+
+
+class TestParser(unittest.TestCase):
+
+    def test_exchange_document(self):
+        """Test parsing of bibliographic data"""
+        document = parse_ops_xml(ops_samples.BIBLIO)["documents"][0]
+        self.assertEqual(document["country"], "EP")
+        self.assertEqual(document["number"], "1000000")
+        self.assertEqual(document["family_id"], "19768124")
+        self.assertEqual(document["publication_date"], "20000517")
+        self.assertEqual(document["titles"]["en"], "Apparatus for manufacturing green bricks")
+        self.assertEqual(document["applicants"], ["SPEED FAM CO LTD [JP]"])
+        self.assertEqual(document["ipc"], ["B65G 49/ 07 A I"])
+        self.assertEqual(document["cpc"], ["B65G49/068"])
+        self.assertEqual(document["priorities"][0]["number"], "1010536")
+        self.assertEqual(document["citations"][0], {"country": "US", "number": "4211594", "kind": "A"})
+        self.assertIn("green bricks", document["abstracts"]["en"])
+
+    def test_search_result(self):
+        """Test parsing of search hits and counts"""
+        search = parse_ops_xml(ops_samples.SEARCH)["search"]
+        self.assertEqual(search["total"], 2317)
+        self.assertEqual((search["begin"], search["end"]), (1, 2))
+        self.assertEqual(search["query"], "ti=plastic")
+        self.assertEqual(len(search["hits"]), 2)
+        self.assertEqual(search["hits"][1]["id"]["number"], "2019000002")
+
+    def test_family_with_legal_events(self):
+        """Test parsing of family members and their legal events"""
+        data = parse_ops_xml(ops_samples.FAMILY_LEGAL)
+        self.assertEqual(data["family"], {"family_id": "19768124", "total": 2})
+        members = data["family_members"]
+        self.assertEqual(len(members), 2)
+        event = members[0]["legal"][0]
+        self.assertEqual(event["code"], "AK")
+        self.assertEqual(event["date"], "20000517")
+        self.assertEqual(event["fields"], {"L500EP": "AT BE CH"})
+        self.assertNotIn("legal", members[1])
+
+    def test_register_document(self):
+        """Test parsing of register data"""
+        document = parse_ops_xml(ops_samples.REGISTER)["register_documents"][0]
+        self.assertEqual(document["application"], "EP99203729")
+        self.assertEqual(document["publication"], "EP1000000A1")
+        self.assertEqual(document["designated_states"], ["DE", "FR"])
+        self.assertEqual(document["status"], "The application is deemed to be withdrawn")
+        self.assertEqual(document["events"][0]["code"], "0009199EPPU")
+
+    def test_fulltext_document(self):
+        """Test parsing of claims and description"""
+        document = parse_ops_xml(ops_samples.FULLTEXT)["fulltext_documents"][0]
+        self.assertEqual(len(document["claims"]), 2)
+        self.assertEqual(len(document["description"]), 3)
+        self.assertEqual(document["lang"], "EN")
+
+    def test_image_inquiry(self):
+        """Test parsing of image inquiry results"""
+        images = parse_ops_xml(ops_samples.IMAGES)["images"]
+        self.assertEqual(images[0]["pages"], 2)
+        self.assertEqual(images[1]["link"], "published-data/images/EP/1000000/A1/fullimage")
+
+    def test_format_response_without_raw(self):
+        """Test that include_raw=False drops the raw payload"""
+        with_raw = format_response(ops_samples.BIBLIO, "application/xml")
+        without_raw = format_response(ops_samples.BIBLIO.encode(), "application/xml", include_raw=False)
+        self.assertIn("raw", with_raw)
+        self.assertNotIn("raw", without_raw)
+        self.assertEqual(with_raw["data"], without_raw["data"])
+        self.assertEqual(without_raw["xml"]["tag"], "{http://ops.epo.org}world-patent-data")
+
+
+def fulltext_with_paragraphs(paragraphs):
+    """The FULLTEXT sample with its description replaced by ``paragraphs``."""
+    start = ops_samples.FULLTEXT.index("<description")
+    end = ops_samples.FULLTEXT.index("</description>")
+    body = "".join("<p>{0}</p>".format(p) if p else "<p/>" for p in paragraphs)
+    return ops_samples.FULLTEXT[:start] + '<description lang="EN">' + body + ops_samples.FULLTEXT[end:]
+
+
+class TestProjection(unittest.TestCase):
+
+    def test_no_limits_means_no_projection(self):
+        """Test that default tool arguments do not build a projection"""
+        self.assertIsNone(Projection.from_args())
+        self.assertIsNotNone(Projection.from_args(offset=2))
+
+    def test_claim_limit(self):
+        """Test that only the first max_claims claims are returned"""
+        document = parse_ops_xml(ops_samples.FULLTEXT, Projection(max_claims=1))["fulltext_documents"][0]
+        self.assertEqual(document["claims"], ["1. Apparatus for manufacturing green bricks."])
+        self.assertEqual(document["claims_total"], 2)
+        self.assertTrue(document["truncated"])
+
+    def test_description_paging(self):
+        """Test paging through description paragraphs with an offset"""
+        first = parse_ops_xml(ops_samples.FULLTEXT, Projection(limit=2))["fulltext_documents"][0]
+        self.assertEqual(len(first["description"]), 2)
+        self.assertEqual(first["next_offset"], 2)
+        self.assertEqual(first["description_total"], 3)
+
+        last = parse_ops_xml(ops_samples.FULLTEXT, Projection(offset=2, limit=2))["fulltext_documents"][0]
+        self.assertEqual(last["description"], ["The object of the invention is improvement."])
+        self.assertNotIn("next_offset", last)
+
+    def test_paging_skips_empty_paragraphs_once(self):
+        """Test that empty paragraphs count towards the next offset"""
+        xml = fulltext_with_paragraphs(["para 0", "", "para 2", "para 3", "para 4"])
+        pages, offset = [], 0
+        while offset is not None:
+            document = parse_ops_xml(xml, Projection(offset=offset, limit=2))["fulltext_documents"][0]
+            pages.append(document["description"])
+            offset = document.get("next_offset")
+        self.assertEqual(pages, [["para 0"], ["para 2", "para 3"], ["para 4"]])
+
+    def test_paging_resumes_cut_paragraph(self):
+        """Test that a paragraph cut at max_chars is returned again on the next page"""
+        xml = fulltext_with_paragraphs(["para 0", "para 1", "para 2"])
+        first = parse_ops_xml(xml, Projection(limit=3, max_chars=10))["fulltext_documents"][0]
+        self.assertEqual(first["description"], ["para 0", "para"])
+        self.assertEqual(first["next_offset"], 1)
+
+        second = parse_ops_xml(xml, Projection(offset=1, limit=3, max_chars=20))["fulltext_documents"][0]
+        self.assertEqual(second["description"], ["para 1", "para 2"])
+        self.assertNotIn("next_offset", second)
+
+        # A first paragraph that can never fit is skipped rather than repeated
+        tiny = parse_ops_xml(xml, Projection(limit=3, max_chars=3))["fulltext_documents"][0]
+        self.assertEqual(tiny["next_offset"], 1)
+
+    def test_char_cap(self):
+        """Test that sections are cut at max_chars"""
+        document = parse_ops_xml(ops_samples.FULLTEXT, Projection(max_chars=30))["fulltext_documents"][0]
+        self.assertEqual(sum(len(p) for p in document["description"]), 30)
+        self.assertEqual(sum(len(c) for c in document["claims"]), 30)
+
+        biblio = parse_ops_xml(ops_samples.BIBLIO, Projection(max_chars=10))["documents"][0]
+        self.assertEqual(len(biblio["abstracts"]["en"]), 10)
+
+    def test_field_selection(self):
+        """Test that only requested fields and identity fields are returned"""
+        document = parse_ops_xml(ops_samples.BIBLIO, Projection(fields={"titles"}))["documents"][0]
+        self.assertEqual(
+            set(document), {"country", "number", "kind", "family_id", "application", "titles"}
+        )
+
+    def test_projected_response_has_no_raw(self):
+        """Test that a projected response never carries the raw payload"""
+        response = format_response(
+            ops_samples.FULLTEXT, "application/xml", projection=Projection(max_claims=1)
+        )
+        self.assertNotIn("raw", response)
+
+
+if __name__ == '__main__':
+    unittest.main()
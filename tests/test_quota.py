@@ -0,0 +1,141 @@
+"""
+Test cases for the OPS quota ledger
+"""
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from epo_ops_mcp_server.services.priority import BACKGROUND, BULK, INTERACTIVE, priority
+from epo_ops_mcp_server.services.quota import QuotaLedger, QuotaShed
+from tests.test_async_client import make_client
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def usage(hour=None, week=None):
+    headers = {}
+    if hour is not None:
+        headers["X-IndividualQuotaPerHour-Used"] = str(hour)
+    if week is not None:
+        headers["X-RegisteredQuotaPerWeek-Used"] = str(week)
+    return headers
+
+
+class TestQuotaLedger(unittest.IsolatedAsyncioTestCase):
+
+    def ledger(self, **kwargs):
+        self.clock = FakeClock()
+        options = dict(
+            path="", hour_limit=1000, week_limit=100000,
+            bulk_threshold=0.9, background_threshold=0.8, defer_max=0, clock=self.clock,
+        )
+        options.update(kwargs)
+        return QuotaLedger(**options)
+
+    async def test_admission_by_priority(self):
+        """Test that background work is shed first, then bulk, never interactive"""
+        ledger = self.ledger()
+        ledger.update(usage(hour=850))
+        await ledger.admit(INTERACTIVE)
+        await ledger.admit(BULK)
+        with self.assertRaises(QuotaShed):
+            await ledger.admit(BACKGROUND)
+
+        ledger.update(usage(hour=950))
+        with self.assertRaises(QuotaShed):
+            await ledger.admit(BULK)
+        await ledger.admit(INTERACTIVE)
+        self.assertEqual(ledger.stats["shed"], 2)
+
+    async def test_priority_from_context(self):
+        """Test that admission uses the priority of the calling context"""
+        ledger = self.ledger()
+        ledger.update(usage(week=85000))
+        with priority(BACKGROUND):
+            with self.assertRaises(QuotaShed):
+                await ledger.admit()
+        await ledger.admit()
+
+    def test_usage_decays(self):
+        """Test that old reported usage counts less as the rolling window moves on"""
+        ledger = self.ledger()
+        ledger.update(usage(hour=900))
+        self.assertAlmostEqual(ledger.utilization(), 0.9)
+        self.clock.now += 1800
+        self.assertAlmostEqual(ledger.utilization(), 0.45)
+
+    def test_exhaustion_prediction(self):
+        """Test that the consumption rate predicts when the quota runs out"""
+        ledger = self.ledger(hour_limit=10000)
+        ledger.update(usage(hour=1000))
+        self.clock.now += 10
+        ledger.update(usage(hour=2000))
+        hour = ledger.snapshot()["windows"]["hour"]
+        self.assertEqual(hour["bytes_per_second"], 100.0)
+        self.assertEqual(hour["exhausted_in"], 80)
+
+    def test_no_limit_only_records(self):
+        """Test that a window without a limit never blocks requests"""
+        ledger = self.ledger(hour_limit=0, week_limit=0)
+        ledger.update(usage(hour=10 ** 9, week=10 ** 10))
+        self.assertEqual(ledger.utilization(), 0.0)
+        self.assertEqual(ledger.snapshot()["windows"]["week"]["used"], 10 ** 10)
+
+    def test_persistence(self):
+        """Test that usage survives a restart"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "quota.json")
+            ledger = self.ledger(path=path)
+            ledger.update(usage(hour=700, week=5000))
+            ledger.save()
+
+            restored = self.ledger(path=path)
+            restored.load()
+            self.assertEqual(restored.windows["hour"].used, 700)
+            self.assertEqual(restored.windows["week"].used, 5000)
+
+    def test_processes_share_usage(self):
+        """Test that ledgers sharing a file adopt each other's newer usage"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "quota.json")
+            first = self.ledger(path=path)
+            second = self.ledger(path=path)
+            first.update(usage(hour=700, week=5000))
+            first.save()
+
+            second.clock.now += 10
+            second.update(usage(hour=650))
+            second.save()
+            # Newer value from the second ledger; the week only the first one saw
+            self.assertEqual(second.windows["hour"].used, 650)
+            self.assertEqual(second.windows["week"].used, 5000)
+
+            first.load()
+            self.assertEqual(first.windows["hour"].used, 650)
+
+    async def test_client_records_headers(self):
+        """Test that the client reads quota headers from every OPS response"""
+        def handler(request):
+            return httpx.Response(
+                200, text="<xml/>", headers={"content-type": "application/xml", **usage(hour=42, week=4242)}
+            )
+
+        client = make_client(handler)
+        try:
+            await client.published_data_search(cql="ti=brick")
+        finally:
+            await client.aclose()
+        windows = client.stats()["quota"]["windows"]
+        self.assertEqual((windows["hour"]["used"], windows["week"]["used"]), (42, 4242))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Test cases for OPS record/replay
+"""
+import os
+import tempfile
+import unittest
+
+import httpx
+from epo_ops.models import Docdb, Epodoc
+
+from epo_ops_mcp_server.services.epo_client import AsyncEpoClient
+from epo_ops_mcp_server.services.recorder import ReplayMiss, ResponseStore
+from epo_ops_mcp_server.services.resilience import RetryPolicy
+from tests.test_async_client import TOKEN_BODY
+
+
+class TestRecordReplay(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "recording.db")
+        self.seen = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def handler(self, request):
+        if request.url.path.endswith("/auth/accesstoken"):
+            return httpx.Response(200, text=TOKEN_BODY)
+        self.seen.append(request)
+        if "EP9999999" in request.url.path:
+            return httpx.Response(404, text="<fault/>", headers={"content-type": "application/xml"})
+        if "EP5000000" in request.url.path:
+            return httpx.Response(503, text="busy")
+        return httpx.Response(
+            200,
+            text="<biblio>{0}</biblio>".format(request.content.decode() or request.url.path) * 50,
+            headers={
+                "content-type": "application/xml",
+                "X-Throttling-Control": "busy (retrieval=green:5)",
+                "X-IndividualQuotaPerHour-Used": "12345",
+            },
+        )
+
+    async def calls(self, client):
+        responses = [
+            await client.published_data("publication", Docdb("1000000", "EP", "A1"), "biblio"),
+            await client.family("publication", Epodoc("EP1000000")),
+        ]
+        with self.assertRaises(httpx.HTTPStatusError) as raised:
+            await client.family("publication", Epodoc("EP9999999"))
+        return responses + [raised.exception.response]
+
+    async def record(self):
+        client = AsyncEpoClient(
+            "key", "secret", transport=httpx.MockTransport(self.handler),
+            mode="record", recording=ResponseStore(self.path), retry=RetryPolicy(backoff=0),
+        )
+        responses = await self.calls(client)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await client.family("publication", Epodoc("EP5000000"))
+        info = client.stats()["recording"]
+        await client.aclose()
+        return responses, info
+
+    async def test_replay_returns_recorded_responses(self):
+        """Test that replay answers what record saw, without the network"""
+        recorded, info = await self.record()
+        self.assertEqual(info["mode"], "record")
+        # 404 is recorded, 503 is not
+        self.assertEqual(info["entries"], 3)
+        self.assertLess(info["stored_bytes"], info["bytes"])
+
+        self.seen.clear()
+        client = AsyncEpoClient("key", "secret", mode="replay", recording=ResponseStore(self.path))
+        replayed = await self.calls(client)
+        stats = client.stats()
+        await client.aclose()
+
+        self.assertEqual(self.seen, [])
+        self.assertEqual(
+            [(r.status_code, r.headers["content-type"], r.content) for r in replayed],
+            [(r.status_code, r.headers["content-type"], r.content) for r in recorded],
+        )
+        # No quota use or throttling is replayed
+        self.assertEqual(stats["quota"]["windows"]["hour"]["used"], 0)
+        self.assertEqual(stats["recording"]["hits"], 3)
+
+    async def test_replay_miss_names_request(self):
+        """Test that an unrecorded request fails clearly and is reported"""
+        await self.record()
+        client = AsyncEpoClient("key", "secret", mode="replay", recording=ResponseStore(self.path))
+        with self.assertRaises(ReplayMiss) as raised:
+            await client.published_data("publication", Docdb("2000000", "EP", "A1"), "biblio")
+        stats = client.stats()["recording"]
+        await client.aclose()
+
+        self.assertIn("published-data/publication/docdb/biblio", str(raised.exception))
+        self.assertIn("(EP).(2000000).(A1)", str(raised.exception))
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(len(stats["recent_misses"]), 1)
+
+    async def test_key_ignores_host(self):
+        """Test that a recording replays against any OPS base URL"""
+        await self.record()
+        client = AsyncEpoClient(
+            "key", "secret", mode="replay", recording=ResponseStore(self.path),
+            base_url="http://127.0.0.1:8089/3.2",
+        )
+        response = await client.family("publication", Epodoc("EP1000000"))
+        await client.aclose()
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            AsyncEpoClient("key", "secret", mode="offline")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,308 @@
+"""
+Test cases for retries, hedging and circuit breaking
+"""
+import asyncio
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import httpx
+from epo_ops.exceptions import IndividualQuotaPerHourExceeded
+from epo_ops.models import Epodoc
+
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.cache import ResponseCache
+from epo_ops_mcp_server.services.epo_client import AsyncEpoClient
+from epo_ops_mcp_server.services.quota import HOUR_HEADER
+from epo_ops_mcp_server.services.resilience import CircuitBreaker, CircuitOpen, LatencyTracker, RetryPolicy
+from tests.test_async_client import TOKEN_BODY, make_client
+from tests.test_cache import FakeClock
+
+NUMBER = Epodoc("EP1000000")
+
+
+def xml(body="<ok/>"):
+    return httpx.Response(200, text=body, headers={"Content-Type": "application/xml"})
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(retries=3, backoff=1.0, max_delay=10.0, rng=random.Random(1))
+
+    def test_jittered_backoff(self):
+        """Test that waits are random and bounded by a doubling ceiling"""
+        for attempt, ceiling in ((0, 1.0), (1, 2.0), (2, 4.0), (5, 10.0)):
+            delays = [self.policy.delay(attempt) for _ in range(50)]
+            self.assertTrue(all(0 <= d <= ceiling for d in delays))
+            self.assertGreater(len(set(delays)), 1)
+
+    def test_retry_after(self):
+        """Test that Retry-After is honoured (milliseconds when OPS throttles)"""
+        self.assertGreaterEqual(self.policy.delay(0, httpx.Headers({"Retry-After": "3"})), 3.0)
+        throttled = httpx.Headers({"Retry-After": "2500", "X-Throttling-Control": "busy (retrieval=red:5)"})
+        self.assertGreaterEqual(self.policy.delay(0, throttled), 2.5)
+        self.assertIsNone(self.policy.delay(0, httpx.Headers({"Retry-After": "60"})))
+
+    def test_retryable(self):
+        self.assertTrue(self.policy.retryable(httpx.Response(503)))
+        self.assertTrue(self.policy.retryable(httpx.Response(429)))
+        self.assertFalse(self.policy.retryable(httpx.Response(404)))
+        throttled = httpx.Response(403, headers={"X-Throttling-Control": "overloaded", "Retry-After": "100"})
+        self.assertTrue(self.policy.retryable(throttled))
+        quota = httpx.Response(403, headers={"X-Rejection-Reason": "IndividualQuotaPerHour", "Retry-After": "100"})
+        self.assertFalse(self.policy.retryable(quota))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_open_probe_close(self):
+        """Test that the breaker opens, lets one probe through after the reset time and closes"""
+        clock = FakeClock()
+        breaker = CircuitBreaker("retrieval", failures=2, reset_after=30, clock=clock)
+        breaker.failure()
+        breaker.check()
+        breaker.failure()
+        with self.assertRaises(CircuitOpen):
+            breaker.check()
+
+        clock.now += 30
+        breaker.check()
+        self.assertEqual(breaker.state, "half-open")
+        # Only one probe at a time
+        with self.assertRaises(CircuitOpen):
+            breaker.check()
+        breaker.success()
+        breaker.check()
+        self.assertEqual(breaker.snapshot(), {"state": "closed", "failures": 0, "opened": 1, "rejected": 2})
+
+    def test_failed_probe_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker("search", failures=1, reset_after=30, clock=clock)
+        breaker.failure()
+        clock.now += 30
+        breaker.check()
+        breaker.failure()
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpen):
+            breaker.check()
+
+    def test_latency_percentile(self):
+        tracker = LatencyTracker(min_samples=20)
+        for i in range(19):
+            tracker.observe("retrieval", i / 100)
+        self.assertIsNone(tracker.percentile("retrieval"))
+        tracker.observe("retrieval", 0.19)
+        self.assertEqual(tracker.percentile("retrieval"), 0.19)
+
+
+class TestClientResilience(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+    async def test_server_error_is_retried(self):
+        """Test that a 503 followed by a 200 returns the 200"""
+        def handler(request):
+            self.calls += 1
+            return xml() if self.calls > 1 else httpx.Response(503, headers={"Retry-After": "0"})
+
+        client = make_client(handler)
+        response = await client.published_data("publication", NUMBER)
+        await client.aclose()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(client.stats()["resilience"]["retries"], 1)
+        self.assertEqual(client.stats()["resilience"]["breakers"]["retrieval"]["state"], "closed")
+
+    async def test_transport_error_is_retried(self):
+        def handler(request):
+            self.calls += 1
+            if self.calls == 1:
+                raise httpx.ConnectTimeout("timed out", request=request)
+            return xml()
+
+        client = make_client(handler)
+        response = await client.published_data("publication", NUMBER)
+        await client.aclose()
+        self.assertEqual(response.status_code, 200)
+
+    async def test_quota_rejection_is_not_retried(self):
+        def handler(request):
+            self.calls += 1
+            return httpx.Response(403, headers={"X-Rejection-Reason": "IndividualQuotaPerHour"})
+
+        client = make_client(handler)
+        with self.assertRaises(IndividualQuotaPerHourExceeded):
+            await client.published_data("publication", NUMBER)
+        await client.aclose()
+        self.assertEqual(self.calls, 1)
+
+    async def test_open_circuit_fails_fast(self):
+        """Test that repeated failures open the breaker and later calls are not sent"""
+        clock = FakeClock()
+
+        def handler(request):
+            self.calls += 1
+            return httpx.Response(503)
+
+        client = make_client(handler)
+        client.breakers["retrieval"] = CircuitBreaker("retrieval", failures=2, reset_after=30, clock=clock)
+        try:
+            with self.assertRaises(httpx.HTTPStatusError):
+                await client.published_data("publication", NUMBER)
+            # Retrying stops once the breaker opens
+            self.assertEqual(self.calls, 2)
+            with self.assertRaises(CircuitOpen):
+                await client.published_data("publication", Epodoc("EP1000001"))
+            self.assertEqual(self.calls, 2)
+            # Other services are unaffected
+            with self.assertRaises(httpx.HTTPStatusError):
+                await client.family("publication", NUMBER)
+        finally:
+            await client.aclose()
+        self.assertEqual(client.gauges()["ops_circuit_open"][(("service", "retrieval"),)], 1)
+
+    async def test_failed_token_refresh_during_probe(self):
+        """Test that a probe failing at the auth endpoint does not leave the breaker stuck"""
+        clock = FakeClock()
+        auth_status = [503]
+
+        def dispatch(request):
+            if request.url.path.endswith("/auth/accesstoken"):
+                if auth_status[0] != 200:
+                    return httpx.Response(auth_status[0])
+                return httpx.Response(200, text=TOKEN_BODY)
+            self.calls += 1
+            return xml()
+
+        client = AsyncEpoClient(
+            "key", "secret", transport=httpx.MockTransport(dispatch), retry=RetryPolicy(backoff=0),
+        )
+        breaker = CircuitBreaker("retrieval", failures=1, reset_after=30, clock=clock)
+        client.breakers["retrieval"] = breaker
+        breaker.failure()
+        try:
+            # A server error at the auth endpoint fails the probe
+            clock.now += 30
+            with self.assertRaises(httpx.HTTPStatusError):
+                await client.published_data("publication", NUMBER)
+            self.assertEqual(breaker.state, "open")
+
+            # Any other error only ends it: the next call probes again
+            clock.now += 30
+            auth_status[0] = 401
+            with self.assertRaises(httpx.HTTPStatusError):
+                await client.published_data("publication", NUMBER)
+            self.assertEqual(breaker.state, "half-open")
+
+            auth_status[0] = 200
+            response = await client.published_data("publication", NUMBER)
+        finally:
+            await client.aclose()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual(self.calls, 1)
+
+    async def test_hedged_retrieval(self):
+        """Test that a retrieval slower than the p95 is sent again and the first answer wins"""
+        async def handler(request):
+            self.calls += 1
+            if self.calls == 1:
+                await asyncio.sleep(5)
+                return xml("<slow/>")
+            return xml("<fast/>")
+
+        client = make_client(handler)
+        client.hedge = True
+        for _ in range(20):
+            client.latency.observe("retrieval", 0.01)
+        with mock.patch.object(settings, "OPS_HEDGE_MIN_DELAY", 0.01):
+            response = await asyncio.wait_for(client.published_data("publication", NUMBER), 2)
+        await client.aclose()
+
+        self.assertEqual(response.text, "<fast/>")
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(client.stats()["resilience"]["hedge_wins"], 1)
+
+    async def test_hedge_loser_is_accounted(self):
+        """Test that the answer to the losing copy still reaches the quota ledger and the scheduler"""
+        async def handler(request):
+            self.calls += 1
+            if self.calls == 1:
+                await asyncio.sleep(0.2)
+                return httpx.Response(200, text="<slow/>", headers={
+                    "Content-Type": "application/xml",
+                    HOUR_HEADER: "5000",
+                    "X-Throttling-Control": "busy (retrieval=yellow:50)",
+                })
+            return httpx.Response(200, text="<fast/>", headers={"Content-Type": "application/xml", HOUR_HEADER: "3000"})
+
+        client = make_client(handler)
+        client.hedge = True
+        for _ in range(20):
+            client.latency.observe("retrieval", 0.01)
+        try:
+            with mock.patch.object(settings, "OPS_HEDGE_MIN_DELAY", 0.01):
+                response = await asyncio.wait_for(client.published_data("publication", NUMBER), 2)
+            self.assertEqual(response.text, "<fast/>")
+            self.assertEqual(client.quota.windows["hour"].used, 3000)
+
+            await asyncio.wait_for(asyncio.gather(*client._stragglers), 2)
+            self.assertEqual(client.quota.windows["hour"].used, 5000)
+            self.assertEqual(client.scheduler.snapshot()["services"]["retrieval"]["status"], "yellow")
+        finally:
+            await client.aclose()
+
+
+class TestStaleOnError(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.failing = False
+        self.calls = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def handler(self, request):
+        if request.url.path.endswith("/auth/accesstoken"):
+            return httpx.Response(200, text=TOKEN_BODY)
+        self.calls += 1
+        return httpx.Response(503) if self.failing else xml("<biblio/>")
+
+    async def test_expired_entry_served_while_ops_fails(self):
+        """Test that an expired cache entry is served on 5xx answers and an open circuit"""
+        cache = ResponseCache(
+            path=os.path.join(self.tmp.name, "cache.db"), ttls={"biblio": 10}, stale_ttl=10, clock=self.clock,
+        )
+        client = AsyncEpoClient(
+            "key", "secret", transport=httpx.MockTransport(self.handler), cache=cache,
+            retry=RetryPolicy(retries=1, backoff=0),
+        )
+        client.breakers["retrieval"] = CircuitBreaker("retrieval", failures=2, reset_after=30, clock=self.clock)
+        try:
+            await client.published_data("publication", NUMBER)
+            self.clock.now += 100
+            self.failing = True
+
+            response = await client.published_data("publication", NUMBER)
+            self.assertEqual(response.text, "<biblio/>")
+            self.assertEqual(self.calls, 3)
+            self.assertEqual(client.breakers["retrieval"].state, "open")
+
+            # The breaker answers for OPS now; the cache still has the entry
+            response = await client.published_data("publication", NUMBER)
+            self.assertEqual(response.text, "<biblio/>")
+            self.assertEqual(self.calls, 3)
+            self.assertEqual(cache.stats["stale_on_error"], 2)
+        finally:
+            await client.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Test cases for auto-paginating search
+"""
+import unittest
+
+import httpx
+
+from epo_ops_mcp_server.services.search import page_windows, paginate
+from epo_ops_mcp_server.utils.parser import parse_ops_xml
+from tests.test_async_client import make_client
+
+HIT = (
+    '<ops:publication-reference family-id="{0}">'
+    '<document-id document-id-type="docdb"><country>EP</country>'
+    '<doc-number>{0}</doc-number><kind>A1</kind></document-id>'
+    '</ops:publication-reference>'
+)
+
+
+def search_handler(total, requests_seen, duplicate=None, fail=None):
+    """Answer biblio searches with one hit per position in the X-OPS-Range window."""
+    def handler(request):
+        begin, end = [int(x) for x in request.headers["X-OPS-Range"].split("-")]
+        requests_seen.append((begin, end))
+        if fail == begin:
+            return httpx.Response(500, text="Server error")
+        numbers = list(range(begin, min(end, total) + 1))
+        if duplicate == begin:
+            numbers[0] = begin - 1
+        return httpx.Response(
+            200,
+            text=(
+                '<ops:world-patent-data xmlns="http://www.epo.org/exchange" xmlns:ops="http://ops.epo.org">'
+                '<ops:biblio-search total-result-count="{0}"><ops:query>ti=brick</ops:query>'
+                '<ops:range begin="{1}" end="{2}"/><ops:search-result>{3}</ops:search-result>'
+                '</ops:biblio-search></ops:world-patent-data>'
+            ).format(total, begin, end, "".join(HIT.format(n) for n in numbers)),
+            headers={"content-type": "application/xml"},
+        )
+    return handler
+
+
+class TestSearch(unittest.IsolatedAsyncioTestCase):
+
+    async def search(self, handler, range_begin=1, range_end=2000, on_page=None):
+        client = make_client(handler)
+
+        async def fetch_page(begin, end):
+            response = await client.published_data_search(
+                cql="ti=brick", range_begin=begin, range_end=end
+            )
+            return parse_ops_xml(response.content)
+
+        try:
+            return await paginate(fetch_page, range_begin, range_end, concurrency=3, on_page=on_page)
+        finally:
+            await client.aclose()
+
+    def test_page_windows(self):
+        """Test that ranges are split into windows of at most 100 results"""
+        self.assertEqual(page_windows(1, 250), [(1, 100), (101, 200), (201, 250)])
+        self.assertEqual(page_windows(5, 4), [])
+
+    async def test_fetches_all_pages_in_order(self):
+        """Test that every page up to the result count is fetched and merged in order"""
+        seen = []
+        result = await self.search(search_handler(250, seen))
+        self.assertEqual(sorted(seen), [(1, 100), (101, 200), (201, 250)])
+        self.assertEqual(result["search"]["total"], 250)
+        self.assertEqual(result["search"]["pages"], 3)
+        numbers = [int(hit["id"]["number"]) for hit in result["hits"]]
+        self.assertEqual(numbers, list(range(1, 251)))
+
+    async def test_range_is_capped(self):
+        """Test that the requested range and the OPS 2000 limit cap the fetch"""
+        seen = []
+        result = await self.search(search_handler(5000, seen), range_begin=1, range_end=5000)
+        self.assertEqual(len(seen), 20)
+        self.assertEqual(result["search"]["end"], 2000)
+
+        seen = []
+        await self.search(search_handler(5000, seen), range_begin=101, range_end=150)
+        self.assertEqual(seen, [(101, 150)])
+
+    async def test_duplicates_dropped(self):
+        """Test that a hit repeated on a later page is returned once"""
+        result = await self.search(search_handler(200, [], duplicate=101))
+        self.assertEqual(len(result["hits"]), 199)
+        self.assertEqual(result["search"]["duplicates"], 1)
+
+    async def test_failed_page_returns_partial_results(self):
+        """Test that a failing page is reported without losing the others"""
+        result = await self.search(search_handler(300, [], fail=101))
+        self.assertEqual(len(result["hits"]), 200)
+        self.assertEqual(result["errors"][0]["range"], "101-200")
+
+    async def test_progress(self):
+        """Test that every page reports progress and its new hits"""
+        progress = []
+
+        async def on_page(done, total, new_items):
+            progress.append((done, total, len(new_items.get("hits", []))))
+
+        await self.search(search_handler(150, []), on_page=on_page)
+        self.assertEqual([p[:2] for p in progress], [(1, 2), (2, 2)])
+        self.assertEqual(sum(p[2] for p in progress), 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,28 +1,85 @@
 """
 Unit tests for EPO OPS MCP Server
 """
-import pytest
-from epo_ops_mcp_server.main import mcp
-
-def test_mcp_server_initialization():
-    """Test that the MCP server is initialized correctly."""
-    assert mcp is not None
-    assert mcp.name == "EPO OPS MCP Server"
-
-def test_tools_registered():
-    """Test that all tools are registered."""
-    tool_names = [tool.name for tool in mcp.tools]
-    
-    expected_tools = [
-        "get_published_data",
-        "search_published_data",
-        "get_family",
-        "get_legal",
-        "convert_number",
-        "get_register",
-        "search_register",
-        "get_image"
-    ]
-    
-    for tool_name in expected_tools:
-        assert tool_name in tool_names
\ No newline at end of file
+import json
+import unittest
+from urllib.parse import unquote
+
+import httpx
+from fastmcp import Client
+
+import main
+from epo_ops_mcp_server.services import epo_client
+from tests import ops_samples
+from tests.test_async_client import make_client
+
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request)
+            return httpx.Response(200, text=ops_samples.BIBLIO, headers={"content-type": "application/xml"})
+
+        epo_client._async_epo_client = make_client(handler)
+
+    async def asyncTearDown(self):
+        await epo_client.close_async_epo_client()
+
+    async def call(self, tool, arguments):
+        async with Client(main.mcp) as client:
+            result = await client.call_tool(tool, arguments)
+        return json.loads(result.content[0].text)
+
+    def test_mcp_server_initialization(self):
+        """Test that the MCP server is initialized correctly."""
+        self.assertEqual(main.mcp.name, "EPO OPS MCP Server")
+
+    async def test_tools_registered(self):
+        """Test that all tools are registered."""
+        tools = await main.mcp.get_tools()
+        for name in (
+            "get_published_data",
+            "get_published_data_batch",
+            "search_published_data",
+            "export_search",
+            "get_family",
+            "expand_family",
+            "crawl_citations",
+            "get_legal",
+            "convert_number",
+            "get_register",
+            "search_register",
+            "get_image",
+        ):
+            self.assertIn(name, tools)
+
+    async def test_convert_number_locally(self):
+        """Test that publication numbers are converted without calling OPS"""
+        result = await self.call("convert_number", {
+            "reference_type": "publication",
+            "input_data": ["EP 1 000 000 A1", "US 2020/0123456 A1"],
+            "output_format": "epodoc",
+        })
+        self.assertEqual([r["status"] for r in result], ["ok", "ok"])
+        self.assertEqual([r["source"] for r in result], ["local", "local"])
+        self.assertEqual(result[1]["number"], "US2020123456")
+        self.assertEqual(self.requests, [])
+
+    async def test_reference_type_reaches_normalization(self):
+        """Test that publication numbers are normalized and application numbers are sent as given"""
+        await self.call("get_published_data", {
+            "reference_type": "publication", "input_data": {"number": "US 2020/0123456 A1"}, "include_raw": False,
+        })
+        await self.call("get_published_data", {
+            "reference_type": "application", "input_data": {"number": "US2020/0123456"}, "include_raw": False,
+        })
+        bodies = [unquote(r.content.decode() or r.url.path) for r in self.requests]
+        self.assertIn("US2020123456", bodies[0])
+        self.assertIn("US2020/0123456", bodies[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
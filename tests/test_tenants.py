@@ -0,0 +1,126 @@
+"""
+Test cases for multi-tenant credential routing
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from epo_ops_mcp_server.config import settings
+from epo_ops_mcp_server.services.epo_client import TenantClients
+from epo_ops_mcp_server.services.tenants import (
+    TenantMiddleware,
+    UnknownTenant,
+    current_tenant,
+    load_tenants,
+    resolve_tenant,
+    tenant_path,
+)
+
+CONFIG = {
+    "team-a": {"token": "token-a", "key": "key-a", "secret": "secret-a"},
+    "team-b": {"token": "token-b", "key": "key-b", "secret": "secret-b"},
+}
+
+
+class TestTenantResolution(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tenants = load_tenants(CONFIG)
+
+    def test_resolve(self):
+        self.assertEqual(resolve_tenant("token-b", self.tenants), "team-b")
+        with self.assertRaises(UnknownTenant):
+            resolve_tenant("token-c", self.tenants)
+
+    def test_missing_token_uses_default_credentials(self):
+        with mock.patch.object(settings, "EPO_OPS_KEY", "key"), mock.patch.object(settings, "EPO_OPS_SECRET", "secret"):
+            self.assertIsNone(resolve_tenant(None, self.tenants))
+        with mock.patch.object(settings, "EPO_OPS_KEY", ""):
+            with self.assertRaises(UnknownTenant):
+                resolve_tenant(None, self.tenants)
+
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            load_tenants({"../etc": {"token": "t", "key": "k", "secret": "s"}})
+        with self.assertRaises(ValueError):
+            load_tenants({"team-c": {"token": "t", "key": "k"}})
+
+    def test_tenant_path(self):
+        self.assertEqual(tenant_path("/var/tmp/quota.json", "team-a"), "/var/tmp/quota-team-a.json")
+        self.assertEqual(tenant_path("/var/tmp/quota.json", None), "/var/tmp/quota.json")
+        self.assertEqual(tenant_path("", "team-a"), "")
+
+    async def test_middleware_sets_tenant(self):
+        """Test that the tenant of an HTTP request is visible to the tools it calls"""
+        middleware = TenantMiddleware(self.tenants)
+
+        async def call_next(context):
+            return current_tenant()
+
+        with mock.patch(
+            "epo_ops_mcp_server.services.tenants.get_http_headers",
+            return_value={"x-tenant-token": "token-a"},
+        ):
+            self.assertEqual(await middleware.on_request(None, call_next), "team-a")
+        self.assertIsNone(current_tenant())
+
+
+class TestTenantClients(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patches = [
+            mock.patch.object(settings, "QUOTA_PATH", os.path.join(self.tmp.name, "quota.json")),
+            mock.patch.object(settings, "OPS_TOKEN_PATH", os.path.join(self.tmp.name, "token.json")),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.pool = TenantClients(load_tenants(CONFIG), max_clients=1, max_connections=2, close_delay=0.05)
+
+    async def asyncTearDown(self):
+        await self.pool.aclose()
+        for patch in self.patches:
+            patch.stop()
+        self.tmp.cleanup()
+
+    async def test_tenants_are_isolated(self):
+        """Test that each tenant has its own credentials, throttle state and quota"""
+        a = self.pool.get("team-a")
+        self.assertIs(self.pool.get("team-a"), a)
+        self.assertEqual(a.key, "key-a")
+        self.assertTrue(a.quota.path.endswith("quota-team-a.json"))
+        self.assertTrue(a.tokens.path.endswith("token-team-a.json"))
+
+        b = self.pool.get("team-b")
+        self.assertEqual(b.key, "key-b")
+        self.assertIsNot(a.scheduler, b.scheduler)
+        self.assertIsNot(a.quota, b.quota)
+
+        a.scheduler.update("search", {"X-Throttling-Control": "overloaded (search=black:0)", "Retry-After": "60000"})
+        self.assertGreater(a.scheduler.delay("search"), 0)
+        self.assertEqual(b.scheduler.delay("search"), 0)
+
+    async def test_pool_is_bounded(self):
+        """Test that the least recently used tenant client is retired, then revived or closed"""
+        a = self.pool.get("team-a")
+        self.pool.get("team-b")
+        self.assertEqual(list(self.pool.clients), ["team-b"])
+        self.assertIn("team-a", self.pool.retiring)
+
+        # Coming back before the close delay reuses the retired client
+        self.assertIs(self.pool.get("team-a"), a)
+        self.assertEqual(self.pool.stats["revived"], 1)
+
+        closing = self.pool.retiring["team-b"][1]
+        await closing
+        self.assertEqual(self.pool.retiring, {})
+        self.assertEqual(self.pool.stats["created"], 2)
+
+    async def test_unknown_tenant(self):
+        with self.assertRaises(UnknownTenant):
+            self.pool.get("team-c")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Test cases for the per-service throttle scheduler
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from epo_ops_mcp_server.services.priority import BACKGROUND, BULK, INTERACTIVE
+from epo_ops_mcp_server.services.throttle import (
+    SharedThrottleState,
+    ThrottleScheduler,
+    parse_throttling_control,
+)
+
+HEADER = (
+    "busy (images=green:100, inpadoc=yellow:45, other=green:1000, "
+    "retrieval=green:200, search=red:15)"
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestThrottleScheduler(unittest.TestCase):
+
+    def test_parse_header(self):
+        """Test parsing of the X-Throttling-Control header"""
+        status = parse_throttling_control(HEADER)
+        self.assertEqual(status["system_status"], "busy")
+        self.assertEqual(status["services"]["search"], {"status": "red", "limit": 15})
+        self.assertEqual(status["services"]["images"]["limit"], 100)
+
+    def test_service_for_url(self):
+        """Test that URLs map onto OPS throttling services"""
+        prefix = "https://ops.epo.org/3.2/rest-services/"
+        self.assertEqual(ThrottleScheduler.service_for_url(prefix + "published-data/search"), "search")
+        self.assertEqual(ThrottleScheduler.service_for_url(prefix + "legal/publication/epodoc"), "inpadoc")
+        self.assertEqual(ThrottleScheduler.service_for_url(prefix + "register/publication/epodoc"), "other")
+
+    def test_lanes_are_independent(self):
+        """Test that a search burst does not delay image requests"""
+        clock = FakeClock()
+        scheduler = ThrottleScheduler(clock=clock)
+        scheduler.update("search", {"X-Throttling-Control": HEADER})
+
+        delays = [scheduler.reserve("search") for _ in range(3)]
+        self.assertEqual(delays, [0.0, 4.0, 8.0])
+        self.assertEqual(scheduler.reserve("images"), 0.0)
+        self.assertAlmostEqual(scheduler.reserve("images"), 0.6)
+
+    def test_black_service_is_blocked(self):
+        """Test that a black service waits for Retry-After"""
+        clock = FakeClock()
+        scheduler = ThrottleScheduler(clock=clock)
+        scheduler.update("search", {
+            "X-Throttling-Control": HEADER.replace("search=red:15", "search=black:0"),
+            "Retry-After": "30000",
+        })
+        self.assertEqual(scheduler.reserve("search"), 30.0)
+        self.assertEqual(scheduler.reserve("retrieval"), 0.0)
+        self.assertEqual(scheduler.snapshot()["services"]["search"]["status"], "black")
+
+
+class TestSharedThrottleState(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        path = os.path.join(self.tmp.name, "throttle.db")
+        # Two processes' schedulers sharing one state file
+        self.states = [SharedThrottleState(path, clock=self.clock) for _ in range(2)]
+        self.schedulers = [ThrottleScheduler(clock=self.clock, shared=state) for state in self.states]
+
+    def tearDown(self):
+        for state in self.states:
+            state.close()
+        self.tmp.cleanup()
+
+    def test_slots_are_booked_across_processes(self):
+        """Test that two schedulers pace a service like one client"""
+        first, second = self.schedulers
+        first.update("search", {"X-Throttling-Control": HEADER})
+        self.assertEqual(first.reserve("search"), 0.0)
+        # search=15/min: the second process learns the limit and waits for the next slot
+        self.assertAlmostEqual(second.delay("search"), 4.0)
+        self.assertAlmostEqual(second.reserve("search"), 4.0)
+        self.assertAlmostEqual(first.delay("search"), 4.0)
+        self.assertEqual(second.delay("retrieval"), 0.0)
+
+    def test_block_is_shared(self):
+        first, second = self.schedulers
+        first.update("images", {
+            "X-Throttling-Control": "overloaded (images=black:0, retrieval=green:200)",
+            "Retry-After": "30000",
+        })
+        self.assertAlmostEqual(second.delay("images"), 30.0)
+        self.clock.now += 30
+        self.assertEqual(second.delay("images"), 0.0)
+
+
+class TestSharedStateOffLoop(unittest.IsolatedAsyncioTestCase):
+
+    async def test_shared_state_not_touched_on_event_loop(self):
+        """Test that acquire and update run the SQLite calls on the state's own thread"""
+        tmp = tempfile.TemporaryDirectory()
+        state = SharedThrottleState(os.path.join(tmp.name, "throttle.db"))
+        threads = []
+        for name in ("delay", "reserve", "update"):
+            original = getattr(state, name)
+
+            def record(*args, _original=original, _name=name):
+                threads.append((_name, threading.current_thread()))
+                return _original(*args)
+
+            setattr(state, name, record)
+        scheduler = ThrottleScheduler(shared=state)
+        try:
+            scheduler.update("search", {"X-Throttling-Control": HEADER})
+            await scheduler.acquire("search")
+        finally:
+            await asyncio.to_thread(state.close)
+            tmp.cleanup()
+        self.assertEqual({name for name, _ in threads}, {"delay", "reserve", "update"})
+        self.assertNotIn(threading.main_thread(), {thread for _, thread in threads})
+
+
+class TestPriorityLanes(unittest.IsolatedAsyncioTestCase):
+
+    async def test_interactive_goes_first(self):
+        """Test that queued interactive requests are served before bulk and background ones"""
+        scheduler = ThrottleScheduler()
+        scheduler.update("search", {"X-Throttling-Control": HEADER.replace("search=red:15", "search=green:600")})
+        order = []
+
+        async def request(name, level):
+            await scheduler.acquire("search", level)
+            order.append(name)
+
+        await scheduler.acquire("search", INTERACTIVE)
+        tasks = [asyncio.create_task(request("background", BACKGROUND))]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(request("bulk", BULK))]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(request("interactive", INTERACTIVE))]
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["interactive", "bulk", "background"])
+        self.assertEqual(scheduler.snapshot()["services"]["search"]["queued"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
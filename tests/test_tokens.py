@@ -0,0 +1,141 @@
+"""
+Test cases for the OPS access token manager
+"""
+import json
+import os
+import stat
+import tempfile
+import unittest
+
+import httpx
+
+from epo_ops_mcp_server.services.epo_client import AsyncEpoClient, TokenManager
+
+AUTH_URL = "https://ops.epo.org/3.2/auth/accesstoken"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenManager(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "token.json")
+        self.clock = FakeClock()
+        self.issued = 0
+        self.http = httpx.AsyncClient(transport=httpx.MockTransport(self.auth))
+
+    async def asyncTearDown(self):
+        await self.http.aclose()
+        self.tmp.cleanup()
+
+    def auth(self, request):
+        self.issued += 1
+        return httpx.Response(200, json={"access_token": "t{0}".format(self.issued), "expires_in": "1199"})
+
+    def manager(self, key="key", path=None):
+        return TokenManager(
+            self.http, AUTH_URL, key, "secret",
+            path=self.path if path is None else path, refresh_margin=120, clock=self.clock,
+        )
+
+    async def test_reuses_token_until_refresh_is_due(self):
+        """Test that requests inside the refresh margin are not held up"""
+        tokens = self.manager(path="")
+        self.assertEqual((await tokens.get()).value, "t1")
+        self.clock.now += 1199 - 60
+        # Due for renewal, but still valid: served without waiting
+        self.assertEqual((await tokens.get()).value, "t1")
+        self.assertEqual(self.issued, 1)
+
+        self.assertEqual((await tokens.refresh()).value, "t2")
+        self.assertEqual((await tokens.refresh()).value, "t2")
+        self.assertEqual(self.issued, 2)
+        await tokens.aclose()
+
+    async def test_expired_token_is_renewed_before_use(self):
+        tokens = self.manager(path="")
+        await tokens.get()
+        self.clock.now += 1200
+        self.assertEqual((await tokens.get()).value, "t2")
+        await tokens.aclose()
+
+    async def test_token_shared_through_file(self):
+        """Test that a second process adopts the token the first one acquired"""
+        first, second = self.manager(), self.manager()
+        self.assertEqual((await first.get()).value, "t1")
+        self.assertEqual((await second.get()).value, "t1")
+        self.assertEqual(self.issued, 1)
+        self.assertEqual(second.stats["shared"], 1)
+
+        with open(self.path) as f:
+            state = json.load(f)
+        self.assertEqual(set(state), {"owner", "access_token", "expires_at"})
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+        # Other credentials never adopt it
+        other = self.manager(key="other")
+        self.assertEqual((await other.get()).value, "t2")
+        for tokens in (first, second, other):
+            await tokens.aclose()
+
+    async def test_rejected_token_not_reused(self):
+        first, second = self.manager(), self.manager()
+        await first.get()
+        await second.get()
+        self.assertEqual((await second.refresh(rejected="t1")).value, "t2")
+        # The file now holds t2, which the first process adopts
+        self.assertEqual((await first.refresh(rejected="t1")).value, "t2")
+        self.assertEqual(self.issued, 2)
+        await first.aclose()
+        await second.aclose()
+
+    async def test_unwritable_path_keeps_token_in_process(self):
+        """Test that a token file that cannot be created does not fail requests"""
+        blocker = os.path.join(self.tmp.name, "not-a-directory")
+        open(blocker, "w").close()
+        tokens = self.manager(path=os.path.join(blocker, "token.json"))
+        with self.assertLogs("epo_ops_mcp_server.services.epo_client", "WARNING"):
+            self.assertEqual((await tokens.get()).value, "t1")
+        self.assertEqual(tokens.path, "")
+        self.assertEqual((await tokens.get()).value, "t1")
+        self.assertEqual((await tokens.refresh(rejected="t1")).value, "t2")
+        self.assertEqual(self.issued, 2)
+        await tokens.aclose()
+
+
+class TestClientTokens(unittest.IsolatedAsyncioTestCase):
+
+    async def test_expired_token_response_renews_and_retries(self):
+        """Test that OPS rejecting a token renews it once and retries the request"""
+        issued = []
+        seen = []
+
+        def handler(request):
+            if request.url.path.endswith("/auth/accesstoken"):
+                issued.append("t{0}".format(len(issued) + 1))
+                return httpx.Response(200, json={"access_token": issued[-1], "expires_in": "1199"})
+            seen.append(request.headers["Authorization"])
+            if request.headers["Authorization"] == "Bearer t1":
+                return httpx.Response(400, text="<fault>invalid_access_token</fault>")
+            return httpx.Response(200, text="<ok/>")
+
+        client = AsyncEpoClient("key", "secret", transport=httpx.MockTransport(handler))
+        response = await client.register_search("pa=acme")
+        stats = client.stats()["token"]
+        await client.aclose()
+
+        self.assertEqual(response.text, "<ok/>")
+        self.assertEqual(seen, ["Bearer t1", "Bearer t2"])
+        self.assertEqual(stats["rejected"], 1)
+        self.assertFalse(stats["shared"])
+
+
+if __name__ == "__main__":
+    unittest.main()